@@ -0,0 +1,42 @@
+"""Compare prompt token usage of the available history encodings.
+
+Replays a scripted coffee maker session (no LLM calls) and prints the
+number of tokens the history section takes in each encoding, with and without
+run compression.
+
+    cd src
+    python benchmarks/bench_history_encoding.py [model_name]
+"""
+import asyncio
+import os
+import sys
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from examples.coffee_maker.main import initialize_processor
+
+COFFEE_SCRIPT = (
+    [(1, {"power": "on"})]
+    + [(0, {"reason": "Machine is heating", "wait_time": 20})] * 6
+    + [(2, {"amount_grams": 30}), (3, {"cups": 2})]
+)
+
+
+async def main():
+    model_name = sys.argv[1] if len(sys.argv) > 1 else "gpt-4o-mini"
+    processor = await initialize_processor()
+    processor.model_name = model_name
+    processor.history_size = len(COFFEE_SCRIPT)
+    processor.summary_interval = 10 ** 9  # no best-practice LLM calls while replaying
+
+    for command_id, params in COFFEE_SCRIPT:
+        await processor.execute_command(command_id, params, "Scripted step used for the encoding benchmark")
+
+    counts = processor.history_encoding_token_counts()
+    print(f"History tokens for {len(COFFEE_SCRIPT)} coffee maker steps ({model_name}):")
+    for name, tokens in counts.items():
+        print(f"  {name:<12} {tokens:>6} tokens  ({tokens / counts['json']:.0%} of json)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
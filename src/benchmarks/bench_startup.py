@@ -0,0 +1,73 @@
+"""
+Cold-start benchmark: time from `import core.llm_processor` to the first generate_prompt().
+
+Every run happens in a fresh interpreter, so nothing is cached in sys.modules.
+Usage (from src/):
+
+    python benchmarks/bench_startup.py --runs 10 --max-ms 300
+
+Exits with status 1 when the median total exceeds --max-ms, so it can guard
+against regressions in CI.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CONFIG_DIR = os.path.join(SRC_DIR, "examples", "calculator", "config")
+
+# Packages that should only be loaded once a processor actually needs them
+HEAVY_MODULES = ("openai", "yaml", "dotenv", "flask", "tiktoken", "tweepy", "twikit")
+
+RUN_SNIPPET = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {src_dir!r})
+from core.llm_processor import LLMProcessor
+imported = time.perf_counter()
+processor = LLMProcessor({functions!r}, {goal!r})
+created = time.perf_counter()
+processor.generate_prompt()
+prompted = time.perf_counter()
+print(json.dumps({{
+    "import_ms": (imported - start) * 1000,
+    "init_ms": (created - imported) * 1000,
+    "prompt_ms": (prompted - created) * 1000,
+    "total_ms": (prompted - start) * 1000,
+    "loaded": [name for name in {heavy!r} if name in sys.modules],
+}}))
+"""
+
+
+def run_once() -> dict:
+    code = RUN_SNIPPET.format(src_dir=SRC_DIR,
+                              functions=os.path.join(CONFIG_DIR, "functions.json"),
+                              goal=os.path.join(CONFIG_DIR, "goal.yaml"),
+                              heavy=HEAVY_MODULES)
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10, help="Fresh interpreters to measure")
+    parser.add_argument("--max-ms", type=float, default=None, help="Fail if the median total exceeds this")
+    args = parser.parse_args()
+
+    results = [run_once() for _ in range(args.runs)]
+    for key in ("import_ms", "init_ms", "prompt_ms", "total_ms"):
+        values = [result[key] for result in results]
+        print(f"{key:>10}: median {statistics.median(values):8.1f}  min {min(values):8.1f}  max {max(values):8.1f}")
+    print(f"Loaded before the first LLM call: {', '.join(results[-1]['loaded']) or 'none of ' + ', '.join(HEAVY_MODULES)}")
+
+    median_total = statistics.median(result["total_ms"] for result in results)
+    if args.max_ms is not None and median_total > args.max_ms:
+        print(f"Median cold start {median_total:.1f}ms exceeds the {args.max_ms:.1f}ms budget")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import List, Optional, Tuple
+import asyncio
+import heapq
+import itertools
+import time
+
+
+class Clock(ABC):
+    """Time source used by the processor and tool implementations.
+
+    Everything that reads the time or waits goes through a clock, so a run can
+    be replayed on simulated time instead of the wall clock.
+    """
+
+    @abstractmethod
+    def now(self) -> datetime:
+        """Current wall-clock time"""
+
+    @abstractmethod
+    def monotonic(self) -> float:
+        """Seconds from an arbitrary start, for measuring intervals"""
+
+    @abstractmethod
+    async def sleep(self, seconds: float):
+        """Wait the given number of seconds"""
+
+
+class SystemClock(Clock):
+    """The real clock"""
+
+    def now(self) -> datetime:
+        return datetime.now()
+
+    def monotonic(self) -> float:
+        return time.monotonic()
+
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class SimulatedClock(Clock):
+    """Virtual clock that only moves when slept on or advanced.
+
+    Sleepers are woken in order of their wake-up time, and the clock jumps to
+    the earliest one, so concurrent sleeps overlap as they would in real time:
+    sleeping 60s and 1800s at once takes 1800s, not 1860s. Before each jump
+    the event loop runs `settle_rounds` times, letting woken tasks start their
+    next sleep. Work done in threads is treated as instantaneous.
+    """
+
+    settle_rounds = 3
+
+    def __init__(self, start: Optional[datetime] = None):
+        self.start = start or datetime.now()
+        self.elapsed = 0.0
+        self._sleepers: List[Tuple[float, int, asyncio.Future]] = []  # heap by wake-up time
+        self._sequence = itertools.count()
+        self._waker: Optional[asyncio.Handle] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+
+    def now(self) -> datetime:
+        return self.start + timedelta(seconds=self.elapsed)
+
+    def monotonic(self) -> float:
+        return self.elapsed
+
+    def advance(self, seconds: float):
+        if seconds < 0:
+            raise ValueError("Cannot move a clock backwards")
+        self.elapsed += seconds
+
+    async def sleep(self, seconds: float):
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            # Sleepers of an earlier event loop can never be woken
+            self._sleepers, self._waker, self._loop = [], None, loop
+        future = loop.create_future()
+        heapq.heappush(self._sleepers, (self.elapsed + max(0.0, seconds), next(self._sequence), future))
+        if self._waker is None:
+            self._waker = loop.call_soon(self._wake, self.settle_rounds)
+        await future
+
+    def _wake(self, rounds: int):
+        if rounds > 0:
+            self._waker = self._loop.call_soon(self._wake, rounds - 1)
+            return
+        self._waker = None
+        # Cancelled sleepers are done already and just dropped
+        while self._sleepers and self._sleepers[0][2].done():
+            heapq.heappop(self._sleepers)
+        if not self._sleepers:
+            return
+        self.elapsed = max(self.elapsed, self._sleepers[0][0])
+        while self._sleepers and self._sleepers[0][0] <= self.elapsed:
+            future = heapq.heappop(self._sleepers)[2]
+            if not future.done():
+                future.set_result(None)
+        if self._sleepers:
+            self._waker = self._loop.call_soon(self._wake, self.settle_rounds)
@@ -0,0 +1,52 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, Executor
+from typing import Dict, Any, Callable, Optional
+import asyncio
+import functools
+
+EXECUTOR_KINDS = ("inline", "thread", "process")
+
+
+class ToolExecutors:
+    """Runs sync tool implementations inline, in a shared thread pool or in a process pool.
+
+    Pools are created on first use. Pass the same instance to several processors
+    to share the pools between agents running in one event loop.
+    """
+
+    def __init__(self, thread_pool_size: Optional[int] = None, process_pool_size: Optional[int] = None):
+        """Initialize the executors
+
+        Args:
+            thread_pool_size: Worker threads for "thread" tools (default: ThreadPoolExecutor's default)
+            process_pool_size: Worker processes for "process" tools (default: number of CPUs)
+        """
+        self.thread_pool_size = thread_pool_size
+        self.process_pool_size = process_pool_size
+        self._pools: Dict[str, Executor] = {}
+
+    def _pool(self, kind: str) -> Executor:
+        if kind not in self._pools:
+            if kind == "thread":
+                self._pools[kind] = ThreadPoolExecutor(max_workers=self.thread_pool_size,
+                                                       thread_name_prefix="ai42z-tool")
+            else:
+                self._pools[kind] = ProcessPoolExecutor(max_workers=self.process_pool_size)
+        return self._pools[kind]
+
+    async def run(self, kind: str, implementation: Callable, parameters: Dict[str, Any]) -> Dict[str, Any]:
+        """Run a sync implementation with the given executor kind and return its result
+
+        "process" implementations and their results must be picklable, i.e. the
+        implementation has to be a module-level function rather than a closure.
+        """
+        if kind not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor: {kind}. Expected one of {EXECUTOR_KINDS}")
+        if kind == "inline":
+            return implementation(parameters)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool(kind), functools.partial(implementation, parameters))
+
+    def shutdown(self, wait: bool = True):
+        for pool in self._pools.values():
+            pool.shutdown(wait=wait)
+        self._pools.clear()
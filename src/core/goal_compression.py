@@ -0,0 +1,88 @@
+from typing import List, Any, Optional
+import hashlib
+import os
+
+GOAL_COMPRESSION_METHODS = ("local", "llm")
+
+LLM_COMPRESSION_PROMPT = """Rewrite the following agent goal configuration as compactly as possible.
+Keep every instruction, constraint, fact, style rule and success criterion; drop only redundancy,
+formatting and filler words. Return plain text only.
+
+{goal}
+"""
+
+
+def _fold(text: str) -> str:
+    """Collapse all whitespace runs (including folded YAML newlines) into single spaces"""
+    return " ".join(str(text).split())
+
+
+def _is_scalar(value: Any) -> bool:
+    return not isinstance(value, (dict, list))
+
+
+def _render(value: Any, depth: int, lines: List[str], prefix: str = ""):
+    pad = " " * depth
+    if isinstance(value, dict):
+        if value and all(_is_scalar(v) for v in value.values()) and prefix:
+            # Small records such as knowledge base items fit on one line
+            lines.append(pad + prefix + "; ".join(f"{k}: {_fold(v)}" for k, v in value.items()))
+            return
+        if prefix:
+            lines.append(pad + prefix.rstrip())
+            depth += 1
+            pad = " " * depth
+        for key, item in value.items():
+            if _is_scalar(item):
+                lines.append(f"{pad}{key}: {_fold(item)}")
+            else:
+                lines.append(f"{pad}{key}:")
+                _render(item, depth + 1, lines)
+    elif isinstance(value, list):
+        for item in value:
+            if _is_scalar(item):
+                lines.append(f"{pad}{prefix}- {_fold(item)}")
+            else:
+                _render(item, depth, lines, prefix="- ")
+    else:
+        lines.append(pad + prefix + _fold(value))
+
+
+def compress_goal_locally(goal: Any) -> str:
+    """Compact text form of a goal configuration: YAML/JSON syntax stripped, whitespace folded"""
+    lines: List[str] = []
+    _render(goal, 0, lines)
+    return "\n".join(lines)
+
+
+class GoalCache:
+    """On-disk cache of compressed goals keyed by the content hash of the goal file"""
+
+    def __init__(self, cache_dir: str):
+        self.cache_dir = cache_dir
+
+    @staticmethod
+    def key(goal_file: str, method: str, model_name: Optional[str] = None) -> str:
+        digest = hashlib.sha256()
+        with open(goal_file, 'rb') as f:
+            digest.update(f.read())
+        digest.update(f"|{method}|{model_name or ''}".encode())
+        return digest.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}.txt")
+
+    def load(self, key: str) -> Optional[str]:
+        try:
+            with open(self._path(key), 'r', encoding='utf-8') as f:
+                return f.read()
+        except FileNotFoundError:
+            return None
+
+    def save(self, key: str, text: str):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial entry
+        tmp_path = self._path(key) + f".{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, self._path(key))
@@ -0,0 +1,97 @@
+from dataclasses import dataclass, field
+from typing import List, Dict, Any, Optional, Callable
+
+# A goal predicate is called once for every entry appended to the history and
+# returns True when the goal is achieved. Stateful predicates keep whatever
+# they need between calls instead of rescanning the history.
+GoalPredicate = Callable[[Any, Any], bool]
+
+
+@dataclass
+class GoalStep:
+    """One step of a completion sequence, matched against single history entries"""
+    command: str
+    parameters: Dict[str, Any] = field(default_factory=dict)  # required parameter values
+    result: Dict[str, Any] = field(default_factory=dict)  # required result fields
+    result_status: Optional[str] = None  # required result["status"]
+    sum: Dict[str, float] = field(default_factory=dict)  # parameter totals to accumulate over matching entries
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "GoalStep":
+        unknown = set(data) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown goal step options: {', '.join(sorted(unknown))}")
+        if 'command' not in data:
+            raise ValueError("Goal step requires a 'command'")
+        return cls(**data)
+
+    def matches(self, entry) -> bool:
+        if entry.command_name != self.command:
+            return False
+        result = entry.result if isinstance(entry.result, dict) else {}
+        if self.result_status is not None and result.get('status') != self.result_status:
+            return False
+        return (all(entry.parameters.get(k) == v for k, v in self.parameters.items())
+                and all(result.get(k) == v for k, v in self.result.items()))
+
+    def describe(self) -> str:
+        conditions = [f"{k}={v}" for k, v in {**self.parameters, **self.result}.items()]
+        conditions += [f"{k} >= {v}" for k, v in self.sum.items()]
+        return self.command + (f" ({', '.join(conditions)})" if conditions else "")
+
+
+class SequenceGoal:
+    """Goal reached when the steps are matched in order, evaluated as a state machine.
+
+    Declared in goal.yaml under "completion", e.g.
+
+        completion:
+          sequence:
+            - {command: power_coffee_machine, parameters: {power: "on"}, result_status: success}
+            - {command: throttle, result_status: accepted, sum: {wait_time: 120}}
+            - {command: add_coffee, parameters: {amount_grams: 30}, result_status: success}
+            - {command: start_brewing, parameters: {cups: 2}, result_status: success}
+
+    Each appended entry is checked against the current step only; a step with
+    "sum" stays current until the matching entries add up to the totals.
+    """
+
+    def __init__(self, steps: List[GoalStep]):
+        if not steps:
+            raise ValueError("Completion sequence must have at least one step")
+        self.steps = steps
+        self.position = 0
+        self._totals: Dict[str, float] = {}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "SequenceGoal":
+        unknown = set(data) - {"sequence"}
+        if unknown:
+            raise ValueError(f"Unknown completion options: {', '.join(sorted(unknown))}")
+        return cls([GoalStep.from_dict(step) for step in data.get('sequence', [])])
+
+    @property
+    def completed(self) -> bool:
+        return self.position >= len(self.steps)
+
+    def __call__(self, entry, history=None) -> bool:
+        if self.completed:
+            return True
+        step = self.steps[self.position]
+        if not step.matches(entry):
+            return False
+        if step.sum:
+            for name in step.sum:
+                value = entry.parameters.get(name, 0)
+                self._totals[name] = self._totals.get(name, 0) + (value if isinstance(value, (int, float)) else 0)
+            if any(self._totals.get(name, 0) < total for name, total in step.sum.items()):
+                return False
+        self.position += 1
+        self._totals = {}
+        return self.completed
+
+    def progress(self) -> str:
+        """Human-readable state, e.g. "2/4 steps, next: add_coffee (amount_grams=30)" """
+        if self.completed:
+            return f"{len(self.steps)}/{len(self.steps)} steps"
+        return f"{self.position}/{len(self.steps)} steps, next: {self.steps[self.position].describe()}"
@@ -0,0 +1,161 @@
+from dataclasses import dataclass
+from datetime import datetime
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+import bisect
+
+
+@dataclass
+class ExecutionHistoryEntry:
+    timestamp: datetime
+    command_id: int
+    command_name: str
+    parameters: Dict[str, Any]
+    result: Dict[str, Any]
+    status: str
+    context: str
+
+
+def _result_status(entry: ExecutionHistoryEntry) -> Any:
+    return entry.result.get('status') if isinstance(entry.result, dict) else None
+
+
+class ExecutionHistory(list):
+    """Execution history with indexes maintained as entries are appended.
+
+    Behaves like the plain list it replaces, and adds queries for tool
+    implementations and goal checks that do not scan the whole history:
+
+        history.last("power_coffee_machine", result_status="success")
+        history.sum_parameter("throttle", "wait_time", since=power_on_index + 1,
+                              result_status="accepted")
+
+    Indexes list the positions of entries per command name, per entry status and
+    per (command name, result["status"]) pair. Sums over a numeric parameter use
+    prefix sums extended incrementally, so a range query is a bisect away.
+    """
+
+    def __init__(self, entries=()):
+        super().__init__(entries)
+        self._reindex()
+
+    def _reindex(self):
+        self._by_command: Dict[str, List[int]] = {}
+        self._by_status: Dict[str, List[int]] = {}
+        self._by_result_status: Dict[Tuple[str, Any], List[int]] = {}
+        # (command name, result status, parameter) -> prefix sums aligned with the position index
+        self._prefix_sums: Dict[Tuple[str, Any, str], List[float]] = {}
+        for index, entry in enumerate(self):
+            self._index(index, entry)
+
+    def _index(self, index: int, entry: ExecutionHistoryEntry):
+        self._by_command.setdefault(entry.command_name, []).append(index)
+        self._by_status.setdefault(entry.status, []).append(index)
+        self._by_result_status.setdefault((entry.command_name, _result_status(entry)), []).append(index)
+
+    def _unindex_last(self):
+        entry = self[-1]
+        for positions in (self._by_command[entry.command_name],
+                          self._by_status[entry.status],
+                          self._by_result_status[(entry.command_name, _result_status(entry))]):
+            positions.pop()
+        for (command_name, result_status, _), sums in self._prefix_sums.items():
+            if command_name == entry.command_name:
+                del sums[len(self._positions(command_name, result_status)) + 1:]
+
+    # Mutations -----------------------------------------------------------
+    # append and pop from the end (the processor's only mutations) update the
+    # indexes incrementally, anything else rebuilds them.
+
+    def append(self, entry: ExecutionHistoryEntry):
+        super().append(entry)
+        self._index(len(self) - 1, entry)
+
+    def extend(self, entries):
+        for entry in entries:
+            self.append(entry)
+
+    def __iadd__(self, entries):
+        self.extend(entries)
+        return self
+
+    def pop(self, index: int = -1) -> ExecutionHistoryEntry:
+        if index in (-1, len(self) - 1):
+            self._unindex_last()
+            return super().pop()
+        entry = super().pop(index)
+        self._reindex()
+        return entry
+
+    def insert(self, index: int, entry: ExecutionHistoryEntry):
+        super().insert(index, entry)
+        self._reindex()
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        self._reindex()
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        self._reindex()
+
+    def remove(self, entry: ExecutionHistoryEntry):
+        super().remove(entry)
+        self._reindex()
+
+    def clear(self):
+        super().clear()
+        self._reindex()
+
+    def sort(self, *args, **kwargs):
+        super().sort(*args, **kwargs)
+        self._reindex()
+
+    def reverse(self):
+        super().reverse()
+        self._reindex()
+
+    # Queries -------------------------------------------------------------
+
+    def _positions(self, command_name: str, result_status: Any = None) -> List[int]:
+        if result_status is None:
+            return self._by_command.get(command_name, [])
+        return self._by_result_status.get((command_name, result_status), [])
+
+    def indexes(self, command_name: str, result_status: Any = None, since: int = 0) -> List[int]:
+        """Positions of the entries of a command at positions >= since, in order"""
+        positions = self._positions(command_name, result_status)
+        return positions[bisect.bisect_left(positions, since):]
+
+    def last_index(self, command_name: str, result_status: Any = None) -> Optional[int]:
+        """Position of the last entry of a command, optionally with the given result["status"]"""
+        positions = self._positions(command_name, result_status)
+        return positions[-1] if positions else None
+
+    def last(self, command_name: str, result_status: Any = None) -> Optional[ExecutionHistoryEntry]:
+        index = self.last_index(command_name, result_status)
+        return self[index] if index is not None else None
+
+    def entries(self, command_name: str, result_status: Any = None, since: int = 0) -> Iterator[ExecutionHistoryEntry]:
+        """Entries of a command at positions >= since, in order"""
+        for index in self.indexes(command_name, result_status, since):
+            yield self[index]
+
+    def count_of(self, command_name: str, result_status: Any = None, since: int = 0) -> int:
+        positions = self._positions(command_name, result_status)
+        return len(positions) - bisect.bisect_left(positions, since)
+
+    def with_status(self, status: str) -> List[ExecutionHistoryEntry]:
+        """Entries with the given entry status ("success", "failed", "timeout")"""
+        return [self[index] for index in self._by_status.get(status, [])]
+
+    def sum_parameter(self, command_name: str, parameter: str, since: int = 0,
+                      result_status: Any = None) -> float:
+        """Sum of a numeric parameter over the entries of a command at positions >= since"""
+        positions = self._positions(command_name, result_status)
+        sums = self._prefix_sums.setdefault((command_name, result_status, parameter), [0])
+        # Extend the prefix sums over entries appended since the last query
+        for index in positions[len(sums) - 1:]:
+            value = self[index].parameters.get(parameter, 0)
+            sums.append(sums[-1] + (value if isinstance(value, (int, float)) else 0))
+        start = bisect.bisect_left(positions, since)
+        return sums[len(positions)] - sums[start]
@@ -0,0 +1,311 @@
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable, Tuple, Type, Union
+from datetime import datetime
+from collections import Counter
+import json
+
+from .result_policy import truncate_text
+
+
+@dataclass
+class HistoryRun:
+    """A run of consecutive, structurally similar history entries rendered as one row"""
+    start: int  # index of the first entry in the execution history
+    entries: List[Any]
+    pattern: Tuple[str, ...]  # command names of one repetition
+
+    @property
+    def end(self) -> int:
+        return self.start + len(self.entries) - 1
+
+    @property
+    def repeats(self) -> int:
+        return len(self.entries) // len(self.pattern)
+
+    def summary(self) -> str:
+        """Human-readable one-line description, e.g. 'throttle ×6, total wait_time 120, all accepted'"""
+        if len(self.pattern) == 1:
+            parts = [f"{self.pattern[0]} ×{len(self.entries)}"]
+        else:
+            parts = [f"{' → '.join(self.pattern)} ×{self.repeats} ({len(self.entries)} steps)"]
+
+        for command_name in dict.fromkeys(self.pattern):
+            entries = [e for e in self.entries if e.command_name == command_name]
+            prefix = f"{command_name} " if len(self.pattern) > 1 else ""
+            for name, values in _parameter_values(entries).items():
+                if all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in values):
+                    parts.append(f"{prefix}total {name} {sum(values)}")
+                else:
+                    distinct = list(dict.fromkeys(v if isinstance(v, str) else json.dumps(v, default=str) for v in values))
+                    shown = ", ".join(distinct[:4]) + (", ..." if len(distinct) > 4 else "")
+                    parts.append(f"{prefix}{name}: {shown}")
+
+        statuses = Counter(str(e.result.get('status', e.status)) for e in self.entries)
+        if len(statuses) == 1:
+            parts.append(f"all {next(iter(statuses))}")
+        else:
+            parts.append(", ".join(f"{count} {status}" for status, count in statuses.most_common()))
+        return ", ".join(parts)
+
+
+HistoryItem = Union[Any, HistoryRun]
+
+
+def _parameter_values(entries: List[Any]) -> Dict[str, List[Any]]:
+    values: Dict[str, List[Any]] = {}
+    for entry in entries:
+        for name, value in entry.parameters.items():
+            values.setdefault(name, []).append(value)
+    return values
+
+
+def _entry_shape(entry) -> Tuple:
+    """Entries with the same shape may be collapsed into one run"""
+    return (entry.command_name, tuple(sorted(entry.parameters)), entry.status)
+
+
+def group_runs(entries: List[Any], start: int, min_run_length: int = 3, max_period: int = 2) -> List[HistoryItem]:
+    """Collapse runs of structurally similar consecutive entries.
+
+    A run is a sequence of at least `min_run_length` entries made of a repeated
+    pattern of 1..`max_period` entry shapes (e.g. throttle, throttle, ... or
+    look_around, move, look_around, move, ...). Other entries are returned as is.
+    """
+    shapes = [_entry_shape(e) for e in entries]
+    items: List[HistoryItem] = []
+    i = 0
+    while i < len(entries):
+        best_period, best_length = 0, 0
+        for period in range(1, max_period + 1):
+            length = period
+            while i + length < len(entries) and shapes[i + length] == shapes[i + length - period]:
+                length += 1
+            # Only whole repetitions of the pattern are collapsed
+            length -= length % period
+            if length // period >= 2 and length >= min_run_length and length > best_length:
+                best_period, best_length = period, length
+        if best_length:
+            run_entries = entries[i:i + best_length]
+            items.append(HistoryRun(
+                start=start + i,
+                entries=run_entries,
+                pattern=tuple(e.command_name for e in run_entries[:best_period])
+            ))
+            i += best_length
+        else:
+            items.append(entries[i])
+            i += 1
+    return items
+
+
+def _indent(text: str, prefix: str = "  ") -> str:
+    return "\n".join(prefix + line for line in text.split("\n"))
+
+
+def _compact(value: Any) -> str:
+    if isinstance(value, str):
+        return value
+    return json.dumps(value, default=str, ensure_ascii=False, separators=(",", ":"))
+
+
+def _relative_time(timestamp: datetime, base_time: datetime) -> str:
+    return f"+{(timestamp - base_time).total_seconds():.1f}s"
+
+
+class JsonHistoryEncoding:
+    """Verbose encoding: one indented JSON object per entry (the original prompt format)"""
+    name = "json"
+
+    def __init__(self, entry_to_dict: Callable[[Any, int], Dict]):
+        self.entry_to_dict = entry_to_dict
+
+    def encode_entry(self, index: int, entry, base_time: datetime, age: int = 0) -> str:
+        return json.dumps(self.entry_to_dict(entry, age), indent=2, default=str)
+
+    def encode_run(self, run: HistoryRun, base_time: datetime, age: int = 0) -> str:
+        last = run.entries[-1]
+        row: Dict[str, Any] = {
+            "timestamp": last.timestamp.isoformat(),
+            "summary": run.summary(),
+        }
+        # Keep the latest outcome visible when it carries more than a status,
+        # shaped like it would be as a single entry
+        last_result = self.entry_to_dict(last, age)["result"]
+        if set(last_result) - {"status"}:
+            row["last_result"] = last_result
+        return json.dumps(row, indent=2, default=str, ensure_ascii=False)
+
+    def join(self, pieces: List[str]) -> str:
+        if not pieces:
+            return "[]"
+        return "[\n" + ",\n".join(_indent(piece) for piece in pieces) + "\n]"
+
+
+class TableHistoryEncoding:
+    """Compact encoding: one header line and one pipe-separated row per step.
+
+    Timestamps are relative to the first entry of the history and every field
+    is truncated to the limit configured in `max_field_chars`.
+    """
+    name = "table"
+    columns = ("step", "t", "command", "parameters", "status", "result", "context")
+    default_field_limits = {"parameters": 120, "result": 300, "context": 120}
+
+    def __init__(self, entry_to_dict: Callable[[Any, int], Dict], max_field_chars: Optional[Dict[str, int]] = None):
+        self.entry_to_dict = entry_to_dict
+        self.max_field_chars = {**self.default_field_limits, **(max_field_chars or {})}
+
+    def _row(self, values: Dict[str, Any]) -> str:
+        cells = []
+        for column in self.columns:
+            text = _compact(values.get(column, "")).replace("\n", " ").replace("|", "/")
+            cells.append(truncate_text(text, self.max_field_chars.get(column)))
+        return " | ".join(cells)
+
+    def encode_entry(self, index: int, entry, base_time: datetime, age: int = 0) -> str:
+        data = self.entry_to_dict(entry, age)
+        return self._row({
+            "step": index + 1,
+            "t": _relative_time(entry.timestamp, base_time),
+            "command": f"{data['command_name']}#{data['command_id']}",
+            "parameters": data["parameters"],
+            "status": data["status"],
+            "result": data["result"],
+            "context": data["context"],
+        })
+
+    def encode_run(self, run: HistoryRun, base_time: datetime, age: int = 0) -> str:
+        last = run.entries[-1]
+        result = run.summary()
+        last_result = self.entry_to_dict(last, age)["result"]
+        if set(last_result) - {"status"}:
+            result += f"; last: {_compact(last_result)}"
+        return self._row({
+            "step": f"{run.start + 1}-{run.end + 1}",
+            "t": _relative_time(last.timestamp, base_time),
+            "command": "/".join(run.pattern),
+            "parameters": "",
+            "status": "run",
+            "result": result,
+        })
+
+    def join(self, pieces: List[str]) -> str:
+        if not pieces:
+            return "(no actions yet)"
+        return "\n".join([" | ".join(self.columns)] + pieces)
+
+
+HISTORY_ENCODINGS: Dict[str, Type] = {
+    JsonHistoryEncoding.name: JsonHistoryEncoding,
+    TableHistoryEncoding.name: TableHistoryEncoding,
+}
+
+
+def register_history_encoding(name: str, encoding_class: Type):
+    """Make a custom encoding selectable by name on LLMProcessor and generate_prompt"""
+    HISTORY_ENCODINGS[name] = encoding_class
+
+
+def count_tokens(text: str, model_name: str = "gpt-4o-mini") -> int:
+    """Count prompt tokens with tiktoken when available, otherwise estimate ~4 characters per token"""
+    try:
+        import tiktoken
+    except ImportError:
+        return (len(text) + 3) // 4
+    try:
+        encoding = tiktoken.encoding_for_model(model_name)
+    except KeyError:
+        encoding = tiktoken.get_encoding("o200k_base")
+    return len(encoding.encode(text))
+
+
+class HistoryRenderer:
+    """Renders the recent execution history for prompts, re-encoding only new entries.
+
+    Encoded entries are cached by encoding and position in the execution history,
+    so at each step only the entries appended since the previous render are
+    serialized. With `compress_runs` enabled, runs of similar entries are
+    collapsed into a single summary row.
+
+    `entry_to_dict(entry, age)` converts an entry that is `age` steps old; when its
+    output depends on the age, `entry_variant(entry, age)` must return a value that
+    changes whenever the conversion does, so the cached encoding is refreshed.
+    """
+
+    def __init__(self, entry_to_dict: Callable[[Any, int], Dict], compress_runs: bool = False,
+                 min_run_length: int = 3, encoding: str = "json",
+                 entry_variant: Optional[Callable[[Any, int], Any]] = None):
+        if encoding not in HISTORY_ENCODINGS:
+            raise ValueError(f"Unknown history encoding: {encoding}. Available: {sorted(HISTORY_ENCODINGS)}")
+        self.entry_to_dict = entry_to_dict
+        self.compress_runs = compress_runs
+        self.min_run_length = min_run_length
+        self.encoding = encoding
+        self.entry_variant = entry_variant
+        self._encodings: Dict[str, Any] = {}
+        self._entry_cache: Dict[Tuple[str, int], Tuple[Any, Any, str]] = {}
+        self._run_cache: Dict[Tuple[str, int, int], Tuple[Any, str]] = {}
+        self._rendered_length = 0
+
+    def get_encoding(self, name: str):
+        if name not in self._encodings:
+            if name not in HISTORY_ENCODINGS:
+                raise ValueError(f"Unknown history encoding: {name}. Available: {sorted(HISTORY_ENCODINGS)}")
+            # Resolve entry_to_dict lazily so it can be swapped after construction
+            self._encodings[name] = HISTORY_ENCODINGS[name](lambda entry, age=0: self.entry_to_dict(entry, age))
+        return self._encodings[name]
+
+    def render(self, history: List[Any], window: int, encoding: Optional[str] = None,
+               compress_runs: Optional[bool] = None) -> str:
+        """Render the last `window` entries of `history` with the given (or default) encoding"""
+        name = encoding or self.encoding
+        encoder = self.get_encoding(name)
+        compress = self.compress_runs if compress_runs is None else compress_runs
+
+        if len(history) < self._rendered_length:
+            # History was reset or truncated - cached positions are no longer valid
+            self._entry_cache.clear()
+            self._run_cache.clear()
+        self._rendered_length = len(history)
+
+        entries = history[-window:] if history else []
+        start = len(history) - len(entries)
+        self._prune(start)
+        base_time = history[0].timestamp if history else None
+
+        if compress:
+            items = group_runs(entries, start, self.min_run_length)
+        else:
+            items = entries
+
+        pieces = []
+        offset = start
+        for item in items:
+            if isinstance(item, HistoryRun):
+                key = (name, item.start, item.end)
+                age = len(history) - 1 - item.end
+                variant = self.entry_variant(item.entries[-1], age) if self.entry_variant else None
+                cached = self._run_cache.get(key)
+                if cached is None or cached[0] != variant:
+                    cached = (variant, encoder.encode_run(item, base_time, age))
+                    self._run_cache[key] = cached
+                pieces.append(cached[1])
+                offset = item.end + 1
+            else:
+                age = len(history) - 1 - offset
+                variant = self.entry_variant(item, age) if self.entry_variant else None
+                cached = self._entry_cache.get((name, offset))
+                if cached is None or cached[0] is not item or cached[1] != variant:
+                    cached = (item, variant, encoder.encode_entry(offset, item, base_time, age))
+                    self._entry_cache[(name, offset)] = cached
+                pieces.append(cached[2])
+                offset += 1
+
+        return encoder.join(pieces)
+
+    def _prune(self, start: int):
+        """Drop cached encodings that slid out of the window"""
+        for key in [k for k in self._entry_cache if k[1] < start]:
+            del self._entry_cache[key]
+        for key in [k for k in self._run_cache if k[1] < start]:
+            del self._run_cache[key]
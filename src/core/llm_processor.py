@@ -1,25 +1,99 @@
-from dataclasses import dataclass
 from typing import List, Dict, Any, Optional, Callable, Tuple, Union
 import json
-import yaml
-from datetime import datetime
 import asyncio
-import openai
 import os
-from dotenv import load_dotenv
 import re
+import time
 
-load_dotenv()  # download data from .env
+from .loop_detector import LoopDetector, action_fingerprint
+from .history_encoding import HistoryRenderer, HISTORY_ENCODINGS, count_tokens
+from .result_policy import ResultPolicy, load_result_policies
+from .tool_selection import ToolSelector
+from .executors import ToolExecutors, EXECUTOR_KINDS
+from .memo_cache import ResultCache
+from .history import ExecutionHistory, ExecutionHistoryEntry
+from .goal_predicates import GoalPredicate, SequenceGoal
+from .clock import Clock, SystemClock
+from .goal_compression import (GoalCache, GOAL_COMPRESSION_METHODS, LLM_COMPRESSION_PROMPT,
+                               compress_goal_locally)
+
+
+def load_environment(dotenv_path: Optional[str] = None) -> bool:
+    """Load variables from a .env file into the environment (API keys etc.)
+
+    Call this once in the entry point; importing the processor has no side effects.
+    Returns whether a .env file was found.
+    """
+    from dotenv import load_dotenv
+    return load_dotenv(dotenv_path)
+
+# Keys of a functions.json entry that configure the processor and are not shown to the LLM
+RUNTIME_FUNCTION_KEYS = {"result_policy", "pinned", "executor", "timeout", "read_only", "long_running",
+                         "pure", "state_dependent"}
+
+# LLM call types that can be given their own deadline via llm_timeouts
+LLM_CALL_TYPES = ("decision", "best_practices", "goal_compression")
+
+# "single": one action per LLM call, "batch": a list of actions per LLM call
+RESPONSE_FORMATS = ("single", "batch")
+
+SINGLE_ACTION_GUIDELINES = """- Analyze the execution history to understand what has been tried
+- Consider the current state in relation to the goal
+- Choose ONE next action that brings you closer to the goal
+- Provide clear reasoning for why this specific action is the best next step
+- Do not try to plan multiple steps ahead - focus only on the immediate next action"""
+
+SINGLE_ACTION_FORMAT = """Analyze the current state and provide a single next action. Your response must be a JSON object:
+
+{
+  "analysis": {
+    "current_situation": "Brief assessment of the current state",
+    "history_consideration": "How past actions influence this decision",
+    "reasoning": "Detailed explanation of why this specific action is the best next step"
+  },
+  "action": {
+    "command_id": 0,
+    "parameters": {
+      // Parameters for the chosen command
+    },
+    "expected_outcome": "What you expect this action to achieve towards the goal"
+  }
+}"""
+
+BATCH_ACTION_GUIDELINES = """- Analyze the execution history to understand what has been tried
+- Consider the current state in relation to the goal
+- Choose the next action, or a short batch of actions whose outcome you can already predict
+- Mark an action "independent" if it does not depend on the results of the other actions in the batch;
+  consecutive independent actions run at the same time
+- Mark an action "sequential" if it must wait for all previous actions in the batch
+- The rest of the batch is cancelled as soon as one action fails, so put risky actions first
+- Provide clear reasoning for why these actions are the best next steps"""
+
+BATCH_ACTION_FORMAT = """Analyze the current state and provide the next actions. Your response must be a JSON object:
+
+{
+  "analysis": {
+    "current_situation": "Brief assessment of the current state",
+    "history_consideration": "How past actions influence this decision",
+    "reasoning": "Detailed explanation of why these actions are the best next steps"
+  },
+  "actions": [
+    {
+      "command_id": 0,
+      "parameters": {
+        // Parameters for the chosen command
+      },
+      "mode": "independent",
+      "expected_outcome": "What you expect this action to achieve towards the goal"
+    }
+  ]
+}"""
+
+
+class LLMTimeoutError(TimeoutError):
+    """Raised when an LLM call exceeds its deadline"""
+    pass
 
-@dataclass
-class ExecutionHistoryEntry:
-    timestamp: datetime
-    command_id: int
-    command_name: str
-    parameters: Dict[str, Any]
-    result: Dict[str, Any]
-    status: str
-    context: str
 
 class LLMProcessor:
     def __init__(self, 
@@ -32,7 +106,26 @@ class LLMProcessor:
                  # Новый параметр: каждые A шагов делаем "summary" 
                  summary_interval: int = 7,
                  # Новый параметр: берём B последних шагов при обобщении
-                 summary_window: int = 15):
+                 summary_window: int = 15,
+                 loop_detector: Optional[LoopDetector] = None,
+                 compress_history: bool = False,
+                 history_encoding: str = "json",
+                 tool_top_k: Optional[int] = None,
+                 tool_list_k: int = 20,
+                 goal_compression: Optional[str] = None,
+                 goal_cache_dir: Optional[str] = None,
+                 executors: Optional[ToolExecutors] = None,
+                 llm_timeouts: Optional[Dict[str, float]] = None,
+                 step_deadline: Optional[float] = None,
+                 response_format: str = "single",
+                 speculative_observations: bool = False,
+                 attach_observations: bool = False,
+                 pipelined: bool = False,
+                 result_cache: Optional[ResultCache] = None,
+                 clock: Optional[Clock] = None,
+                 session_name: str = "agent",
+                 monitor_port: int = 5000,
+                 open_browser: bool = False):
         """Initialize the LLM Processor
         
         Args:
@@ -41,18 +134,53 @@ class LLMProcessor:
             model_type: Type of LLM to use
             history_size: Number of recent actions to include in history (default: 10)
             model_name: Name of the model to use (default: gpt-4o-mini)
-            ui_visibility: Whether to show prompt updates in web UI (default: False)
+            ui_visibility: Whether to publish prompt and status updates to the web monitor (default: False)
             summary_interval: Every A steps generate best practices
             summary_window: Take B last steps for best practice generation
+            loop_detector: Optional detector that reacts to repeated failures and cycles locally
+            compress_history: Collapse runs of similar history entries into summary rows in prompts
+            history_encoding: How history is encoded in prompts - "json" (verbose) or "table" (compact)
+            tool_top_k: Show only the K most relevant commands (plus pinned ones) in full;
+                None shows the whole catalog
+            tool_list_k: With tool_top_k, list this many further commands by name only; the
+                rest are just counted
+            goal_compression: Send a compact form of the goal instead of the full configuration -
+                "local" (strip YAML structure, fold whitespace) or "llm" (one summarization call)
+            goal_cache_dir: Where compressed goals are cached (default: .goal_cache next to the goal file)
+            executors: Pools for sync implementations declared with "executor": "thread"/"process";
+                share one instance between processors to share the pools (close() then leaves
+                them running; shut them down once all processors are done)
+            llm_timeouts: Deadline in seconds per LLM call type ("decision", "best_practices",
+                "goal_compression"); command deadlines are set with "timeout" in functions.json
+            step_deadline: Overall budget in seconds for one step (decision plus command execution)
+            response_format: "single" asks for one action per LLM call, "batch" allows a list of
+                independent/sequential actions run with execute_batch
+            speculative_observations: Run commands marked "read_only" while the LLM decides,
+                and reuse the result if the LLM picks one of them
+            attach_observations: Run parameterless "read_only" commands before each decision
+                and include their results in the prompt
+            pipelined: While a command marked "long_running" executes, ask the LLM for the next
+                action assuming the expected outcome; the plan is used only if the command succeeds
+            result_cache: Cache for results of commands marked "pure" (default: 256 entries, no TTL)
+            clock: Time source for history timestamps and tools (default: the system clock);
+                pass a SimulatedClock to replay runs without waiting
+            session_name: Name of this processor's page on the web monitor (made unique if taken)
+            monitor_port: Port of the web monitor; used by the first processor of the process that
+                starts it, a free port is picked if it is taken
+            open_browser: Open the web monitor in a browser when it starts
         """
         self.functions_file = functions_file
         self.goal_file = goal_file
         self.model_type = model_type
         self.history_size = history_size
-        self.execution_history = []
+        self.execution_history = ExecutionHistory()
         self.implementations = {}
+        self.clock = clock or SystemClock()
         self.functions: Dict = self._load_json(self.functions_file)
         self.goal: Dict = self._load_yaml(self.goal_file)
+        # The completion condition is evaluated locally and is not part of the prompt
+        completion = self.goal.pop('completion', None) if isinstance(self.goal, dict) else None
+        self.result_policies: Dict[str, ResultPolicy] = load_result_policies(self.functions)
         self._load_available_functions()
         
         # Дополнительные поля для "Best Practices"
@@ -61,22 +189,74 @@ class LLMProcessor:
         self.steps_counter = 0  # сколько шагов уже совершено
         self.best_practices = ""  # текущее итоговое значение Best Practices, useful findings and extracted helpful knowledge
 
+        # Loop detection and early termination
+        self.loop_detector = loop_detector
+        self.state_provider: Optional[Callable[[], Any]] = None
+        self.stop_reason: Optional[str] = None
+
+        # Goal predicates evaluated incrementally on every new history entry
+        self.goal_predicates: List[GoalPredicate] = []
+        self.goal_achieved = False
+        self.completion_goal = SequenceGoal.from_dict(completion) if completion else None
+        if self.completion_goal:
+            self.register_goal_predicate(self.completion_goal)
+
+        # Incremental history rendering for prompts
+        self.history_renderer = HistoryRenderer(self._entry_to_dict,
+                                                compress_runs=compress_history,
+                                                encoding=history_encoding,
+                                                entry_variant=self._entry_variant)
+
+        # Local tool retrieval for large catalogs
+        self.tool_selector = ToolSelector(top_k=tool_top_k, list_k=tool_list_k) if tool_top_k else None
+
+        # Executors for sync implementations ("inline" unless declared otherwise)
+        self.executors = executors or ToolExecutors()
+        self._owns_executors = executors is None  # shared pools are shut down by their owner
+        self.function_executors: Dict[str, str] = {}
+
+        # Deadlines
+        unknown_call_types = set(llm_timeouts or {}) - set(LLM_CALL_TYPES)
+        if unknown_call_types:
+            raise ValueError(f"Unknown LLM call types: {', '.join(sorted(unknown_call_types))}")
+        self.llm_timeouts: Dict[str, float] = dict(llm_timeouts or {})
+        self.step_deadline = step_deadline
+        self._step_deadline_at: Optional[float] = None
+        self.timeout_counts: Dict[str, int] = {}
+
+        if response_format not in RESPONSE_FORMATS:
+            raise ValueError(f"Unknown response format: {response_format}. Expected one of {RESPONSE_FORMATS}")
+        self.response_format = response_format
+
+        # Speculative execution of read-only observation commands
+        self.speculative_observations = speculative_observations
+        self.attach_observations = attach_observations
+        self._state_version = 0  # bumped whenever a command that may change state runs
+        self._speculations: Dict[str, Tuple[int, asyncio.Task]] = {}
+        self._observations: Dict[str, Dict[str, Any]] = {}
+        self.speculation_stats = {"launched": 0, "used": 0, "wasted": 0}
+
+        # Pipelined decisions for long-running commands
+        self.pipelined = pipelined
+        self._planned: Optional[Tuple[int, asyncio.Task]] = None  # (history index of the command, plan)
+        self.pipeline_stats = {"planned": 0, "used": 0, "replanned": 0}
+
+        # Memoized results of pure commands
+        self.result_cache = result_cache if result_cache is not None else ResultCache(clock=self.clock.monotonic)
+
         # UI visibility setup
         self.ui_visibility = ui_visibility
+        self.token_usage = {"prompt_tokens": 0, "completion_tokens": 0, "llm_calls": 0}
+        self._step_started_at: Optional[float] = None
         if self.ui_visibility:
-            from .web_display import PromptDisplay
-            self.prompt_display = PromptDisplay()
-            self.prompt_display.start()
+            # One non-blocking server per process; every processor gets its own page
+            from .web_display import get_monitoring_server
+            server = get_monitoring_server(port=monitor_port, open_browser=open_browser)
+            self.prompt_display = server.session(session_name)
         
-        # LLM configuration
-        if model_type == "local":
-            openai.api_base = "http://127.0.0.1:1234/v1"
-            openai.api_key = "lm-studio"
-            self.model_name = model_name
-        else:  # OpenAI
-            openai.api_base = "https://api.openai.com/v1"
-            openai.api_key = os.getenv("OPENAI_API_KEY")
-            self.model_name = model_name
+        # LLM configuration; the client (and the openai package) is loaded on the first call
+        self.model_name = model_name
+        self._llm_client = None
 
         self.generation_kwargs = {
             # "max_tokens": 512,
@@ -84,6 +264,19 @@ class LLMProcessor:
             # "top_p": 0.9
         }
 
+        # Goal compression, cached on disk by the goal file's content hash
+        if goal_compression is not None and goal_compression not in GOAL_COMPRESSION_METHODS:
+            raise ValueError(f"Unknown goal compression: {goal_compression}. Expected one of {GOAL_COMPRESSION_METHODS}")
+        self.goal_compression = goal_compression
+        self.goal_cache = GoalCache(
+            goal_cache_dir or os.path.join(os.path.dirname(os.path.abspath(goal_file)), ".goal_cache")
+        )
+        self.compact_goal: Optional[str] = None
+        if goal_compression == "local":
+            self.compact_goal = compress_goal_locally(self.goal)
+        elif goal_compression == "llm":
+            self.compact_goal = self.goal_cache.load(self._goal_cache_key())
+
     def _load_json(self, file_path: str) -> Dict:
         """Load JSON configuration file"""
         with open(file_path, 'r') as f:
@@ -91,33 +284,142 @@ class LLMProcessor:
 
     def _load_yaml(self, file_path: str) -> Dict:
         """Load YAML configuration file"""
+        import yaml
         with open(file_path, 'r') as f:
             return yaml.safe_load(f)
 
-    def register_function(self, name: str, implementation: Callable):
-        """Register a function implementation"""
+    def register_function(self, name: str, implementation: Callable, spec: Optional[Dict[str, Any]] = None,
+                          executor: Optional[str] = None):
+        """Register a function implementation
+
+        Args:
+            name: Command name as used in functions.json
+            implementation: Sync or async callable taking the parameters dict
+            spec: Definition (description, parameters, ...) for a command that is not in
+                functions.json yet; it is added to the catalog with the next free id
+            executor: Where a sync implementation runs - "inline", "thread" or "process";
+                overrides the "executor" declared in functions.json
+        """
+        if executor is not None and executor not in EXECUTOR_KINDS:
+            raise ValueError(f"Unknown executor: {executor}. Expected one of {EXECUTOR_KINDS}")
         self.implementations[name] = implementation
+        if executor is not None:
+            self.function_executors[name] = executor
+        if spec is not None and not any(f['name'] == name for f in self.functions['functions']):
+            next_id = max((f['id'] for f in self.functions['functions']), default=-1) + 1
+            definition = {"id": next_id, "name": name, **spec}
+            self.functions['functions'].append(definition)
+            if definition.get('result_policy'):
+                self.result_policies[name] = ResultPolicy.from_dict(definition['result_policy'])
+
+    def register_state_provider(self, provider: Callable[[], Any]):
+        """Register a callable returning a JSON-serializable snapshot of the environment state"""
+        self.state_provider = provider
+
+    def register_goal_predicate(self, predicate: GoalPredicate):
+        """Register a callable (entry, history) -> bool called once for every new history entry
+
+        The episode stops as soon as a predicate returns True.
+        """
+        self.goal_predicates.append(predicate)
 
-    def _entry_to_dict(self, entry: ExecutionHistoryEntry) -> Dict:
-        """Convert history entry to dictionary for prompt generation"""
+    def _observe_goal(self, entry: ExecutionHistoryEntry):
+        # Every predicate sees every entry so stateful predicates stay in sync
+        for predicate in self.goal_predicates:
+            if predicate(entry, self.execution_history):
+                self.goal_achieved = True
+        if self.goal_achieved:
+            self.stop("Goal achieved")
+
+    @property
+    def stopped(self) -> bool:
+        """Whether the episode has ended and no further actions should be requested"""
+        return self.stop_reason is not None
+
+    def stop(self, reason: str):
+        """End the episode; subsequent get_next_action calls return without calling the LLM"""
+        if self.stop_reason is None:
+            self.stop_reason = reason
+            self._cancel_plan()
+            print(f"Episode stopped: {reason}")
+
+    def _entry_to_dict(self, entry: ExecutionHistoryEntry, age: int = 0) -> Dict:
+        """Convert history entry to dictionary for prompt generation
+
+        Args:
+            entry: History entry to convert
+            age: How many steps ago the entry was recorded (0 for the latest);
+                the command's result policy may shorten results of older entries
+        """
+        policy = self.result_policies.get(entry.command_name)
         return {
             "timestamp": entry.timestamp.isoformat(),
             "command_id": entry.command_id,
             "command_name": entry.command_name,
             "parameters": entry.parameters,
-            "result": entry.result,
+            "result": policy.apply(entry.result, age) if policy else entry.result,
             "status": entry.status,
             "context": entry.context
         }
 
-    def generate_prompt(self) -> str:
-        """Generate prompt for LLM"""
-        # Get the last N entries from history
-        history = self.execution_history[-self.history_size:] if self.execution_history else []
-        
-        # Convert history entries to dict format
-        history_dicts = [self._entry_to_dict(entry) for entry in history]
-        
+    def _entry_variant(self, entry: ExecutionHistoryEntry, age: int) -> bool:
+        """Prompt representation key of an entry: changes when its result gets digested"""
+        policy = self.result_policies.get(entry.command_name)
+        return bool(policy and policy.is_digested(age))
+
+    def _prompt_functions(self, functions: Optional[List[Dict]] = None) -> Dict:
+        """Function definitions as shown to the LLM, without processor-only settings"""
+        if functions is None:
+            functions = self.functions.get('functions', [])
+        return {
+            **self.functions,
+            "functions": [
+                {key: value for key, value in function.items() if key not in RUNTIME_FUNCTION_KEYS}
+                for function in functions
+            ]
+        }
+
+    def _commands_section(self) -> str:
+        """Render the commands for the prompt, limited to the most relevant ones if tool selection is on"""
+        functions = self.functions.get('functions', [])
+        if not self.tool_selector:
+            return json.dumps(self._prompt_functions(), indent=2)
+
+        recent = self.execution_history[-self.history_size:] if self.execution_history else []
+        selected, listed = self.tool_selector.select(functions, self.goal, recent)
+        text = json.dumps(self._prompt_functions(selected), indent=2)
+        if listed:
+            text += ("\n\nOther commands (not shown in detail; use \"command_name\" instead of "
+                     "\"command_id\" to call one): " + ", ".join(listed))
+        unlisted = len(functions) - len(selected) - len(listed)
+        if unlisted:
+            # Only a count, so the prompt does not grow with the catalog
+            text += (f"\n{unlisted} less relevant commands are not listed; they are shown once "
+                     "the goal or results make them relevant.")
+        return text
+
+    def _resolve_command_name(self, action: Dict[str, Any]):
+        """Fill in command_id when the LLM chose a command by name"""
+        if action.get('command_id') is None and action.get('command_name'):
+            command = next((f for f in self.functions['functions'] if f['name'] == action['command_name']), None)
+            if command:
+                action['command_id'] = command['id']
+
+    def generate_prompt(self, history_encoding: Optional[str] = None) -> str:
+        """Generate prompt for LLM
+
+        Args:
+            history_encoding: Override the processor's history encoding for this prompt
+        """
+        # Render the last N entries from history (only new entries are re-encoded)
+        history_text = self.history_renderer.render(self.execution_history, self.history_size,
+                                                    encoding=history_encoding)
+
+        if self.response_format == "batch":
+            guidelines, response_format = BATCH_ACTION_GUIDELINES, BATCH_ACTION_FORMAT
+        else:
+            guidelines, response_format = SINGLE_ACTION_GUIDELINES, SINGLE_ACTION_FORMAT
+
         # Включаем Best Practices в подсказку
         prompt = f"""# LLM Processor Task
 
@@ -125,38 +427,19 @@ class LLMProcessor:
 {self.best_practices}
 
 ## Decision Making Guidelines
-- Analyze the execution history to understand what has been tried
-- Consider the current state in relation to the goal
-- Choose ONE next action that brings you closer to the goal
-- Provide clear reasoning for why this specific action is the best next step
-- Do not try to plan multiple steps ahead - focus only on the immediate next action
+{guidelines}
 
 ## Available Commands
-{json.dumps(self.functions, indent=2)}
+{self._commands_section()}
 
 ## Goal Configuration
-{json.dumps(self.goal, indent=2)}
+{self._goal_text()}
 
 ## Execution History (Last N={self.history_size} Actions)
-{json.dumps(history_dicts, indent=2)}
-
+{history_text}
+{self._observations_section()}{self._loop_warning_section()}
 ## Your Response Format
-Analyze the current state and provide a single next action. Your response must be a JSON object:
-
-{{
-  "analysis": {{
-    "current_situation": "Brief assessment of the current state",
-    "history_consideration": "How past actions influence this decision",
-    "reasoning": "Detailed explanation of why this specific action is the best next step"
-  }},
-  "action": {{
-    "command_id": 0,
-    "parameters": {{
-      // Parameters for the chosen command
-    }},
-    "expected_outcome": "What you expect this action to achieve towards the goal"
-  }}
-}}"""
+{response_format}"""
 
         # Update web UI if enabled
         if self.ui_visibility:
@@ -164,8 +447,266 @@ Analyze the current state and provide a single next action. Your response must b
 
         return prompt
 
-    async def execute_command(self, command_id: int, parameters: Dict[str, Any], context: str) -> Dict[str, Any]:
-        """Execute a command and record it in history"""
+    def history_encoding_token_counts(self) -> Dict[str, int]:
+        """Measure the tokens the current history window takes in every available encoding
+
+        Returns a mapping like {"json": 1450, "json+runs": 610, "table": 420, "table+runs": 230}
+        so the encoding can be chosen per model.
+        """
+        counts = {}
+        for name in HISTORY_ENCODINGS:
+            for compress in (False, True):
+                text = self.history_renderer.render(self.execution_history, self.history_size,
+                                                    encoding=name, compress_runs=compress)
+                counts[name + ("+runs" if compress else "")] = count_tokens(text, self.model_name)
+        return counts
+
+    def _entry_status(self, result: Dict[str, Any]) -> str:
+        if result.get('status') in ['success', 'accepted', 'queued']:
+            return "success"
+        if result.get('status') == "timeout":
+            return "timeout"
+        return "failed"
+
+    def _remaining_step_budget(self) -> Optional[float]:
+        if self._step_deadline_at is None:
+            return None
+        return max(0.0, self._step_deadline_at - asyncio.get_running_loop().time())
+
+    def _start_step(self):
+        if self.step_deadline is not None and self._step_deadline_at is None:
+            self._step_deadline_at = asyncio.get_running_loop().time() + self.step_deadline
+
+    def _effective_timeout(self, timeout: Optional[float]) -> Optional[float]:
+        """Combine a call's own deadline with what is left of the step budget"""
+        remaining = self._remaining_step_budget()
+        if remaining is None:
+            return timeout
+        return remaining if timeout is None else min(timeout, remaining)
+
+    async def _run_with_deadline(self, command: Dict[str, Any], implementation: Callable,
+                                 parameters: Dict[str, Any], use_step_budget: bool = True) -> Dict[str, Any]:
+        """Run an implementation under its "timeout" and the remaining step budget
+
+        Async implementations are cancelled on timeout. Sync ones running in a pool
+        are abandoned (their thread or process finishes in the background); inline
+        sync implementations cannot be interrupted.
+        """
+        if use_step_budget:
+            self._start_step()
+            timeout = self._effective_timeout(command.get('timeout'))
+        else:
+            timeout = command.get('timeout')
+
+        # Handle both async and sync implementations
+        if asyncio.iscoroutinefunction(implementation):
+            call = implementation(parameters)
+        else:
+            executor = self.function_executors.get(command['name'], command.get('executor', 'inline'))
+            call = self.executors.run(executor, implementation, parameters)
+
+        if timeout is None:
+            return await call
+        try:
+            return await asyncio.wait_for(call, timeout)
+        except asyncio.TimeoutError:
+            self.timeout_counts[command['name']] = self.timeout_counts.get(command['name'], 0) + 1
+            return {"status": "timeout", "message": f"Command '{command['name']}' timed out after {timeout:.1f}s"}
+
+    def _read_only_commands(self, parameterless_only: bool = False) -> List[Tuple[Dict[str, Any], Dict[str, Any]]]:
+        """Read-only commands with the parameters to observe them with
+
+        Parameterless commands are run with {}; the others repeat the parameters of
+        their last call (e.g. re-running the last query), or are skipped if never called.
+        """
+        observations = []
+        for command in self.functions['functions']:
+            if not command.get('read_only') or command['name'] not in self.implementations:
+                continue
+            parameters = command.get('parameters') or {}
+            if not parameters or parameters.get('properties') == {}:
+                observations.append((command, {}))
+            elif not parameterless_only:
+                last = next((e for e in reversed(self.execution_history) if e.command_name == command['name']), None)
+                if last is not None:
+                    observations.append((command, last.parameters))
+        return observations
+
+    async def _collect_observations(self):
+        """Run parameterless read-only commands for the prompt; results also serve as speculations"""
+        commands = self._read_only_commands(parameterless_only=True)
+        results = await asyncio.gather(*(
+            self._run_with_deadline(command, self.implementations[command['name']], params, use_step_budget=False)
+            for command, params in commands
+        ), return_exceptions=True)
+        self._observations = {}
+        for (command, params), result in zip(commands, results):
+            if isinstance(result, Exception):
+                continue
+            self._observations[command['name']] = result
+            future = asyncio.get_running_loop().create_future()
+            future.set_result(result)
+            self._speculations[action_fingerprint(command['name'], params)] = (self._state_version, future)
+
+    def _start_speculations(self):
+        """Launch read-only commands in the background while the LLM is deciding"""
+        for command, params in self._read_only_commands():
+            key = action_fingerprint(command['name'], params)
+            if key in self._speculations:
+                continue
+            task = asyncio.ensure_future(self._run_with_deadline(
+                command, self.implementations[command['name']], params, use_step_budget=False
+            ))
+            self._speculations[key] = (self._state_version, task)
+            self.speculation_stats["launched"] += 1
+
+    async def _take_speculation(self, command_name: str, parameters: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """Return the pre-computed result for this exact read-only call if it is still valid"""
+        speculation = self._speculations.pop(action_fingerprint(command_name, parameters), None)
+        if speculation is None:
+            return None
+        version, task = speculation
+        if version != self._state_version:
+            task.cancel()
+            return None
+        try:
+            result = await task
+        except Exception:
+            return None
+        self.speculation_stats["used"] += 1
+        return result
+
+    def _discard_speculations(self):
+        """Drop speculative results and attached observations once a step has been executed -
+        the state may have changed"""
+        self._observations = {}
+        for version, task in self._speculations.values():
+            if isinstance(task, asyncio.Task):
+                self.speculation_stats["wasted"] += 1
+            if task.done() and not task.cancelled():
+                task.exception()  # mark a failed speculation as handled
+            task.cancel()
+        self._speculations.clear()
+
+    def _observations_section(self) -> str:
+        if not self._observations:
+            return ""
+        return f"""
+## Current Observations
+Results of read-only commands executed just now - no need to call them again:
+{json.dumps(self._observations, indent=2, default=str)}
+"""
+
+    async def _chat_completion(self, prompt_text: str, call_type: str):
+        """Call the chat completion API with the deadline configured for this call type"""
+        client = self._get_llm_client()
+
+        timeout = self.llm_timeouts.get(call_type)
+        if call_type == "decision":
+            timeout = self._effective_timeout(timeout)
+        request_kwargs = dict(self.generation_kwargs)
+        if timeout is not None:
+            # Also bound the HTTP request itself so the worker thread is released
+            request_kwargs["timeout"] = timeout
+
+        request = asyncio.get_running_loop().run_in_executor(
+            None,
+            lambda: client.chat.completions.create(
+                model=self.model_name,
+                messages=[{"role": "user", "content": prompt_text}],
+                **request_kwargs
+            )
+        )
+        if timeout is None:
+            response = await request
+        else:
+            try:
+                response = await asyncio.wait_for(request, timeout)
+            except asyncio.TimeoutError:
+                self.timeout_counts[f"llm:{call_type}"] = self.timeout_counts.get(f"llm:{call_type}", 0) + 1
+                raise LLMTimeoutError(f"LLM {call_type} call timed out after {timeout:.1f}s")
+        self._record_usage(response)
+        return response
+
+    def _get_llm_client(self):
+        if self._llm_client is None:
+            from openai import OpenAI
+            if self.model_type == "local":
+                self._llm_client = OpenAI(base_url="http://127.0.0.1:1234/v1", api_key="lm-studio")
+            else:
+                self._llm_client = OpenAI()  # reads OPENAI_API_KEY
+        return self._llm_client
+
+    def _record_usage(self, response):
+        usage = getattr(response, "usage", None)
+        self.token_usage["llm_calls"] += 1
+        self.token_usage["prompt_tokens"] += getattr(usage, "prompt_tokens", 0) or 0
+        self.token_usage["completion_tokens"] += getattr(usage, "completion_tokens", 0) or 0
+        self._monitor(**self.token_usage)
+
+    def _monitor(self, **fields):
+        """Publish status fields to the web monitor, if enabled"""
+        if self.ui_visibility:
+            self.prompt_display.update_status(**fields)
+
+    def close(self):
+        """Release the tool executor pools this processor created and cancel a pending plan"""
+        self._cancel_plan()
+        if self._owns_executors:
+            self.executors.shutdown()
+        if self.ui_visibility:
+            self.prompt_display.close()
+
+    def _goal_cache_key(self) -> str:
+        return GoalCache.key(self.goal_file, "llm", self.model_name)
+
+    async def prepare_goal(self):
+        """Compress the goal with a single LLM call unless a cached result exists
+
+        Called automatically before the first decision when goal_compression="llm".
+        """
+        if self.goal_compression != "llm" or self.compact_goal is not None:
+            return
+        compressed = await self._call_llm_text(
+            LLM_COMPRESSION_PROMPT.format(goal=compress_goal_locally(self.goal)),
+            call_type="goal_compression"
+        )
+        if compressed:
+            self.compact_goal = compressed.strip()
+            self.goal_cache.save(self._goal_cache_key(), self.compact_goal)
+        else:
+            # Not cached, so the next run retries the LLM compression
+            self.compact_goal = compress_goal_locally(self.goal)
+
+    def _goal_text(self) -> str:
+        """Goal as shown in prompts: the compact form when available, the full configuration otherwise"""
+        if self.compact_goal is not None:
+            return self.compact_goal
+        return json.dumps(self.goal, indent=2)
+
+    def _loop_warning_section(self) -> str:
+        """Render the loop detector warning for the prompt, if there is one"""
+        if not self.loop_detector or not self.loop_detector.pending_warning:
+            return ""
+        return f"""
+## Loop Warning
+{self.loop_detector.pending_warning}
+"""
+
+    async def execute_command(self, command_id: int, parameters: Dict[str, Any], context: str,
+                              expected_outcome: Optional[str] = None) -> Dict[str, Any]:
+        """Execute a command and record it in history
+
+        Args:
+            command_id: Id of the command in functions.json
+            parameters: Parameters for the command
+            context: Reasoning behind the action, stored in history
+            expected_outcome: What the LLM expects the action to achieve; used to plan the
+                next action ahead of time for "long_running" commands in pipelined mode
+        """
+        started_at = self._step_started_at or time.perf_counter()
+        self._step_started_at = None
+
         # Find command definition
         command = next((cmd for cmd in self.functions['functions'] if cmd['id'] == command_id), None)
         if not command:
@@ -176,63 +717,239 @@ Analyze the current state and provide a single next action. Your response must b
             raise ValueError(f"No implementation registered for command: {command['name']}")
 
         implementation = self.implementations[command['name']]
-        
-        # Handle both async and sync implementations
-        if asyncio.iscoroutinefunction(implementation):
-            result = await implementation(parameters)
+
+        blocked_reason = None
+        if self.loop_detector:
+            # Blocks apply to the state they were detected in
+            state = self.state_provider() if self.state_provider else None
+            blocked_reason = self.loop_detector.is_blocked(command['name'], parameters, state)
+        if blocked_reason:
+            # Refuse the exact action the loop detector blocked instead of running it again
+            self.loop_detector.blocked_count += 1
+            result = {"status": "blocked", "message": f"Action blocked: {blocked_reason}"}
         else:
-            result = implementation(parameters)
+            cache_key = self._result_cache_key(command, parameters)
+            result = self.result_cache.get(cache_key) if cache_key else None
+            if result is None:
+                result = await self._take_speculation(command['name'], parameters)
+                if result is None:
+                    if not (command.get('read_only') or command.get('pure')):
+                        self._state_version += 1
+                        # Observations describe the state before this command, not after it
+                        self._observations = {}
+                    if self.pipelined and command.get('long_running'):
+                        self._plan_ahead(command_id, command['name'], parameters, context, expected_outcome)
+                    result = await self._run_with_deadline(command, implementation, parameters)
+                if cache_key and self._entry_status(result) == "success":
+                    self.result_cache.put(cache_key, result)
+        self._step_deadline_at = None
+        self._discard_speculations()
 
         # Record in history
         entry = ExecutionHistoryEntry(
-            timestamp=datetime.now(),
+            timestamp=self.clock.now(),
             command_id=command_id,
             command_name=command['name'],
             parameters=parameters,
             result=result,
-            status="success" if result.get('status') in ['success', 'accepted'] else "failed",
+            status=self._entry_status(result),
             context=context
         )
         self.execution_history.append(entry)
 
+        if self.goal_predicates and not self.goal_achieved:
+            self._observe_goal(entry)
+
+        if self.loop_detector and not blocked_reason:
+            state = self.state_provider() if self.state_provider else None
+            self.loop_detector.observe(entry, state)
+            if self.loop_detector.should_stop():
+                self.stop(f"Loop detected: {self.loop_detector.detections[-1].message}")
+
         # Увеличиваем счётчик шагов
         self.steps_counter += 1
         # Проверяем, не пора ли нам обобщать Best Practices
         if self.steps_counter % self.summary_interval == 0:
+            self._monitor(summarizing=True)
             await self._update_best_practices()
+            self._monitor(summarizing=False, summaries=self.steps_counter // self.summary_interval)
 
+        self._monitor(
+            steps=self.steps_counter,
+            step_latency_seconds=round(time.perf_counter() - started_at, 3),
+            last_action={"command": command['name'], "parameters": parameters, "status": entry.status},
+            next_summary_in=self.summary_interval - self.steps_counter % self.summary_interval
+        )
         return result
 
+    async def execute_batch(self, actions: List[Dict[str, Any]], context: str) -> List[Dict[str, Any]]:
+        """Execute a batch of actions from a "batch" response
+
+        Consecutive actions with mode "independent" run concurrently; a "sequential"
+        action waits for everything before it. Every executed action is recorded as
+        its own history entry. Malformed actions (no valid command_id, unknown or
+        unregistered command) are not run and are returned with status "error".
+        After the first failure the remaining actions are not run and are returned
+        with status "aborted".
+        """
+        groups: List[List[int]] = []
+        previous_independent = False
+        for i, action in enumerate(actions):
+            independent = action.get('mode', 'sequential') == 'independent'
+            if independent and previous_independent:
+                groups[-1].append(i)
+            else:
+                groups.append([i])
+            previous_independent = independent
+
+        self._start_step()
+        deadline_at = self._step_deadline_at
+        results: List[Optional[Dict[str, Any]]] = [None] * len(actions)
+        failed = False
+        for group in groups:
+            if failed or self.stopped:
+                reason = "an earlier action in the batch failed" if failed else "the episode has stopped"
+                for i in group:
+                    results[i] = {"status": "aborted", "message": f"Skipped because {reason}"}
+                continue
+            runnable = []
+            for i in group:
+                error = self._batch_action_error(actions[i])
+                if error:
+                    results[i] = {"status": "error", "message": f"Invalid action: {error}"}
+                    failed = True
+                else:
+                    runnable.append(i)
+            # All groups share the budget of the step that produced the batch
+            self._step_deadline_at = deadline_at
+            group_results = await asyncio.gather(*(
+                self.execute_command(actions[i]['command_id'], actions[i].get('parameters') or {}, context)
+                for i in runnable
+            ), return_exceptions=True)
+            for i, result in zip(runnable, group_results):
+                if isinstance(result, Exception):
+                    result = {"status": "error", "message": f"Error executing action: {result}"}
+                results[i] = result
+                if self._entry_status(result) != "success":
+                    failed = True
+        self._step_deadline_at = None
+        return results
+
+    def _batch_action_error(self, action: Any) -> Optional[str]:
+        """Why an LLM-supplied batch action cannot be executed, None if it can"""
+        if not isinstance(action, dict):
+            return "action must be an object"
+        command_id = action.get('command_id')
+        if not isinstance(command_id, int) or isinstance(command_id, bool):
+            return "missing or non-integer command_id"
+        command = next((cmd for cmd in self.functions['functions'] if cmd['id'] == command_id), None)
+        if command is None:
+            return f"unknown command_id {command_id}"
+        if command['name'] not in self.implementations:
+            return f"no implementation registered for {command['name']}"
+        if not isinstance(action.get('parameters') or {}, dict):
+            return "parameters must be an object"
+        return None
+
+    def _result_cache_key(self, command: Dict[str, Any], parameters: Dict[str, Any]) -> Optional[str]:
+        """Cache key for a pure command, None if its results must not be cached"""
+        if not command.get('pure'):
+            return None
+        state = None
+        if command.get('state_dependent'):
+            if not self.state_provider:
+                # Without a state key a cached result could describe another state
+                return None
+            state = self.state_provider()
+        return ResultCache.key(command['name'], parameters, state)
+
+    def _plan_ahead(self, command_id: int, command_name: str, parameters: Dict[str, Any],
+                    context: str, expected_outcome: Optional[str]):
+        """Start deciding the next action while a long-running command is still executing
+
+        The prompt shows the running command as a pending entry that is assumed to
+        achieve its expected outcome.
+        """
+        self._cancel_plan()
+        pending = ExecutionHistoryEntry(
+            timestamp=self.clock.now(),
+            command_id=command_id,
+            command_name=command_name,
+            parameters=parameters,
+            result={
+                "status": "pending",
+                "message": "Still running - assume it achieves the expected outcome",
+                "expected_outcome": expected_outcome or "The command completes successfully"
+            },
+            status="pending",
+            context=context
+        )
+        # generate_prompt is synchronous, so no other coroutine sees the provisional entry
+        self.execution_history.append(pending)
+        try:
+            prompt = self.generate_prompt()
+        finally:
+            self.execution_history.pop()
+        index = len(self.execution_history)
+        self._planned = (index, asyncio.ensure_future(self._request_action(prompt)))
+        self.pipeline_stats["planned"] += 1
+
+    def _cancel_plan(self):
+        if self._planned is not None:
+            self._planned[1].cancel()
+            self._planned = None
+
+    async def _take_plan(self) -> Optional[Dict[str, Any]]:
+        """Return the action planned during the last command if its assumption held"""
+        if self._planned is None:
+            return None
+        index, task = self._planned
+        self._planned = None
+        # The plan assumed that exactly this command ran next and succeeded
+        if len(self.execution_history) != index + 1 or self.execution_history[index].status != "success":
+            task.cancel()
+            self.pipeline_stats["replanned"] += 1
+            return None
+        response = await task
+        self.pipeline_stats["used"] += 1
+        return response
+
     async def get_next_action(self) -> Dict[str, Any]:
         """Get the next action from the LLM"""
+        if self.stopped:
+            return {
+                "action": None,
+                "stopped": True,
+                "analysis": {
+                    "reasoning": self.stop_reason,
+                    "current_situation": "Episode stopped",
+                    "history_consideration": "No further actions requested"
+                }
+            }
+
+        self._step_started_at = time.perf_counter()
+        planned = await self._take_plan()
+        if planned is not None:
+            self._start_step()
+            return planned
+
+        await self.prepare_goal()
+        self._start_step()
+        if self.attach_observations:
+            await self._collect_observations()
         prompt = self.generate_prompt()
-        
-        # Use only the last N actions in the prompt
-        history = self.execution_history[-self.history_size:] if self.execution_history else []
-        
-        try:
-            if self.model_type == "local":
-                import openai
-                client = openai.OpenAI(
-                    base_url="http://127.0.0.1:1234/v1",
-                    api_key="lm-studio"
-                )
-            else:
-                from openai import OpenAI
-                client = OpenAI()
+        if self.speculative_observations:
+            self._start_speculations()
+        return await self._request_action(prompt)
 
+    async def _request_action(self, prompt: str) -> Dict[str, Any]:
+        """Send a decision prompt to the LLM and normalize the parsed response"""
+        try:
             print("\n### Prompt to LLM ###")
             print(prompt)
             print("### End of Prompt ###\n")
 
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[{"role": "user", "content": prompt}],
-                    **self.generation_kwargs
-                )
-            )
+            response = await self._chat_completion(prompt, "decision")
 
             print("\n### LLM Raw Response ###")
             print(response)
@@ -260,6 +977,18 @@ Analyze the current state and provide a single next action. Your response must b
                     }
                 }
 
+            if self.response_format == "batch":
+                if not isinstance(result.get('actions'), list) or not result['actions']:
+                    result['actions'] = [result['action']] if isinstance(result.get('action'), dict) else []
+                for action in result['actions']:
+                    if isinstance(action, dict):
+                        self._resolve_command_name(action)
+                # Keep the single-action shape available for callers that ignore batches
+                if result['actions']:
+                    result['action'] = result['actions'][0]
+            elif isinstance(result.get('action'), dict):
+                self._resolve_command_name(result['action'])
+
             # Add empty analysis if it doesn't exist
             if 'analysis' not in result:
                 result['analysis'] = {
@@ -344,10 +1073,10 @@ You are tasked with extracting new 'best practices, useful findings and extracte
 Here are the details:
 
 ## Goal:
-{json.dumps(self.goal, indent=2)}
+{self._goal_text()}
 
 ## Functions:
-{json.dumps(self.functions, indent=2)}
+{json.dumps(self._prompt_functions(), indent=2)}
 
 ## Recent Execution History (Last B={self.summary_window} steps):
 {json.dumps([self._entry_to_dict(e) for e in relevant_history], indent=2)}
@@ -386,28 +1115,15 @@ Make sure to avoid duplication and preserve important details.
         Вспомогательный метод для вызова LLM 
         (запрашивает у модели текстовые Best Practices на основе prompt_text).
         """
+        return await self._call_llm_text(prompt_text, call_type="best_practices")
+
+    async def _call_llm_text(self, prompt_text: str, call_type: str) -> str:
+        """Send a single text prompt to the LLM and return the plain text answer ("" on error)"""
         try:
-            if self.model_type == "local":
-                import openai
-                client = openai.OpenAI(
-                    base_url="http://127.0.0.1:1234/v1",
-                    api_key="lm-studio"
-                )
-            else:
-                from openai import OpenAI
-                client = OpenAI()
-
-            response = await asyncio.get_event_loop().run_in_executor(
-                None,
-                lambda: client.chat.completions.create(
-                    model=self.model_name,
-                    messages=[{"role": "user", "content": prompt_text}],
-                    **self.generation_kwargs
-                )
-            )
+            response = await self._chat_completion(prompt_text, call_type)
 
             content = response.choices[0].message.content.strip()
             return content
         except Exception as e:
-            print(f"Error calling LLM for best practices: {e}")
+            print(f"Error calling LLM for {call_type.replace('_', ' ')}: {e}")
             return ""
@@ -0,0 +1,170 @@
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+from collections import deque
+import hashlib
+import json
+
+LOOP_POLICIES = ("warn", "block", "stop")
+
+
+@dataclass
+class LoopDetection:
+    kind: str  # "repeated_failure" or "cycle"
+    command_names: List[str]
+    repeats: int
+    message: str
+    # Fingerprint of the (command, parameters) pair that should not be issued again in this state
+    blocked_action: Optional[str] = None
+
+
+@dataclass
+class _Observation:
+    action_key: str
+    fingerprint: str
+    command_name: str
+    failed: bool
+
+
+def canonical_json(value: Any) -> str:
+    """Stable JSON representation used for hashing parameters, results and state"""
+    return json.dumps(value, sort_keys=True, default=str, separators=(",", ":"))
+
+
+def action_fingerprint(command_name: str, parameters: Dict[str, Any]) -> str:
+    """Fingerprint of what the agent asked for, independent of the outcome"""
+    return hashlib.sha1(f"{command_name}|{canonical_json(parameters)}".encode()).hexdigest()
+
+
+class LoopDetector:
+    """Detects repeated failures and action cycles in the recent execution history.
+
+    Every executed step is fingerprinted by (command, parameters, result) and,
+    when a state provider is registered on the processor, by the environment
+    state. Detection works on a sliding window of the last `window` steps and
+    never calls the LLM.
+    """
+
+    def __init__(self,
+                 policy: str = "warn",
+                 window: int = 12,
+                 max_repeated_failures: int = 2,
+                 max_cycle_repeats: int = 3,
+                 max_cycle_period: int = 3,
+                 max_detections: int = 5):
+        """Initialize the detector
+
+        Args:
+            policy: Reaction to a detection - "warn" adds a warning to the next prompt,
+                "block" also refuses to run the exact repeated action again,
+                "stop" ends the episode
+            window: Number of recent steps to inspect
+            max_repeated_failures: Identical failed steps tolerated before reacting
+            max_cycle_repeats: Repetitions of the same action sequence tolerated before reacting
+            max_cycle_period: Longest action sequence considered a cycle
+            max_detections: With "warn"/"block", end the episode after this many detections
+                (0 disables escalation)
+        """
+        if policy not in LOOP_POLICIES:
+            raise ValueError(f"Unknown loop policy: {policy}. Expected one of {LOOP_POLICIES}")
+        self.policy = policy
+        self.window = window
+        self.max_repeated_failures = max_repeated_failures
+        self.max_cycle_repeats = max_cycle_repeats
+        self.max_cycle_period = max_cycle_period
+        self.max_detections = max_detections
+
+        self._recent: deque = deque(maxlen=window)
+        self.blocked_actions: Dict[str, str] = {}  # block key (action and state) -> reason
+        self.pending_warning: Optional[str] = None
+        self.detections: List[LoopDetection] = []
+        self.blocked_count = 0  # tool runs refused; each still cost an LLM decision
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "detections": len(self.detections),
+            "blocked_actions": self.blocked_count,
+        }
+
+    @staticmethod
+    def _block_key(action_key: str, state: Any) -> str:
+        if state is None:
+            return action_key
+        return hashlib.sha1(f"{action_key}|{canonical_json(state)}".encode()).hexdigest()
+
+    def is_blocked(self, command_name: str, parameters: Dict[str, Any], state: Any = None) -> Optional[str]:
+        """Return the block reason if this exact action was blocked in this state, otherwise None"""
+        return self.blocked_actions.get(self._block_key(action_fingerprint(command_name, parameters), state))
+
+    def observe(self, entry, state: Any = None) -> Optional[LoopDetection]:
+        """Record an executed step and return a detection if a loop is found"""
+        # A warning is shown in exactly one prompt - the one right after the detection
+        self.pending_warning = None
+        if state is None and entry.status == "success":
+            # Without a state provider a successful step may have changed the
+            # environment, so earlier blocks no longer apply
+            self.blocked_actions.clear()
+        action_key = action_fingerprint(entry.command_name, entry.parameters)
+        fingerprint = hashlib.sha1(
+            f"{action_key}|{canonical_json(entry.result)}|{canonical_json(state)}".encode()
+        ).hexdigest()
+        self._recent.append(_Observation(
+            action_key=action_key,
+            fingerprint=fingerprint,
+            command_name=entry.command_name,
+            failed=entry.status != "success"
+        ))
+
+        detection = self._find_repeated_failure() or self._find_cycle()
+        if detection is None:
+            return None
+
+        self.detections.append(detection)
+        self.pending_warning = detection.message
+        if self.policy == "block" and detection.blocked_action:
+            self.blocked_actions[self._block_key(detection.blocked_action, state)] = detection.message
+        # Start a fresh window so the same loop is not reported on every following step
+        self._recent.clear()
+        return detection
+
+    def should_stop(self) -> bool:
+        if self.policy == "stop":
+            return bool(self.detections)
+        return self.max_detections > 0 and len(self.detections) >= self.max_detections
+
+    def _find_repeated_failure(self) -> Optional[LoopDetection]:
+        last = self._recent[-1]
+        if not last.failed:
+            return None
+        repeats = sum(1 for obs in self._recent if obs.fingerprint == last.fingerprint)
+        if repeats <= self.max_repeated_failures:
+            return None
+        return LoopDetection(
+            kind="repeated_failure",
+            command_names=[last.command_name],
+            repeats=repeats,
+            message=(f"'{last.command_name}' failed {repeats} times in the last {len(self._recent)} steps "
+                     f"with the same parameters and result. Do not repeat it; try a different action."),
+            blocked_action=last.action_key
+        )
+
+    def _find_cycle(self) -> Optional[LoopDetection]:
+        observations = list(self._recent)
+        for period in range(1, self.max_cycle_period + 1):
+            needed = period * (self.max_cycle_repeats + 1)
+            if len(observations) < needed:
+                break
+            tail = [obs.fingerprint for obs in observations[-needed:]]
+            pattern = tail[-period:]
+            if all(tail[i] == pattern[i % period] for i in range(needed)):
+                names = [obs.command_name for obs in observations[-period:]]
+                # The state now is the one the cycle started from, so its first
+                # action is the one that would be repeated next
+                return LoopDetection(
+                    kind="cycle",
+                    command_names=names,
+                    repeats=self.max_cycle_repeats + 1,
+                    message=(f"The sequence {' -> '.join(names)} was repeated {self.max_cycle_repeats + 1} times "
+                             f"with identical results and state. It is not making progress; change strategy."),
+                    blocked_action=observations[-period].action_key
+                )
+        return None
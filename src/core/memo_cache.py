@@ -0,0 +1,77 @@
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Callable, Tuple
+import copy
+import time
+
+from .loop_detector import action_fingerprint, canonical_json
+
+
+class ResultCache:
+    """LRU + TTL cache of results of commands marked "pure" in functions.json.
+
+    Entries are keyed on the command name and canonicalized parameters. Commands
+    that are also marked "state_dependent" add the processor's state provider
+    output to the key, so e.g. the maze's look_around is cached per position.
+    """
+
+    def __init__(self, max_entries: int = 256, ttl: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic):
+        """Initialize the cache
+
+        Args:
+            max_entries: Entries kept before the least recently used one is evicted
+            ttl: Seconds an entry stays valid (default: no expiry)
+            clock: Time source for TTL checks
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def key(command_name: str, parameters: Dict[str, Any], state: Any = None) -> str:
+        fingerprint = action_fingerprint(command_name, parameters)
+        if state is None:
+            return fingerprint
+        return f"{fingerprint}|{canonical_json(state)}"
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return a copy of the cached result, or None on a miss"""
+        item = self._entries.get(key)
+        if item is not None and self.ttl is not None and self.clock() - item[0] > self.ttl:
+            del self._entries[key]
+            self.evictions += 1
+            item = None
+        if item is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        # Callers may mutate results, the cached copy must stay intact
+        return copy.deepcopy(item[1])
+
+    def put(self, key: str, result: Dict[str, Any]):
+        self._entries[key] = (self.clock(), copy.deepcopy(result))
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    def clear(self):
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self._entries)
+        }
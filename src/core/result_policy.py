@@ -0,0 +1,109 @@
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional
+
+
+@dataclass
+class ResultPolicy:
+    """Declarative shaping of a command's results before they are shown to the LLM.
+
+    Declared per command in functions.json under "result_policy", e.g.
+
+        "result_policy": {
+            "max_items": 5,
+            "max_string_length": 280,
+            "keep_fields": ["id", "text", "author.screen_name"],
+            "digest_after_steps": 3,
+            "digest_fields": ["id"]
+        }
+
+    The full result is always kept in the execution history; only its prompt
+    representation is shaped.
+    """
+    max_items: Optional[int] = None  # longest list kept, extra items are counted
+    max_string_length: Optional[int] = None  # longest string kept
+    keep_fields: Optional[List[str]] = None  # dotted paths kept in dicts inside lists
+    digest_after_steps: Optional[int] = None  # older entries keep only a digest
+    digest_fields: Optional[List[str]] = None  # fields of list items kept in the digest
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ResultPolicy":
+        unknown = set(data) - set(cls.__dataclass_fields__)
+        if unknown:
+            raise ValueError(f"Unknown result policy options: {', '.join(sorted(unknown))}")
+        return cls(**data)
+
+    def is_digested(self, age: int) -> bool:
+        """Whether an entry `age` steps old is reduced to a digest"""
+        return self.digest_after_steps is not None and age >= self.digest_after_steps
+
+    def apply(self, result: Dict[str, Any], age: int = 0) -> Dict[str, Any]:
+        """Return the shaped copy of `result` for an entry `age` steps old"""
+        if not isinstance(result, dict):
+            return self._shape(result, in_list=False)
+        if self.is_digested(age):
+            return self._digest(result)
+        return {key: self._shape(value, in_list=False) for key, value in result.items()}
+
+    def _shape(self, value: Any, in_list: bool) -> Any:
+        if isinstance(value, str):
+            return truncate_text(value, self.max_string_length)
+        if isinstance(value, list):
+            items = value if self.max_items is None else value[:self.max_items]
+            shaped = [self._shape(item, in_list=True) for item in items]
+            if len(value) > len(items):
+                shaped.append(f"... {len(value) - len(items)} more")
+            return shaped
+        if isinstance(value, dict):
+            if in_list and self.keep_fields:
+                value = _select_fields(value, self.keep_fields)
+            return {key: self._shape(item, in_list=False) for key, item in value.items()}
+        return value
+
+    def _digest(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        digest: Dict[str, Any] = {}
+        for key, value in result.items():
+            if isinstance(value, list):
+                if self.digest_fields and all(isinstance(item, dict) for item in value):
+                    digest[key] = [_select_fields(item, self.digest_fields) for item in value]
+                else:
+                    digest[key] = f"{len(value)} items"
+            elif isinstance(value, dict):
+                digest[key] = f"{len(value)} fields"
+            elif isinstance(value, str):
+                digest[key] = truncate_text(value, 80)
+            else:
+                digest[key] = value
+        return digest
+
+
+def truncate_text(text: str, limit: Optional[int]) -> str:
+    """Shorten text to at most `limit` characters, marking the cut with an ellipsis"""
+    if limit is None or len(text) <= limit:
+        return text
+    return text[:max(limit - 1, 0)] + "…"
+
+
+def _select_fields(data: Dict[str, Any], paths: List[str]) -> Dict[str, Any]:
+    """Keep only the dotted `paths` of `data`, preserving nesting"""
+    selected: Dict[str, Any] = {}
+    for path in paths:
+        source, target = data, selected
+        parts = path.split(".")
+        for i, part in enumerate(parts):
+            if not isinstance(source, dict) or part not in source:
+                break
+            if i == len(parts) - 1:
+                target[part] = source[part]
+            else:
+                source = source[part]
+                target = target.setdefault(part, {})
+    return selected
+
+
+def load_result_policies(functions: Dict[str, Any]) -> Dict[str, ResultPolicy]:
+    """Collect result policies declared in a functions.json document, keyed by command name"""
+    return {
+        function['name']: ResultPolicy.from_dict(function['result_policy'])
+        for function in functions.get('functions', [])
+        if function.get('result_policy')
+    }
@@ -0,0 +1,115 @@
+from typing import List, Dict, Any, Iterable, Optional, Tuple
+from collections import Counter
+import json
+import math
+import re
+
+_STOPWORDS = {
+    "a", "an", "the", "and", "or", "of", "to", "in", "on", "for", "with", "by", "is", "are",
+    "be", "this", "that", "it", "as", "at", "from", "into", "use", "should", "must", "s"
+}
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase word tokens; snake_case names are split into their words"""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in _STOPWORDS]
+
+
+def _function_document(function: Dict[str, Any]) -> str:
+    """Searchable text of a function definition: name, description and parameter docs"""
+    parts = [function.get('name', ''), function.get('description', '')]
+    parameters = function.get('parameters', {})
+    # Both flat {"name": {...}} and JSON-schema {"properties": {...}} parameter styles are used
+    properties = parameters.get('properties', parameters) if isinstance(parameters, dict) else {}
+    for name, spec in properties.items():
+        if isinstance(spec, dict):
+            parts.extend([name, str(spec.get('description', ''))])
+    return " ".join(parts)
+
+
+class ToolSelector:
+    """Ranks registered functions against the current situation with BM25, locally.
+
+    The query is built from the goal, the recent history and the last result.
+    Only the `top_k` best functions plus pinned ones are shown in full in the
+    prompt and the next `list_k` by name, so prompt size stays constant as the
+    catalog grows.
+    """
+
+    def __init__(self, top_k: int = 8, list_k: int = 20, recent_boost: float = 1.0, k1: float = 1.2,
+                 b: float = 0.75):
+        """Initialize the selector
+
+        Args:
+            top_k: Number of ranked functions to show in full
+            list_k: Number of further ranked functions to list by name only
+            recent_boost: Score bonus for functions used in the recent history
+            k1: BM25 term frequency saturation
+            b: BM25 document length normalization
+        """
+        self.top_k = top_k
+        self.list_k = list_k
+        self.recent_boost = recent_boost
+        self.k1 = k1
+        self.b = b
+        self._indexed_functions: Optional[List[Dict[str, Any]]] = None
+        self._indexed_count = -1
+
+    def index(self, functions: List[Dict[str, Any]]):
+        """(Re)build the BM25 index over the function definitions"""
+        self._indexed_functions = functions
+        self._indexed_count = len(functions)
+        self._documents = [Counter(tokenize(_function_document(f))) for f in functions]
+        self._lengths = [sum(doc.values()) for doc in self._documents]
+        self._average_length = (sum(self._lengths) / len(self._lengths)) if self._lengths else 0.0
+        document_frequency = Counter(term for doc in self._documents for term in doc)
+        total = len(functions)
+        self._idf = {
+            term: math.log(1 + (total - df + 0.5) / (df + 0.5))
+            for term, df in document_frequency.items()
+        }
+
+    def _ensure_index(self, functions: List[Dict[str, Any]]):
+        if self._indexed_functions is not functions or self._indexed_count != len(functions):
+            self.index(functions)
+
+    def score(self, query_terms: Iterable[str]) -> List[float]:
+        query = Counter(query_terms)
+        scores = []
+        for doc, length in zip(self._documents, self._lengths):
+            score = 0.0
+            for term, query_count in query.items():
+                tf = doc.get(term)
+                if not tf:
+                    continue
+                norm = self.k1 * (1 - self.b + self.b * length / (self._average_length or 1))
+                score += self._idf[term] * tf * (self.k1 + 1) / (tf + norm) * (1 + math.log(query_count))
+            scores.append(score)
+        return scores
+
+    def select(self, functions: List[Dict[str, Any]], goal: Any,
+               recent_entries: List[Any]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Return the functions to show in full, in catalog order, and the names of the
+        next `list_k` functions to list, best first"""
+        if len(functions) <= self.top_k:
+            return list(functions), []
+        self._ensure_index(functions)
+
+        query_parts = [goal if isinstance(goal, str) else json.dumps(goal, default=str)]
+        for entry in recent_entries:
+            query_parts.append(f"{entry.command_name} {json.dumps(entry.parameters, default=str)}")
+        if recent_entries:
+            # The last result usually says most about what is needed next
+            query_parts.append(json.dumps(recent_entries[-1].result, default=str))
+        scores = self.score(tokenize(" ".join(query_parts)))
+
+        recent_names = {entry.command_name for entry in recent_entries}
+        for i, function in enumerate(functions):
+            if function.get('name') in recent_names:
+                scores[i] += self.recent_boost
+
+        ranked = sorted(range(len(functions)), key=lambda i: scores[i], reverse=True)
+        selected = set(ranked[:self.top_k])
+        selected.update(i for i, function in enumerate(functions) if function.get('pinned'))
+        listed = [functions[i]['name'] for i in ranked if i not in selected][:self.list_k]
+        return [function for i, function in enumerate(functions) if i in selected], listed
@@ -1,15 +1,52 @@
-from flask import Flask, render_template_string
+from collections import deque
+from typing import Any, Dict, List, Optional, Tuple
+from flask import Flask, Response, abort, render_template_string, request
+from werkzeug.serving import make_server
+import difflib
+import json
 import threading
 import webbrowser
 from flask_cors import CORS
 import os
 
-HTML_TEMPLATE = '''
-<!DOCTYPE html>
-<html>
-<head>
-    <title>LLM Processor Prompt</title>
-    <meta http-equiv="Content-Security-Policy" content="default-src 'self' 'unsafe-inline'">
+# Prompt versions kept so reconnecting clients can catch up with diffs
+HISTORY_SIZE = 50
+# Seconds between keep-alive comments on an idle event stream
+KEEPALIVE_INTERVAL = 15
+# Closed sessions are dropped from the server beyond this many sessions
+MAX_SESSIONS = 100
+
+# Numeric status fields exported on /metrics: (status key, metric type, help text)
+METRICS = [
+    ("steps", "counter", "Commands executed"),
+    ("step_latency_seconds", "gauge", "Duration of the last step, from decision to result"),
+    ("prompt_tokens", "counter", "Prompt tokens reported by the LLM API"),
+    ("completion_tokens", "counter", "Completion tokens reported by the LLM API"),
+    ("llm_calls", "counter", "LLM API calls"),
+    ("summaries", "counter", "Best practices summaries generated"),
+    ("summarizing", "gauge", "1 while best practices are being summarized"),
+    ("prompt_version", "counter", "Prompt versions published to the monitor"),
+    ("stream_clients", "gauge", "Open event streams"),
+]
+
+
+def line_diff(old: str, new: str) -> List[list]:
+    """Line replacements [start, end, lines] that turn old into new.
+
+    start and end index the lines of old; applying the replacements from the
+    last to the first keeps the earlier indexes valid.
+    """
+    old_lines, new_lines = old.split("\n"), new.split("\n")
+    matcher = difflib.SequenceMatcher(None, old_lines, new_lines, autojunk=False)
+    return [[i1, i2, new_lines[j1:j2]] for tag, i1, i2, j1, j2 in matcher.get_opcodes() if tag != "equal"]
+
+
+def format_event(seq: Optional[int], event: str, data: dict) -> str:
+    # Events without an id leave the client's Last-Event-ID unchanged
+    event_id = f"id: {seq}\n" if seq is not None else ""
+    return f"{event_id}event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+STYLE = '''
     <style>
         body {
             font-family: monospace;
@@ -28,67 +65,336 @@ HTML_TEMPLATE = '''
         h1 {
             color: #569cd6;
         }
+        a {
+            color: #9cdcfe;
+        }
+        td {
+            padding: 2px 12px 2px 0;
+            vertical-align: top;
+        }
     </style>
+'''
+
+INDEX_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>LLM Processor Sessions</title>
+    <meta http-equiv="Content-Security-Policy" content="default-src 'self' 'unsafe-inline'">
+    ''' + STYLE + '''
+</head>
+<body>
+    <h1>LLM Processor Sessions</h1>
+    <table>
+        <tr><td>Session</td><td>Steps</td><td>Last action</td><td>State</td></tr>
+        {% for session in sessions %}
+        <tr>
+            <td><a href="sessions/{{ session.session_id }}/">{{ session.session_id }}</a></td>
+            <td>{{ session.status.get("steps", 0) }}</td>
+            <td>{{ session.status.get("last_action", {}).get("command", "-") }}</td>
+            <td>{{ "closed" if session.closed else "running" }}</td>
+        </tr>
+        {% endfor %}
+    </table>
+    <p><a href="metrics">metrics</a></p>
+</body>
+</html>
+'''
+
+HTML_TEMPLATE = '''
+<!DOCTYPE html>
+<html>
+<head>
+    <title>LLM Processor Prompt - {{ session_id }}</title>
+    <meta http-equiv="Content-Security-Policy" content="default-src 'self' 'unsafe-inline'">
+    ''' + STYLE + '''
     <script>
-        function refreshContent() {
-            fetch('http://127.0.0.1:5000/prompt', {
-                method: 'GET',
-                headers: {
-                    'Accept': 'text/plain',
-                },
-            })
-            .then(response => response.text())
-            .then(data => {
-                document.getElementById('prompt-content').innerHTML = data;
-            })
-            .catch(error => console.error('Error:', error));
+        // Pushed by the server on every change: a snapshot first, then line diffs.
+        // The browser resends the last event id when it reconnects, so only
+        // the missed diffs are sent again.
+        let lines = [];
+        let seq = null;
+        let source = null;
+
+        function render() {
+            document.getElementById('prompt-content').textContent = lines.join('\\n');
+        }
+
+        function renderStatus(status) {
+            const table = document.getElementById('status');
+            table.replaceChildren();
+            for (const [key, value] of Object.entries(status)) {
+                const row = table.insertRow();
+                row.insertCell().textContent = key;
+                row.insertCell().textContent = typeof value === 'object' ? JSON.stringify(value) : value;
+            }
         }
-        // Refresh every 2 seconds
-        setInterval(refreshContent, 2000);
+
+        function connect(since) {
+            if (source) source.close();
+            source = new EventSource(since === undefined ? 'events' : 'events?since=' + since);
+            source.addEventListener('snapshot', event => {
+                const data = JSON.parse(event.data);
+                lines = data.text.split('\\n');
+                seq = data.seq;
+                render();
+            });
+            source.addEventListener('diff', event => {
+                const data = JSON.parse(event.data);
+                if (data.base !== seq) {
+                    // Out of step: ask for a fresh snapshot
+                    connect(-1);
+                    return;
+                }
+                for (const [start, end, newLines] of data.ops.slice().reverse()) {
+                    lines.splice(start, end - start, ...newLines);
+                }
+                seq = data.seq;
+                render();
+            });
+            source.addEventListener('status', event => renderStatus(JSON.parse(event.data)));
+        }
+
+        connect();
     </script>
 </head>
 <body>
-    <h1>LLM Processor Prompt</h1>
+    <h1>LLM Processor Prompt - {{ session_id }}</h1>
+    <p><a href="../../">all sessions</a></p>
+    <table id="status"></table>
     <pre id="prompt-content">{{ prompt }}</pre>
 </body>
 </html>
 '''
 
 class PromptDisplay:
-    def __init__(self, port=5000):
+    """
+    Prompt and status of one processor session, published to the monitoring server.
+
+    Updates only store the new values; diffs and pages are computed when a
+    client asks for them, so a session without viewers costs next to nothing.
+    """
+
+    def __init__(self, session_id: str = "default"):
+        self.session_id = session_id
+        self.current_prompt = ""
+        self.seq = 0
+        self.status: Dict[str, Any] = {}
+        self.status_version = 0
+        self.clients = 0
+        self.closed = False
+        self._versions = deque([(0, "")], maxlen=HISTORY_SIZE)
+        self._diffs = {}  # seq -> diff against the previous version, computed when first sent
+        self._changed = threading.Condition()
+
+    def update_prompt(self, prompt: str):
+        """Store a new prompt version and wake up the event streams; unchanged prompts are ignored."""
+        with self._changed:
+            if prompt == self.current_prompt:
+                return
+            self.seq += 1
+            self.current_prompt = prompt
+            self._versions.append((self.seq, prompt))
+            self._changed.notify_all()
+
+    def update_status(self, **fields):
+        """Merge fields into the session status shown on its page and on /metrics."""
+        with self._changed:
+            self.status.update(fields)
+            self.status_version += 1
+            self._changed.notify_all()
+
+    def close(self):
+        self.closed = True
+        self.update_status(closed=True)
+
+    def metrics(self) -> Dict[str, float]:
+        with self._changed:
+            values = dict(self.status)
+            values.update(prompt_version=self.seq, stream_clients=self.clients)
+        return {key: float(values[key]) for key, _, _ in METRICS
+                if isinstance(values.get(key), (int, float))}
+
+    def events_since(self, last_seq: Optional[int]) -> Tuple[int, List[str]]:
+        """
+        Events bringing a client from last_seq to the current version, and that version.
+        Diffs are sent while the client's version is still in the history;
+        otherwise (or for a new client) a full snapshot.
+        """
+        with self._changed:
+            seq = self.seq
+            if last_seq == seq:
+                return seq, []
+            versions = list(self._versions)
+            if last_seq is None or not versions[0][0] <= last_seq < seq:
+                return seq, [format_event(seq, "snapshot", {"seq": seq, "text": self.current_prompt})]
+            for stale in [s for s in self._diffs if s <= versions[0][0]]:
+                del self._diffs[stale]
+            events = []
+            for (base, old), (version, new) in zip(versions, versions[1:]):
+                if base < last_seq:
+                    continue
+                if version not in self._diffs:
+                    self._diffs[version] = line_diff(old, new)
+                events.append(format_event(version, "diff", {"base": base, "seq": version,
+                                                             "ops": self._diffs[version]}))
+            return seq, events
+
+    def stream(self, last_seq: Optional[int]):
+        """Server-Sent Events for one client: prompt changes and status updates."""
+        with self._changed:
+            self.clients += 1
+        try:
+            last_status = -1
+            while True:
+                last_seq, events = self.events_since(last_seq)
+                for event in events:
+                    yield event
+                with self._changed:
+                    status_version, status = self.status_version, dict(self.status)
+                if status_version != last_status:
+                    last_status = status_version
+                    yield format_event(None, "status", status)
+                with self._changed:
+                    changed = self._changed.wait_for(
+                        lambda: self.seq != last_seq or self.status_version != last_status,
+                        timeout=KEEPALIVE_INTERVAL
+                    )
+                if not changed:
+                    yield ": keep-alive\n\n"
+        finally:
+            with self._changed:
+                self.clients -= 1
+
+
+class MonitoringServer:
+    """
+    One web server for every processor session in the process.
+
+    Serves a session list at /, a live page per session at /sessions/<id>/
+    and Prometheus-style metrics at /metrics. start() binds the port and
+    returns at once; the server runs in a daemon thread.
+    """
+
+    def __init__(self, host: str = '127.0.0.1', port: int = 5000):
         self.app = Flask(__name__)
         CORS(self.app, resources={r"/*": {"origins": "*"}})  # More permissive CORS
+        self.host = host
         self.port = port
-        self.current_prompt = ""
-        
+        self.sessions: Dict[str, PromptDisplay] = {}
+        self._lock = threading.Lock()
+        self._server = None
+        self.server_thread: Optional[threading.Thread] = None
+
         @self.app.route('/')
         def home():
-            return render_template_string(HTML_TEMPLATE, prompt=self.current_prompt)
-            
-        @self.app.route('/prompt')
-        def get_prompt():
-            return self.current_prompt
-            
-    def update_prompt(self, prompt: str):
-        self.current_prompt = prompt
-        
-    def start(self):
-        def run_server():
-            # More permissive server configuration
-            self.app.run(
-                host='127.0.0.1',  # Localhost only
-                port=self.port,
-                debug=False,
-                threaded=True,
-                ssl_context=None  # Disable SSL for local development
-            )
-            
-        self.server_thread = threading.Thread(target=run_server, daemon=True)
+            with self._lock:
+                sessions = list(self.sessions.values())
+            return render_template_string(INDEX_TEMPLATE, sessions=sessions)
+
+        @self.app.route('/sessions/<session_id>/')
+        def session_page(session_id):
+            display = self._get(session_id)
+            return render_template_string(HTML_TEMPLATE, session_id=session_id, prompt=display.current_prompt)
+
+        @self.app.route('/sessions/<session_id>/prompt')
+        def get_prompt(session_id):
+            return Response(self._get(session_id).current_prompt, mimetype='text/plain')
+
+        @self.app.route('/sessions/<session_id>/status')
+        def get_status(session_id):
+            display = self._get(session_id)
+            with display._changed:
+                status = dict(display.status)
+            return Response(json.dumps(status, default=str), mimetype='application/json')
+
+        @self.app.route('/sessions/<session_id>/events')
+        def events(session_id):
+            display = self._get(session_id)
+            since = request.args.get('since', request.headers.get('Last-Event-ID'))
+            try:
+                last_seq = int(since) if since is not None else None
+            except ValueError:
+                last_seq = None
+            return Response(display.stream(last_seq), mimetype='text/event-stream',
+                            headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+        @self.app.route('/metrics')
+        def metrics():
+            return Response(self.render_metrics(), mimetype='text/plain; version=0.0.4')
+
+    def _get(self, session_id: str) -> PromptDisplay:
+        with self._lock:
+            display = self.sessions.get(session_id)
+        if display is None:
+            abort(404)
+        return display
+
+    def session(self, name: str) -> PromptDisplay:
+        """Register a new session; the name gets a numeric suffix if it is taken."""
+        with self._lock:
+            session_id, n = name, 1
+            while session_id in self.sessions:
+                n += 1
+                session_id = f"{name}-{n}"
+            display = PromptDisplay(session_id)
+            self.sessions[session_id] = display
+            closed = [sid for sid, s in self.sessions.items() if s.closed]
+            for sid in closed[:max(0, len(self.sessions) - MAX_SESSIONS)]:
+                del self.sessions[sid]
+        return display
+
+    def render_metrics(self) -> str:
+        with self._lock:
+            sessions = list(self.sessions.values())
+        values = [(display.session_id, display.metrics()) for display in sessions]
+        lines = []
+        for key, metric_type, help_text in METRICS:
+            name = f"ai42z_{key}" + ("_total" if metric_type == "counter" else "")
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {metric_type}")
+            for session_id, session_metrics in values:
+                if key in session_metrics:
+                    lines.append(f'{name}{{session="{session_id}"}} {session_metrics[key]:g}')
+        return "\n".join(lines) + "\n"
+
+    @property
+    def url(self) -> str:
+        return f"http://{self.host}:{self.port}"
+
+    def start(self, open_browser: bool = False):
+        """Bind and serve in the background; falls back to a free port if the port is taken."""
+        if self._server is not None:
+            return
+        try:
+            self._server = make_server(self.host, self.port, self.app, threaded=True)
+        except OSError as e:
+            print(f"[Monitor] Port {self.port} unavailable ({e}), using a free port")
+            self._server = make_server(self.host, 0, self.app, threaded=True)
+        self.port = self._server.server_port
+        self.server_thread = threading.Thread(target=self._server.serve_forever, daemon=True)
         self.server_thread.start()
-        
-        # Give the server a moment to start
-        import time
-        time.sleep(1)
-        
-        # Open in default browser
-        webbrowser.open(f'http://127.0.0.1:{self.port}') 
\ No newline at end of file
+        print(f"[Monitor] Serving sessions at {self.url}")
+        if open_browser:
+            threading.Thread(target=webbrowser.open, args=(self.url,), daemon=True).start()
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+_monitoring_server: Optional[MonitoringServer] = None
+_monitoring_server_lock = threading.Lock()
+
+
+def get_monitoring_server(port: int = 5000, open_browser: bool = False) -> MonitoringServer:
+    """The process-wide monitoring server, started on first use (later arguments are ignored)."""
+    global _monitoring_server
+    with _monitoring_server_lock:
+        if _monitoring_server is None:
+            server = MonitoringServer(port=port)
+            server.start(open_browser=open_browser)
+            _monitoring_server = server
+        return _monitoring_server
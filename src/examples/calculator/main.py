@@ -3,21 +3,10 @@ import os
 import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from core.llm_processor import LLMProcessor
-
-def is_goal_achieved(history) -> bool:
-    """Check if calculation goal is achieved"""
-    try:
-        # Find submission with correct result
-        submit = next(entry for entry in history 
-                     if entry.command_name == 'submit_result' 
-                     and entry.result['status'] == 'success'
-                     and entry.parameters['value'] == 14)
-        return True
-    except StopIteration:
-        return False
+from core.llm_processor import LLMProcessor, load_environment
 
 async def initialize_processor():
+    load_environment()
     current_dir = os.path.dirname(os.path.abspath(__file__))
     config_dir = os.path.join(current_dir, 'config')
     
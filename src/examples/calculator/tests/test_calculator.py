@@ -8,18 +8,6 @@ from examples.calculator.main import initialize_processor
 
 EXPECTED_RESULT = 14  # The expected result of (4 + 3) * 2
 
-def is_goal_achieved(history) -> bool:
-    """Check if calculation goal is achieved with correct result"""
-    try:
-        # Find submission and verify the result
-        submit = next(entry for entry in history 
-                     if entry.command_name == 'submit_result' 
-                     and entry.result['status'] == 'success'
-                     and entry.parameters['value'] == EXPECTED_RESULT)
-        return True
-    except StopIteration:
-        return False
-
 @pytest.mark.asyncio
 async def test_calculator_scenario():
     """Test basic arithmetic operations using LLM"""
@@ -48,7 +36,7 @@ async def test_calculator_scenario():
         
         print(f"Action result: {result}\n")
         
-        if is_goal_achieved(processor.execution_history):
+        if processor.goal_achieved:
             success = True
             print("\n=== Goal Achieved! ===")
             break
@@ -5,7 +5,8 @@ import os
 
 # Add the src directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from core.llm_processor import LLMProcessor
+from core.llm_processor import LLMProcessor, load_environment
+from core.clock import SimulatedClock
 from typing import Dict, Any
 
 def check_command_possibility(history, command_name: str) -> tuple[bool, str]:
@@ -15,36 +16,28 @@ def check_command_possibility(history, command_name: str) -> tuple[bool, str]:
         return True, ""
         
     # Check if machine is powered on
-    last_power = next((entry for entry in reversed(history) 
-                      if entry.command_name == 'power_coffee_machine' 
-                      and entry.result['status'] == 'success'), None)
-    if not last_power or last_power.parameters.get('power') != 'on':
+    last_power_index = history.last_index('power_coffee_machine', result_status='success')
+    if last_power_index is None or history[last_power_index].parameters.get('power') != 'on':
         return False, "Machine is not powered on"
 
     if command_name == 'add_coffee':
         # Calculate total heating time from throttle commands after power on
-        total_heating_time = 0
-        for entry in history:
-            if (entry.command_name == 'throttle' 
-                and entry.result['status'] == 'accepted'
-                and entry.timestamp > last_power.timestamp
-                and 'wait_time' in entry.parameters):
-                total_heating_time += entry.parameters['wait_time']
+        total_heating_time = history.sum_parameter('throttle', 'wait_time', since=last_power_index + 1,
+                                                   result_status='accepted')
         
         if total_heating_time < 120:  # 2 minutes in seconds
             return False, f"Machine needs more heating time (current: {total_heating_time}s, required: 120s)"
             
     if command_name == 'start_brewing':
         # Check for successful coffee addition
-        last_coffee = next((entry for entry in reversed(history) 
-                          if entry.command_name == 'add_coffee'
-                          and entry.result['status'] == 'success'), None)
+        last_coffee = history.last('add_coffee', result_status='success')
         if not last_coffee:
             return False, "No coffee grounds added"
             
     return True, ""
 
 async def initialize_processor():
+    load_environment()
     # Update paths to be relative to the coffee_maker example directory
     current_dir = os.path.dirname(os.path.abspath(__file__))
     config_dir = os.path.join(current_dir, 'config')
@@ -52,7 +45,9 @@ async def initialize_processor():
     processor = LLMProcessor(
         os.path.join(config_dir, 'functions.json'),
         os.path.join(config_dir, 'goal.yaml'),
-        model_type="openai"
+        model_type="openai",
+        compress_history=True,
+        clock=SimulatedClock()  # heating is simulated, throttle advances virtual time
     )
     
     # Define function implementations
@@ -85,9 +80,7 @@ async def initialize_processor():
             return {"status": "error", "message": error}
             
         # Check for correct amount of coffee
-        last_coffee = next((entry for entry in reversed(processor.execution_history) 
-                         if entry.command_name == 'add_coffee'
-                         and entry.result['status'] == 'success'), None)
+        last_coffee = processor.execution_history.last('add_coffee', result_status='success')
         if last_coffee.parameters['amount_grams'] != params['cups'] * 15:
             return {
                 "status": "error", 
@@ -100,6 +93,7 @@ async def initialize_processor():
         }
 
     async def throttle(params: Dict[str, Any]) -> Dict[str, Any]:
+        await processor.clock.sleep(params.get('wait_time', 0))
         return {"status": "accepted"}
 
     # Register implementations
@@ -109,42 +103,3 @@ async def initialize_processor():
     processor.register_function('start_brewing', start_brewing)
 
     return processor
-
-def is_goal_achieved(history) -> bool:
-    """Check if coffee making goal is achieved based on command history"""
-    try:
-        # Check if machine was powered on
-        power_on = next(entry for entry in history 
-                       if entry.command_name == 'power_coffee_machine' 
-                       and entry.parameters['power'] == 'on' 
-                       and entry.result['status'] == 'success')
-        
-        # Calculate total heating time after power on
-        total_heating_time = 0
-        for entry in history:
-            if (entry.command_name == 'throttle' 
-                and entry.result['status'] == 'accepted'
-                and entry.timestamp > power_on.timestamp
-                and 'wait_time' in entry.parameters):
-                total_heating_time += entry.parameters['wait_time']
-        
-        if total_heating_time < 120:  # 2 minutes in seconds
-            return False
-        
-        # Check if coffee was added with correct amount
-        add_coffee = next(entry for entry in history 
-                         if entry.command_name == 'add_coffee' 
-                         and entry.parameters['amount_grams'] == 30 
-                         and entry.result['status'] == 'success'
-                         and entry.timestamp > power_on.timestamp)
-        
-        # Check if brewing was started with correct number of cups
-        brew = next(entry for entry in history 
-                   if entry.command_name == 'start_brewing' 
-                   and entry.parameters['cups'] == 2 
-                   and entry.result['status'] == 'success'
-                   and entry.timestamp > add_coffee.timestamp)
-        
-        return True
-    except StopIteration:
-        return False
\ No newline at end of file
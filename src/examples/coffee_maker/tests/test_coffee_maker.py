@@ -8,10 +8,7 @@ import os
 # Add the src directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
 
-from examples.coffee_maker.main import (
-    initialize_processor,
-    is_goal_achieved
-)
+from examples.coffee_maker.main import initialize_processor
 
 @pytest.mark.asyncio
 async def test_coffee_scenario_gpt4():
@@ -45,7 +42,7 @@ async def test_coffee_scenario_gpt4():
         
         print(f"Action result: {result}\n")
         
-        if is_goal_achieved(processor.execution_history):
+        if processor.goal_achieved:
             success = True
             print("\n=== Goal Achieved! ===")
             break
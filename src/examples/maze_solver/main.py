@@ -6,7 +6,8 @@ from enum import Enum
 
 # Add the src directory to the Python path
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
-from core.llm_processor import LLMProcessor
+from core.llm_processor import LLMProcessor, load_environment
+from core.loop_detector import LoopDetector
 
 class CellType(Enum):
     EMPTY = "."
@@ -52,7 +53,8 @@ class MazeEnvironment:
                 adjacent[direction] = self.maze[new_y][new_x]
         return adjacent
 
-async def initialize_processor():
+async def initialize_processor(open_browser: bool = False):
+    load_environment()
     current_dir = os.path.dirname(os.path.abspath(__file__))
     config_dir = os.path.join(current_dir, 'config')
     maze_file = os.path.join(config_dir, 'maze.txt')
@@ -65,10 +67,15 @@ async def initialize_processor():
         model_type="openai",
         model_name="gpt-4o-mini",
         ui_visibility=True,
+        session_name="maze_solver",
+        open_browser=open_browser,
         history_size=10,
         summary_interval=5,
-        summary_window=30
+        summary_window=30,
+        loop_detector=LoopDetector(policy="block"),
+        speculative_observations=True
     )
+    processor.register_state_provider(lambda: {"position": env.state.position})
     
     async def look_around(params: Dict[str, Any]) -> Dict[str, Any]:
         cells = env.get_adjacent_cells()
@@ -124,16 +131,3 @@ async def initialize_processor():
     processor.register_function('check_status', check_status)
     
     return processor
-
-def is_goal_achieved(history) -> bool:
-    """Check if maze solving goal is achieved based on command history"""
-    try:
-        # Look for a successful move that reached the exit
-        for entry in history:
-            if (entry.command_name == 'move' and 
-                entry.result.get('message') == 'Reached the exit!' and
-                entry.result.get('status') == 'success'):
-                return True
-        return False
-    except Exception:
-        return False 
\ No newline at end of file
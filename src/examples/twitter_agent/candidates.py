@@ -0,0 +1,124 @@
+import math
+from datetime import datetime
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from core.clock import Clock, SystemClock
+from core.tool_selection import tokenize
+
+# Weights of the score components
+ENGAGEMENT_WEIGHT = 1.0  # log of likes + 2 * retweets + replies
+REACH_WEIGHT = 0.5  # log10 of the author's follower count
+RECENCY_WEIGHT = 2.0  # 1 for a brand-new tweet, halving every recency_half_life_hours
+TOPIC_WEIGHT = 1.5  # per keyword shared with the knowledge base titles
+QUERY_WEIGHT = 0.5  # per extra search query that found the tweet
+
+
+def goal_keywords(goal: Any) -> Set[str]:
+    """Words of every "title" in the goal configuration (the knowledge base topics)."""
+    keywords: Set[str] = set()
+    if isinstance(goal, dict):
+        for key, value in goal.items():
+            if key == "title" and isinstance(value, str):
+                keywords.update(tokenize(value))
+            else:
+                keywords.update(goal_keywords(value))
+    elif isinstance(goal, list):
+        for item in goal:
+            keywords.update(goal_keywords(item))
+    return keywords
+
+
+class CandidatePool:
+    """
+    Reply candidates kept across steps and ranked locally.
+
+    Every new search result enters the pool; the agent is shown only the top
+    few. Candidates that are not picked stay available for later steps until
+    they are too old, so fewer searches are needed.
+    """
+
+    def __init__(self, keywords: Iterable[str], clock: Optional[Clock] = None, max_size: int = 200,
+                 max_age_hours: float = 24, recency_half_life_hours: float = 6, author_cap: int = 1):
+        """
+        keywords: Topic words a good candidate talks about.
+        clock: Time source for recency (default: the system clock).
+        max_size: Candidates kept; the lowest scored are dropped first.
+        max_age_hours: Tweets older than this leave the pool.
+        recency_half_life_hours: Age at which the recency bonus is halved.
+        author_cap: Most candidates from one author in a ranking.
+        """
+        self.keywords = set(keywords)
+        self.clock = clock or SystemClock()
+        self.max_size = max_size
+        self.max_age_hours = max_age_hours
+        self.recency_half_life_hours = recency_half_life_hours
+        self.author_cap = author_cap
+        self._tweets: Dict[str, Any] = {}
+        self._matched_queries: Dict[str, int] = {}
+
+    def __contains__(self, tweet_id: str) -> bool:
+        return str(tweet_id) in self._tweets
+
+    def __len__(self) -> int:
+        return len(self._tweets)
+
+    def _age_hours(self, tweet) -> float:
+        created_at = tweet.created_at
+        if not isinstance(created_at, datetime):
+            return 0.0
+        if created_at.tzinfo is not None:
+            # Compare in local time like the (naive) clock
+            created_at = created_at.astimezone().replace(tzinfo=None)
+        return max(0.0, (self.clock.now() - created_at).total_seconds() / 3600)
+
+    def score(self, tweet) -> float:
+        engagement = math.log1p((tweet.favorite_count or 0) + 2 * (tweet.retweet_count or 0)
+                                + (tweet.reply_count or 0))
+        followers = tweet.user.followers_count if tweet.user else 0
+        reach = math.log10(1 + (followers or 0))
+        recency = 0.5 ** (self._age_hours(tweet) / self.recency_half_life_hours)
+        topic = len(self.keywords.intersection(tokenize(tweet.text or "")))
+        queries = self._matched_queries.get(str(tweet.id), 1) - 1
+        return (ENGAGEMENT_WEIGHT * engagement + REACH_WEIGHT * reach + RECENCY_WEIGHT * recency
+                + TOPIC_WEIGHT * topic + QUERY_WEIGHT * queries)
+
+    def add(self, tweets: Iterable[Any], matched_queries: Optional[Dict[str, int]] = None):
+        """Add new candidates (already filtered for seen, replied and media tweets)."""
+        for tweet in tweets:
+            tweet_id = str(tweet.id)
+            self._tweets[tweet_id] = tweet
+            self._matched_queries[tweet_id] = (matched_queries or {}).get(tweet_id, 1)
+        self._expire()
+        if len(self._tweets) > self.max_size:
+            keep = {tweet_id for _, tweet_id in self._ranked()[:self.max_size]}
+            for tweet_id in list(self._tweets):
+                if tweet_id not in keep:
+                    self.remove(tweet_id)
+
+    def remove(self, tweet_id: str):
+        self._tweets.pop(str(tweet_id), None)
+        self._matched_queries.pop(str(tweet_id), None)
+
+    def _expire(self):
+        for tweet_id, tweet in list(self._tweets.items()):
+            if self._age_hours(tweet) > self.max_age_hours:
+                self.remove(tweet_id)
+
+    def _ranked(self) -> List[Tuple[float, str]]:
+        return sorted(((self.score(tweet), tweet_id) for tweet_id, tweet in self._tweets.items()), reverse=True)
+
+    def top(self, count: int) -> List[Tuple[float, Any]]:
+        """Best candidates as (score, tweet), at most author_cap per author."""
+        self._expire()
+        per_author: Dict[Any, int] = {}
+        result = []
+        for score, tweet_id in self._ranked():
+            tweet = self._tweets[tweet_id]
+            author = tweet.user.screen_name if tweet.user else None
+            if author is not None and per_author.get(author, 0) >= self.author_cap:
+                continue
+            per_author[author] = per_author.get(author, 0) + 1
+            result.append((score, tweet))
+            if len(result) >= count:
+                break
+        return result
@@ -0,0 +1,185 @@
+import random
+import time
+from collections import Counter
+from datetime import timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, Iterable, List, Optional
+
+from core.clock import Clock, SimulatedClock, SystemClock
+
+DEFAULT_VOCABULARY = (
+    "ai agents multi-agent reinforcement learning marl open-source frameworks orchestration llm "
+    "security adversarial robotics federated regulation ethics governance web3 on-chain autonomy "
+    "benchmark simulation productivity roi healthcare finance supply chain startups weekend coffee "
+    "football music travel weather crypto markets design product launch"
+).split()
+
+
+class FakeRateLimitError(Exception):
+    """Rate-limit error injected by the fake backend (raised instead of Twikit's and Tweepy's)"""
+    pass
+
+
+class FakeTwitterBackend:
+    """
+    Synthetic tweet corpus served through stand-ins for the Twikit and Tweepy clients.
+
+    Only the calls the agent makes are implemented: Twikit's search_tweet (and
+    login/cookie handling), Tweepy's get_tweets with expansions and create_tweet.
+    Every call waits `latency` seconds on the clock and fails with a
+    FakeRateLimitError at `rate_limit_rate`, so the whole pipeline (search,
+    dedup store, reply queue and its retries) can be load-tested offline
+    without Twikit or Tweepy installed.
+    """
+
+    def __init__(self, corpus_size: int = 1000, latency: float = 0.05, rate_limit_rate: float = 0.0,
+                 media_rate: float = 0.1, authors: int = 100, vocabulary: Iterable[str] = DEFAULT_VOCABULARY,
+                 clock: Optional[Clock] = None, seed: int = 0):
+        """
+        corpus_size: Number of synthetic tweets.
+        latency: Seconds each API call takes.
+        rate_limit_rate: Share of calls rejected with a rate-limit error.
+        media_rate: Share of tweets carrying media.
+        authors: Number of distinct tweet authors.
+        vocabulary: Words the tweet texts are built from.
+        clock: Time source for tweet dates and latency (default: the system clock).
+        seed: Seed for the corpus and the injected errors.
+        """
+        self.latency = latency
+        self.rate_limit_rate = rate_limit_rate
+        self.clock = clock or SystemClock()
+        self._random = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.rate_limited: Counter = Counter()
+        self.replies: List[Dict[str, str]] = []
+        self.users = [
+            {
+                "id": str(1000 + i),
+                "name": f"User {i}",
+                "username": f"user{i}",
+                "description": "Synthetic account",
+                "public_metrics": {"followers_count": int(self._random.paretovariate(1.2) * 50),
+                                   "following_count": self._random.randint(0, 2000)},
+                "verified": False,
+            }
+            for i in range(authors)
+        ]
+        vocabulary = list(vocabulary)
+        now = self.clock.now()
+        self.tweets: Dict[str, Dict[str, Any]] = {}
+        for i in range(corpus_size):
+            tweet_id = str(10 ** 18 + i)
+            self.tweets[tweet_id] = {
+                "id": tweet_id,
+                "text": " ".join(self._random.choices(vocabulary, k=self._random.randint(6, 20))),
+                "created_at": now - timedelta(seconds=self._random.uniform(0, 24 * 3600)),
+                "lang": "en",
+                "public_metrics": {"like_count": int(self._random.expovariate(1 / 20)),
+                                   "retweet_count": int(self._random.expovariate(1 / 5)),
+                                   "reply_count": int(self._random.expovariate(1 / 3))},
+                "has_media": self._random.random() < media_rate,
+                "author": self._random.choice(self.users),
+            }
+
+    def _rate_limited(self, name: str) -> bool:
+        self.calls[name] += 1
+        if self._random.random() < self.rate_limit_rate:
+            self.rate_limited[name] += 1
+            return True
+        return False
+
+    def _wait_sync(self):
+        # Tweepy calls run in worker threads, which cannot await the clock
+        if isinstance(self.clock, SimulatedClock):
+            self.clock.advance(self.latency)
+        else:
+            time.sleep(self.latency)
+
+    def search(self, query: str, product: str, count: int) -> List[Dict[str, Any]]:
+        """Tweets containing any word of the query, by engagement ("Top") or date."""
+        words = {word.lower() for word in query.split() if not word.startswith("-")}
+        matches = [t for t in self.tweets.values() if words.intersection(t["text"].split())]
+        if product == "Latest":
+            matches.sort(key=lambda t: t["created_at"], reverse=True)
+        else:
+            matches.sort(key=lambda t: sum(t["public_metrics"].values()), reverse=True)
+        return matches[:count]
+
+    def twikit_client(self) -> "FakeTwikitClient":
+        return FakeTwikitClient(self)
+
+    def tweepy_client(self) -> "FakeTweepyClient":
+        return FakeTweepyClient(self)
+
+
+class FakeTwikitClient:
+    """Stands in for twikit.Client"""
+
+    def __init__(self, backend: FakeTwitterBackend):
+        self.backend = backend
+
+    def load_cookies(self, path: str):
+        pass
+
+    def save_cookies(self, path: str):
+        pass
+
+    async def login(self, **kwargs):
+        await self.backend.clock.sleep(self.backend.latency)
+
+    async def search_tweet(self, query: str, product: str, count: int = 20) -> List[SimpleNamespace]:
+        await self.backend.clock.sleep(self.backend.latency)
+        if self.backend._rate_limited("search_tweet"):
+            raise FakeRateLimitError("Rate limit exceeded (fake backend)")
+        return [self._to_twikit(t) for t in self.backend.search(query, product, count)]
+
+    @staticmethod
+    def _to_twikit(tweet: Dict[str, Any]) -> SimpleNamespace:
+        author = tweet["author"]
+        user = SimpleNamespace(
+            id=author["id"], name=author["name"], screen_name=author["username"],
+            description=author["description"], verified=author["verified"],
+            followers_count=author["public_metrics"]["followers_count"],
+            following_count=author["public_metrics"]["following_count"]
+        )
+        metrics = tweet["public_metrics"]
+        return SimpleNamespace(
+            id=tweet["id"], text=tweet["text"], created_at_datetime=tweet["created_at"], lang=tweet["lang"],
+            favorite_count=metrics["like_count"], retweet_count=metrics["retweet_count"],
+            reply_count=metrics["reply_count"], media=[{"type": "photo"}] if tweet["has_media"] else None,
+            quote=None, retweeted_tweet=None, user=user
+        )
+
+
+class FakeTweepyClient:
+    """Stands in for tweepy.Client"""
+
+    def __init__(self, backend: FakeTwitterBackend):
+        self.backend = backend
+
+    def _check_rate_limit(self, name: str):
+        self.backend._wait_sync()
+        if self.backend._rate_limited(name):
+            raise FakeRateLimitError("429 Too Many Requests (fake backend)")
+
+    def get_tweets(self, ids: List[str], expansions=None, tweet_fields=None, user_fields=None) -> SimpleNamespace:
+        self._check_rate_limit("get_tweets")
+        data, users = [], {}
+        for tweet_id in ids:
+            tweet = self.backend.tweets.get(str(tweet_id))
+            if tweet is None:
+                continue
+            author = tweet["author"]
+            users[author["id"]] = author
+            data.append(SimpleNamespace(
+                id=tweet["id"], text=tweet["text"], created_at=tweet["created_at"], lang=tweet["lang"],
+                public_metrics=tweet["public_metrics"], author_id=author["id"], referenced_tweets=None,
+                attachments={"media_keys": [f"media_{tweet['id']}"]} if tweet["has_media"] else None
+            ))
+        return SimpleNamespace(data=data or None, includes={"users": list(users.values())}, errors=[], meta={})
+
+    def create_tweet(self, text: str, in_reply_to_tweet_id: Optional[str] = None) -> SimpleNamespace:
+        self._check_rate_limit("create_tweet")
+        reply_id = str(2 * 10 ** 18 + len(self.backend.replies))
+        self.backend.replies.append({"id": reply_id, "in_reply_to_tweet_id": str(in_reply_to_tweet_id), "text": text})
+        return SimpleNamespace(data={"id": reply_id, "text": text}, includes={}, errors=[], meta={})
@@ -1,26 +1,26 @@
 import asyncio
 import os
 import sys
-from datetime import datetime, timedelta
-from typing import Dict, Any
-from dotenv import load_dotenv
+from datetime import datetime
+from typing import Dict, Any, List, Optional
 
 # Adjust Python path for your local environment
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(__file__))))
 
-# Load environment variables
-load_dotenv()
-
-# External imports
-import tweepy
-
-# Twikit imports for searching
-from twikit import Client as TwikitClient, TwitterException as TwikitException
+# Tweepy and Twikit are imported where a real client is created, so the fake
+# backend and the helper modules do not pay for them
 
 # -------------------------------------------------------------------------
 # LLM Processor (your existing module)
 # -------------------------------------------------------------------------
-from core.llm_processor import LLMProcessor
+from core.llm_processor import LLMProcessor, load_environment
+from core.clock import Clock
+from examples.twitter_agent.tweet_store import TweetStore
+from examples.twitter_agent.rate_limiter import ReplyRateLimiter
+from examples.twitter_agent.reply_queue import ReplyQueue
+from examples.twitter_agent.tweet_cache import TweetCache
+from examples.twitter_agent.candidates import CandidatePool, goal_keywords
+from examples.twitter_agent.fake_backend import FakeRateLimitError, FakeTwitterBackend
 
 # -------------------------------------------------------------------------
 # Custom Exceptions & Mock Classes
@@ -69,6 +69,8 @@ class MockTweet:
         else:
             self.user = None
 
+TWEET_LOOKUP_BATCH = 100  # most IDs Twitter accepts in one tweet lookup
+
 # -------------------------------------------------------------------------
 # Tweepy-based Wrapper (for replying & get_tweet_by_id)
 # -------------------------------------------------------------------------
@@ -78,7 +80,14 @@ class TwitterAPIWrapper:
     Searching is commented out (intentionally) to save Tweepy credits.
     """
 
-    def __init__(self):
+    def __init__(self, cache: Optional[TweetCache] = None, client: Optional[Any] = None):
+        self.cache = cache or TweetCache()
+        if client is not None:
+            # E.g. the fake backend's client for offline runs
+            self.client = client
+            return
+        import tweepy
+
         # Load credentials
         api_key = os.getenv("TWITTER_API_KEY", "")
         api_secret = os.getenv("TWITTER_API_SECRET", "")
@@ -98,85 +107,118 @@ class TwitterAPIWrapper:
             raise TwitterAPIException(f"Error initializing Tweepy client: {e}")
 
     async def get_tweet_by_id(self, tweet_id: str):
-        """Fetch a single tweet by ID using Tweepy."""
-        print(f"[DEBUG] get_tweet_by_id (Tweepy): Attempting to retrieve tweet {tweet_id}")
-        try:
-            response = self.client.get_tweet(
-                id=tweet_id,
-                expansions=[
-                    "author_id",
-                    "attachments.media_keys",
-                    "referenced_tweets.id",
-                    "referenced_tweets.id.author_id"
-                ],
-                tweet_fields=[
-                    "id", "text", "created_at", "lang", "public_metrics", "referenced_tweets"
-                ],
-                user_fields=[
-                    "id", "name", "username", "description", "public_metrics", "verified"
-                ]
-            )
-            print(f"[DEBUG] Raw response for tweet {tweet_id}: {response}")
+        """Fetch a single tweet by ID, from the cache when possible."""
+        tweets = await self.get_tweets_by_ids([tweet_id])
+        return tweets.get(str(tweet_id))
+
+    async def get_tweets_by_ids(self, tweet_ids: List[str]) -> Dict[str, MockTweet]:
+        """
+        Fetch tweets by ID. Cached tweets are served locally; the rest are fetched
+        with Tweepy in requests of up to TWEET_LOOKUP_BATCH IDs. Missing tweets are
+        absent from the result.
+        """
+        tweets: Dict[str, MockTweet] = {}
+        missing = []
+        for tweet_id in dict.fromkeys(str(tweet_id) for tweet_id in tweet_ids):
+            cached = self.cache.get(tweet_id)
+            if cached is not None:
+                tweets[tweet_id] = cached
+            else:
+                missing.append(tweet_id)
+
+        for start in range(0, len(missing), TWEET_LOOKUP_BATCH):
+            batch = missing[start:start + TWEET_LOOKUP_BATCH]
+            print(f"[DEBUG] get_tweets_by_ids (Tweepy): Attempting to retrieve tweets {batch}")
+            try:
+                response = await asyncio.to_thread(
+                    self.client.get_tweets,
+                    ids=batch,
+                    expansions=[
+                        "author_id",
+                        "attachments.media_keys",
+                        "referenced_tweets.id",
+                        "referenced_tweets.id.author_id"
+                    ],
+                    tweet_fields=[
+                        "id", "text", "created_at", "lang", "public_metrics", "referenced_tweets"
+                    ],
+                    user_fields=[
+                        "id", "name", "username", "description", "public_metrics", "verified"
+                    ]
+                )
+            except Exception as e:
+                print(f"[DEBUG] Exception in get_tweets_by_ids for tweets {batch}: {e}")
+                raise TwitterAPIException(f"Error getting tweets by ID: {e}") from e
 
             if not response or not response.data:
-                print(f"[DEBUG] No data found for tweet {tweet_id}")
-                return None
+                print(f"[DEBUG] No data found for tweets {batch}")
+                continue
 
-            tweet_obj = response.data
+            # Lookup maps are built once per response, not once per tweet
             includes = response.includes if response.includes else {}
             ref_tweets_map = {tw.id: tw for tw in includes.get("tweets", [])}
             users = {u["id"]: u for u in includes.get("users", [])}
+            for tweet_obj in response.data:
+                tweet = self._parse_tweet(tweet_obj, ref_tweets_map, users)
+                self.cache.put(tweet)
+                tweets[tweet.id] = tweet
+        return tweets
+
+    @staticmethod
+    def _parse_tweet(tweet_obj, ref_tweets_map: Dict[Any, Any], users: Dict[Any, Any]) -> MockTweet:
+        # Check media in main tweet
+        main_tweet_has_media = False
+        if tweet_obj.attachments and "media_keys" in tweet_obj.attachments:
+            if len(tweet_obj.attachments["media_keys"]) > 0:
+                main_tweet_has_media = True
+
+        # Check media in references
+        referenced_has_media = False
+        if tweet_obj.referenced_tweets:
+            for ref in tweet_obj.referenced_tweets:
+                ref_tweet = ref_tweets_map.get(ref.id)
+                if ref_tweet and ref_tweet.attachments:
+                    if "media_keys" in ref_tweet.attachments and len(ref_tweet.attachments["media_keys"]) > 0:
+                        referenced_has_media = True
+                        break
+
+        media_in_tweet = main_tweet_has_media or referenced_has_media
+
+        tweet_data = {
+            "id": tweet_obj.id,
+            "text": tweet_obj.text,
+            "created_at": tweet_obj.created_at,
+            "lang": tweet_obj.lang,
+            "public_metrics": tweet_obj.public_metrics,
+        }
 
-            # Check media in main tweet
-            main_tweet_has_media = False
-            if tweet_obj.attachments and "media_keys" in tweet_obj.attachments:
-                if len(tweet_obj.attachments["media_keys"]) > 0:
-                    main_tweet_has_media = True
-
-            # Check media in references
-            referenced_has_media = False
-            if tweet_obj.referenced_tweets:
-                for ref in tweet_obj.referenced_tweets:
-                    ref_tweet = ref_tweets_map.get(ref.id)
-                    if ref_tweet and ref_tweet.attachments:
-                        if "media_keys" in ref_tweet.attachments and len(ref_tweet.attachments["media_keys"]) > 0:
-                            referenced_has_media = True
-                            break
-
-            media_in_tweet = main_tweet_has_media or referenced_has_media
-
-            tweet_data = {
-                "id": tweet_obj.id,
-                "text": tweet_obj.text,
-                "created_at": tweet_obj.created_at,
-                "lang": tweet_obj.lang,
-                "public_metrics": tweet_obj.public_metrics,
-            }
-
-            if tweet_obj.referenced_tweets:
-                print(f"[DEBUG] Tweet references another tweet: {tweet_obj.referenced_tweets}")
-
-            author_id = tweet_obj.author_id
-            user_data = users.get(author_id) if author_id else None
+        author_id = tweet_obj.author_id
+        user_data = users.get(author_id) if author_id else None
 
-            return MockTweet(tweet_data, user_data, media_in_tweet)
-
-        except Exception as e:
-            print(f"[DEBUG] Exception in get_tweet_by_id for tweet {tweet_id}: {e}")
-            raise TwitterAPIException(f"Error getting tweet by ID: {e}")
+        return MockTweet(tweet_data, user_data, media_in_tweet)
 
     async def reply_to_tweet(self, tweet_id: str, text: str) -> str:
         """Posts a reply using Tweepy. Returns the new tweet's ID as a string."""
         try:
             print(f"[DEBUG] reply_to_tweet (Tweepy): Attempting to reply to {tweet_id} with text: {text}")
-            resp = self.client.create_tweet(text=text, in_reply_to_tweet_id=tweet_id)
+            resp = await asyncio.to_thread(self.client.create_tweet, text=text, in_reply_to_tweet_id=tweet_id)
             print(f"[DEBUG] Raw response from create_tweet: {resp}")
             if not resp or not resp.data:
                 raise TwitterAPIException("No response from Twitter when creating tweet.")
             new_tweet_id = resp.data.get("id")
             return str(new_tweet_id)
         except Exception as e:
-            raise TwitterAPIException(f"Error posting reply: {e}")
+            raise TwitterAPIException(f"Error posting reply: {e}") from e
+
+def is_transient_error(error: Exception) -> bool:
+    """Whether a failed Tweepy call is worth retrying (rate limits, server and network errors)."""
+    cause = error.__cause__ or error
+    if isinstance(cause, (FakeRateLimitError, OSError)):
+        return True
+    # Tweepy errors only occur once the real client has imported Tweepy
+    tweepy = sys.modules.get("tweepy")
+    return tweepy is not None and isinstance(cause, (tweepy.errors.TooManyRequests,
+                                                     tweepy.errors.TwitterServerError))
 
 # -------------------------------------------------------------------------
 # Twikit-based client for searching tweets
@@ -187,8 +229,16 @@ class TwikitSearchClient:
     We'll do an async login with .initialize().
     """
 
-    def __init__(self):
-        self.client = TwikitClient(language='en-US')
+    def __init__(self, client: Optional[Any] = None, errors: Any = Exception):
+        """
+        client: E.g. the fake backend's client for offline runs (default: a Twikit client).
+        errors: Exception type(s) the given client raises.
+        """
+        if client is None:
+            from twikit import Client as TwikitClient, TwitterException
+            client, errors = TwikitClient(language='en-US'), TwitterException
+        self.client = client
+        self.errors = errors
         self._initialized = False
         self.cookies_file = 'cookies.json'  # Add cookies file path
 
@@ -217,7 +267,7 @@ class TwikitSearchClient:
             print("[TWIKIT] Successfully logged in and saved cookies.")
             self._initialized = True
 
-        except TwikitException as e:
+        except self.errors as e:
             print(f"[TWIKIT] Login/cookie error: {e}")
             # Delete potentially corrupted cookie file
             if os.path.exists(self.cookies_file):
@@ -240,7 +290,11 @@ class TwikitSearchClient:
             raw_results = await self.client.search_tweet(query, product, count=count)
             tweets_list = []
             for t in raw_results:
-                has_media = bool(t.media)
+                # Quoted or retweeted media counts too, as in the Tweepy lookup
+                has_media = bool(t.media) or any(
+                    ref is not None and bool(ref.media)
+                    for ref in (getattr(t, "quote", None), getattr(t, "retweeted_tweet", None))
+                )
 
                 tweet_data = {
                     "id": t.id,
@@ -267,75 +321,22 @@ class TwikitSearchClient:
                 tweets_list.append(MockTweet(tweet_data, user_data, has_media))
             return tweets_list
 
-        except TwikitException as e:
+        except self.errors as e:
             raise TwitterAPIException(f"Error searching tweets (Twikit): {e}")
 
 # -------------------------------------------------------------------------
 # Tweet Tracking & Rate-Limit Logic
 # -------------------------------------------------------------------------
+TWEET_STORE_FILE = 'tweets.db'
+# Legacy text files, imported into the tweet store on first start
 REPLIED_TWEETS_FILE = 'replied_tweets.txt'
 SEEN_TWEETS_FILE = 'seen_tweets.txt'
-REPLY_COUNT_FILE = 'reply_count.txt'
-LAST_RESET_FILE = 'last_reset.txt'
+REPLY_LIMITER_FILE = 'reply_limiter.json'
 MAX_REPLIES = 49
 RESET_HOURS = 24
-
-async def load_tweet_ids(filename: str) -> set:
-    """Load tweet IDs from a file into a set."""
-    try:
-        with open(filename, 'r') as f:
-            return set(line.strip() for line in f if line.strip())
-    except FileNotFoundError:
-        return set()
-
-async def save_tweet_id(filename: str, tweet_id: str):
-    """Append a tweet ID to a file."""
-    with open(filename, 'a') as f:
-        f.write(f"{tweet_id}\n")
-
-async def get_reply_count() -> int:
-    """Get current reply count and reset if needed."""
-    try:
-        # Check last reset time
-        try:
-            with open(LAST_RESET_FILE, 'r') as f:
-                last_reset = datetime.fromisoformat(f.read().strip())
-        except (FileNotFoundError, ValueError):
-            last_reset = datetime.now()
-            with open(LAST_RESET_FILE, 'w') as f:
-                f.write(last_reset.isoformat())
-
-        # If it's been more than RESET_HOURS since last reset, reset
-        if (datetime.now() - last_reset).total_seconds() >= RESET_HOURS * 3600:
-            with open(REPLY_COUNT_FILE, 'w') as f:
-                f.write('0')
-            with open(LAST_RESET_FILE, 'w') as f:
-                f.write(datetime.now().isoformat())
-            return 0
-
-        with open(REPLY_COUNT_FILE, 'r') as f:
-            return int(f.read().strip())
-    except (FileNotFoundError, ValueError):
-        with open(REPLY_COUNT_FILE, 'w') as f:
-            f.write('0')
-        return 0
-
-async def increment_reply_count():
-    """Increment the reply count by 1."""
-    count = await get_reply_count()
-    with open(REPLY_COUNT_FILE, 'w') as f:
-        f.write(str(count + 1))
-
-async def should_sleep() -> tuple[bool, float]:
-    """Check if we need to sleep (rate-limiting)."""
-    count = await get_reply_count()
-    if count >= MAX_REPLIES:
-        with open(LAST_RESET_FILE, 'r') as f:
-            last_reset = datetime.fromisoformat(f.read().strip())
-        next_reset = last_reset + timedelta(hours=RESET_HOURS)
-        sleep_seconds = (next_reset - datetime.now()).total_seconds()
-        return True, max(0, sleep_seconds)
-    return False, 0
+REPLY_BURST = 5  # replies that may be sent back to back
+SEARCH_CONCURRENCY = 3  # Twikit queries run at once by a multi-query search
+SHUTDOWN_DRAIN_SECONDS = 120  # how long main() waits for queued replies before dropping them
 
 def _datetime_to_str(dt):
     """Convert a datetime to ISO-format string or leave it alone if not datetime."""
@@ -346,83 +347,135 @@ def _datetime_to_str(dt):
 # -------------------------------------------------------------------------
 # Twikit-based tweet_search function
 # -------------------------------------------------------------------------
-async def tweet_search(params: Dict[str, Any], processor: LLMProcessor = None) -> Dict[str, Any]:
-    """Use Twikit for searching tweets based on the provided query, skipping any with media."""
-    count = params.get("count", 5)
-    query = params.get("query", "AI agents")  # Default to "AI agents" if no query provided
-    try:
-        replied_tweets = await load_tweet_ids(REPLIED_TWEETS_FILE)
-        seen_tweets = await load_tweet_ids(SEEN_TWEETS_FILE)
-
-        # Twikit-based search
-        twikit_results = await processor.twikit_search_client.search_tweet_twiki(
-            query,
-            "Top",
-            count=count * 2
-        )
-
-        tweet_data = []
-        for t in twikit_results:
-            # Skip if tweet has media or is already seen/replied
-            if t.id in replied_tweets or t.id in seen_tweets or len(t.media) > 0:
-                continue
-
-            created_str = _datetime_to_str(t.created_at)
-
-            tweet_info = {
-                "id": t.id,
-                "author": {
-                    "id": t.user.id if t.user else None,
-                    "name": t.user.name if t.user else None,
-                    "screen_name": t.user.screen_name if t.user else None,
-                    "description": t.user.description if t.user else None,
-                    "followers_count": t.user.followers_count if t.user else 0,
-                    "following_count": t.user.following_count if t.user else 0,
-                    "verified": t.user.verified if t.user else False,
-                    "is_blue_verified": t.user.is_blue_verified if t.user else False
-                },
-                "text": t.text,
-                "created_at": created_str,
-                "favorite_count": t.favorite_count,
-                "retweet_count": t.retweet_count,
-                "reply_count": t.reply_count,
-                "lang": t.lang,
-                "is_quote_status": t.is_quote_status,
-                "has_media": (len(t.media) > 0)
-            }
-            tweet_data.append(tweet_info)
+def _tweet_to_dict(t) -> Dict[str, Any]:
+    """Tweet as returned to the agent."""
+    return {
+        "id": t.id,
+        "author": {
+            "id": t.user.id if t.user else None,
+            "name": t.user.name if t.user else None,
+            "screen_name": t.user.screen_name if t.user else None,
+            "description": t.user.description if t.user else None,
+            "followers_count": t.user.followers_count if t.user else 0,
+            "following_count": t.user.following_count if t.user else 0,
+            "verified": t.user.verified if t.user else False,
+            "is_blue_verified": t.user.is_blue_verified if t.user else False
+        },
+        "text": t.text,
+        "created_at": _datetime_to_str(t.created_at),
+        "favorite_count": t.favorite_count,
+        "retweet_count": t.retweet_count,
+        "reply_count": t.reply_count,
+        "lang": t.lang,
+        "is_quote_status": t.is_quote_status,
+        "has_media": (len(t.media) > 0)
+    }
 
-            # Mark tweet as seen
-            await save_tweet_id(SEEN_TWEETS_FILE, t.id)
+async def _search_queries(processor: LLMProcessor, queries: List[str], count: int) -> List[Any]:
+    """Run the queries concurrently, at most SEARCH_CONCURRENCY at a time. Failed queries yield their exception."""
+    semaphore = asyncio.Semaphore(SEARCH_CONCURRENCY)
+
+    async def search(query: str):
+        async with semaphore:
+            return await processor.twikit_search_client.search_tweet_twiki(query, "Top", count=count * 2)
+
+    outcomes = await asyncio.gather(*(search(query) for query in queries), return_exceptions=True)
+    for outcome in outcomes:
+        if isinstance(outcome, Exception) and not isinstance(outcome, TwitterAPIException):
+            raise outcome
+    return outcomes
+
+def _reply_status(processor: LLMProcessor) -> Dict[str, Any]:
+    """Reply slots not claimed by queued replies, plus replies that failed since the last tool result."""
+    status = {"reply_slots": processor.reply_limiter.status(reserved=processor.reply_queue.pending)}
+    failures = processor.reply_queue.take_failures()
+    if failures:
+        status["failed_replies"] = failures
+    return status
+
+async def _top_candidates(processor: LLMProcessor, count: int) -> List[Dict[str, Any]]:
+    """Best candidates from the pool as tweet dicts with their score; marks them as seen."""
+    tweet_data = [
+        {**_tweet_to_dict(t), "score": round(score, 2)}
+        for score, t in processor.candidate_pool.top(count)
+    ]
+    await processor.tweet_store.add("seen", [tweet["id"] for tweet in tweet_data])
+    return tweet_data
 
-            # Stop if we've collected enough
-            if len(tweet_data) >= count:
-                break
+async def tweet_search(params: Dict[str, Any], processor: LLMProcessor = None) -> Dict[str, Any]:
+    """
+    Use Twikit for searching tweets based on the provided query, skipping any with media.
+    With "queries", all queries run concurrently and their results are merged and
+    deduplicated by tweet ID. New tweets join the candidate pool, and the best
+    candidates of the pool are returned.
+    """
+    count = params.get("count", 5)
+    # Default to "AI agents" if no query provided
+    queries = list(dict.fromkeys(params.get("queries") or [params.get("query", "AI agents")]))
+    outcomes = await _search_queries(processor, queries, count)
 
-        return {
-            "status": "success",
-            "tweets": tweet_data,
-            "message": f"Found {len(tweet_data)} new tweets (excluding previously seen, replied, and media tweets)"
-        }
-    except TwitterAPIException as e:
+    failed_queries = {query: str(outcome) for query, outcome in zip(queries, outcomes)
+                      if isinstance(outcome, Exception)}
+    if len(failed_queries) == len(queries):
         return {
             "status": "error",
-            "message": f"Error searching tweets: {str(e)}"
+            "message": f"Error searching tweets: {'; '.join(failed_queries.values())}"
         }
 
+    # Merge results of all queries, remembering which queries found each tweet
+    tweets: Dict[str, Any] = {}
+    matched_queries: Dict[str, List[str]] = {}
+    for query, outcome in zip(queries, outcomes):
+        if isinstance(outcome, Exception):
+            continue
+        for t in outcome:
+            tweets.setdefault(t.id, t)
+            matched_queries.setdefault(t.id, []).append(query)
+
+    # Replies to these tweets can skip the Tweepy lookup
+    processor.twitter_client.cache.put_many(tweets.values())
+
+    # One batched lookup for all results instead of per-tweet checks
+    result_ids = list(tweets)
+    known_ids = (await processor.tweet_store.contains("replied", result_ids)
+                 | await processor.tweet_store.contains("seen", result_ids))
+
+    # Skip if tweet has media or is already seen/replied/pooled
+    new_tweets = [t for t in tweets.values()
+                  if t.id not in known_ids and t.id not in processor.candidate_pool and len(t.media) == 0]
+    processor.candidate_pool.add(new_tweets, {tweet_id: len(q) for tweet_id, q in matched_queries.items()})
+
+    tweet_data = await _top_candidates(processor, count)
+    result = {
+        "status": "success",
+        "tweets": tweet_data,
+        "message": (f"Found {len(new_tweets)} new tweets (excluding previously seen, replied, and media tweets); "
+                    f"showing the top {len(tweet_data)} of {len(processor.candidate_pool)} candidates"),
+        **_reply_status(processor)
+    }
+    if failed_queries:
+        result["failed_queries"] = failed_queries
+    return result
+
+async def list_candidates(params: Dict[str, Any], processor: LLMProcessor = None) -> Dict[str, Any]:
+    """Show the best reply candidates collected by earlier searches, without searching."""
+    count = params.get("count", 5)
+    tweet_data = await _top_candidates(processor, count)
+    return {
+        "status": "success",
+        "tweets": tweet_data,
+        "message": f"Top {len(tweet_data)} of {len(processor.candidate_pool)} candidates",
+        **_reply_status(processor)
+    }
+
 # -------------------------------------------------------------------------
 # tweet_reply function (using Tweepy)
 # -------------------------------------------------------------------------
 async def tweet_reply(params: Dict[str, Any], processor: LLMProcessor = None) -> Dict[str, Any]:
-    """Reply to a tweet using Tweepy, skipping if it has media."""
-    should_sleep_now, sleep_seconds = await should_sleep()
-    if should_sleep_now:
-        hours = sleep_seconds / 3600
-        return {
-            "status": "rate_limit",
-            "message": f"Reached maximum replies ({MAX_REPLIES}). Sleeping for {hours:.1f} hours."
-        }
-
+    """
+    Queue a reply to a tweet, skipping if it has media.
+    The reply queue posts it in the background at the allowed pace.
+    """
     tweet_id = params.get("tweet_id")
     text = params.get("text", "")
     print(f"[DEBUG] tweet_reply called with tweet_id={tweet_id} and text={text}")
@@ -443,17 +496,17 @@ async def tweet_reply(params: Dict[str, Any], processor: LLMProcessor = None) ->
                 "message": f"Tweet {tweet_id} (or references) has media. Skipping reply."
             }
 
-        # Post reply (Tweepy)
-        reply_id = await processor.twitter_client.reply_to_tweet(tweet.id, text)
-        await save_tweet_id(REPLIED_TWEETS_FILE, tweet_id)
-        await increment_reply_count()
-        await asyncio.sleep(30)  # Sleep 30s after replying
-
-        return {
-            "status": "success",
-            "message": f"Reply posted: {reply_id}",
-            "tweet_id": reply_id
-        }
+        # Hand the reply to the outbound queue (posted via Tweepy by its worker)
+        # Recorded first so the tweet is not offered again while the reply waits, and
+        # so a reply failing right away is not marked replied after it was re-offered
+        await processor.tweet_store.add("replied", [tweet_id])
+        result = processor.reply_queue.enqueue(tweet.id, text)
+        if result["status"] == "queued":
+            processor.candidate_pool.remove(tweet_id)
+        else:
+            await processor.tweet_store.remove("replied", [tweet_id])
+        result.update(_reply_status(processor))
+        return result
     except TwitterAPIException as e:
         return {
             "status": "error",
@@ -464,9 +517,9 @@ async def tweet_reply(params: Dict[str, Any], processor: LLMProcessor = None) ->
 # sleep function
 # -------------------------------------------------------------------------
 async def sleep(params: Dict[str, Any], processor: LLMProcessor = None) -> Dict[str, Any]:
-    """Wait for specified number of seconds (real sleep)."""
+    """Wait for specified number of seconds on the processor's clock."""
     seconds = params.get("seconds", 10)
-    await asyncio.sleep(seconds)
+    await processor.clock.sleep(seconds)
     return {
         "status": "success",
         "message": f"Slept for {seconds} seconds"
@@ -475,11 +528,18 @@ async def sleep(params: Dict[str, Any], processor: LLMProcessor = None) -> Dict[
 # -------------------------------------------------------------------------
 # Processor Initialization (ensures Twikit & Tweepy are ready)
 # -------------------------------------------------------------------------
-async def initialize_processor():
+async def initialize_processor(clock: Optional[Clock] = None, backend: Optional[FakeTwitterBackend] = None,
+                               data_dir: str = '.'):
     """
     Create the LLMProcessor, attach the TwitterAPIWrapper for replies,
     attach TwikitSearchClient for searching, then initialize Twikit client.
+
+    Pass a SimulatedClock to run sleeps, cool-downs and the daily reset window
+    on virtual time. Pass a FakeTwitterBackend to run against a local synthetic
+    corpus instead of Twitter, and a data_dir to keep the tweet store and the
+    limiter checkpoint of such runs apart from the real ones.
     """
+    load_environment()
     current_dir = os.path.dirname(os.path.abspath(__file__))
     config_dir = os.path.join(current_dir, 'config')
 
@@ -489,20 +549,69 @@ async def initialize_processor():
         model_type="openai",
         model_name="gpt-4o-mini",
         ui_visibility=True,
+        session_name="twitter_agent",
         history_size=10,
         summary_interval=7,
-        summary_window=15
+        summary_window=15,
+        goal_compression="llm",
+        llm_timeouts={"decision": 60, "best_practices": 120, "goal_compression": 120},
+        step_deadline=1200,
+        pipelined=True,
+        clock=clock
     )
 
-    # 1. Tweepy-based for replies:
-    proc.twitter_client = TwitterAPIWrapper()
+    # 1. Tweepy-based for replies, with a cache filled by searches:
+    proc.twitter_client = TwitterAPIWrapper(
+        cache=TweetCache(ttl=900, clock=proc.clock),
+        client=backend.tweepy_client() if backend else None
+    )
 
     # 2. Twikit-based for searching:
-    twikit_client = TwikitSearchClient()
+    if backend:
+        twikit_client = TwikitSearchClient(client=backend.twikit_client(), errors=FakeRateLimitError)
+    else:
+        twikit_client = TwikitSearchClient()
     await twikit_client.initialize()
     proc.twikit_search_client = twikit_client
 
-    # 3. Register functions
+    # 3. Seen/replied tweet IDs, shared by all agent processes using the same file
+    proc.tweet_store = TweetStore(
+        os.path.join(data_dir, TWEET_STORE_FILE),
+        legacy_files={"seen": os.path.join(data_dir, SEEN_TWEETS_FILE),
+                      "replied": os.path.join(data_dir, REPLIED_TWEETS_FILE)}
+    )
+
+    # 4. Reply rate limit, spread evenly over the day
+    proc.reply_limiter = ReplyRateLimiter(
+        max_replies=MAX_REPLIES,
+        period=RESET_HOURS * 3600,
+        burst=REPLY_BURST,
+        clock=proc.clock,
+        checkpoint_file=os.path.join(data_dir, REPLY_LIMITER_FILE)
+    )
+
+    # 5. Outbound replies, posted in the background with a 30s cool-down
+    async def reoffer_failed_reply(reply):
+        # The tweet was marked replied when queued; make it available again
+        # (also called for replies dropped unsent at shutdown)
+        await proc.tweet_store.remove("replied", [reply.tweet_id])
+        tweet = proc.twitter_client.cache.get(reply.tweet_id)
+        if tweet is not None:
+            proc.candidate_pool.add([tweet])
+
+    proc.reply_queue = ReplyQueue(
+        proc.twitter_client.reply_to_tweet,
+        proc.reply_limiter,
+        clock=proc.clock,
+        cooldown=30,
+        is_transient=is_transient_error,
+        on_failure=reoffer_failed_reply
+    )
+
+    # 6. Reply candidates kept across steps, ranked against the knowledge base topics
+    proc.candidate_pool = CandidatePool(goal_keywords(proc.goal), clock=proc.clock)
+
+    # 7. Register functions
     async def wrapped_search(params):
         return await tweet_search(params, processor=proc)
 
@@ -512,9 +621,13 @@ async def initialize_processor():
     async def wrapped_sleep(params):
         return await sleep(params, processor=proc)
 
+    async def wrapped_list_candidates(params):
+        return await list_candidates(params, processor=proc)
+
     proc.register_function("tweet_search", wrapped_search)
     proc.register_function("tweet_reply", wrapped_reply)
     proc.register_function("sleep", wrapped_sleep)
+    proc.register_function("list_candidates", wrapped_list_candidates)
 
     return proc
 
@@ -522,10 +635,17 @@ async def initialize_processor():
 # Main (Entry Point)
 # -------------------------------------------------------------------------
 async def main():
-    processor = await initialize_processor()
+    if os.getenv("TWITTER_BACKEND") == "fake":
+        # Offline run: synthetic tweets, separate state files
+        os.makedirs('fake_backend_data', exist_ok=True)
+        processor = await initialize_processor(backend=FakeTwitterBackend(), data_dir='fake_backend_data')
+    else:
+        processor = await initialize_processor()
 
     # Just 20 steps of "action → execution"
     for step in range(20):
+        if processor.stopped:
+            break
         response = await processor.get_next_action()
         action = response["action"]
         cmd_id = action["command_id"]
@@ -533,10 +653,19 @@ async def main():
         reasoning = response["analysis"].get("reasoning", "no reasoning")
 
         # Execute the chosen command
-        res = await processor.execute_command(cmd_id, params, context=reasoning)
+        res = await processor.execute_command(cmd_id, params, context=reasoning,
+                                              expected_outcome=action.get("expected_outcome"))
         print(f"--- Step {step + 1} result ---")
         print(res)
 
+    # Give queued replies a chance to go out; the rest are dropped and their tweets unmarked
+    try:
+        await asyncio.wait_for(processor.reply_queue.join(), timeout=SHUTDOWN_DRAIN_SECONDS)
+    except asyncio.TimeoutError:
+        print(f"[DEBUG] {processor.reply_queue.pending} replies still queued after {SHUTDOWN_DRAIN_SECONDS}s")
+    await processor.reply_queue.close()
+    processor.tweet_store.close()
+    processor.reply_limiter.close()
     print("Agent finished working.")
 
 if __name__ == "__main__":
@@ -0,0 +1,99 @@
+import json
+import os
+from datetime import datetime, timedelta
+from typing import Any, Dict, Optional
+
+from core.clock import Clock, SystemClock
+
+
+class ReplyRateLimiter:
+    """
+    Token bucket for outgoing replies, held in memory.
+
+    The bucket refills continuously at max_replies per period, so replies are
+    spread over the day instead of being spent in one burst after a fixed
+    reset. The state is checkpointed to disk every checkpoint_interval seconds
+    (and on close), so a restart does not hand out a fresh bucket.
+    """
+
+    def __init__(self, max_replies: int = 49, period: float = 24 * 3600, burst: int = 5,
+                 clock: Optional[Clock] = None, checkpoint_file: Optional[str] = None,
+                 checkpoint_interval: float = 300):
+        """
+        max_replies: Replies allowed per period on average.
+        period: Length of the period in seconds.
+        burst: Most replies that can be sent back to back.
+        clock: Time source (default: the system clock).
+        checkpoint_file: JSON file the bucket is saved to and restored from.
+        checkpoint_interval: Seconds between checkpoints.
+        """
+        self.rate = max_replies / period  # tokens per second
+        self.burst = burst
+        self.clock = clock or SystemClock()
+        self.checkpoint_file = checkpoint_file
+        self.checkpoint_interval = checkpoint_interval
+        self.tokens = float(burst)
+        self.updated_at = self.clock.now()
+        self._last_checkpoint = self.clock.monotonic()
+        self._restore()
+
+    def _restore(self):
+        if not self.checkpoint_file:
+            return
+        try:
+            with open(self.checkpoint_file, 'r') as f:
+                data = json.load(f)
+            self.tokens = min(float(data["tokens"]), self.burst)
+            self.updated_at = datetime.fromisoformat(data["updated_at"])
+        except (FileNotFoundError, ValueError, KeyError):
+            pass
+
+    def checkpoint(self):
+        """Write the bucket state to the checkpoint file atomically."""
+        if not self.checkpoint_file:
+            return
+        self._refill()
+        tmp_path = f"{self.checkpoint_file}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({"tokens": self.tokens, "updated_at": self.updated_at.isoformat()}, f)
+        os.replace(tmp_path, self.checkpoint_file)
+        self._last_checkpoint = self.clock.monotonic()
+
+    def _refill(self):
+        now = self.clock.now()
+        elapsed = max(0.0, (now - self.updated_at).total_seconds())
+        self.tokens = min(self.burst, self.tokens + elapsed * self.rate)
+        self.updated_at = now
+
+    def seconds_until_available(self) -> float:
+        """Seconds until a reply can be sent, 0 if one can be sent now."""
+        self._refill()
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    def try_acquire(self) -> bool:
+        """Take a reply slot if one is available."""
+        if self.seconds_until_available() > 0:
+            return False
+        self.tokens -= 1
+        if self.clock.monotonic() - self._last_checkpoint >= self.checkpoint_interval:
+            self.checkpoint()
+        return True
+
+    def status(self, reserved: int = 0) -> Dict[str, Any]:
+        """
+        Available slots and when the next one opens, for tool results.
+        reserved: Slots already claimed, e.g. by replies waiting in a queue.
+        """
+        self._refill()
+        needed = reserved + 1
+        wait = 0.0 if self.tokens >= needed else (needed - self.tokens) / self.rate
+        return {
+            "available_replies": max(0, int(self.tokens) - reserved),
+            "next_slot_in_seconds": round(wait),
+            "next_slot_at": (self.updated_at + timedelta(seconds=wait)).isoformat(timespec="seconds")
+        }
+
+    def close(self):
+        self.checkpoint()
@@ -0,0 +1,179 @@
+import asyncio
+from dataclasses import dataclass, field
+from datetime import timedelta
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+from core.clock import Clock, SystemClock
+from examples.twitter_agent.rate_limiter import ReplyRateLimiter
+
+
+@dataclass
+class QueuedReply:
+    tweet_id: str
+    text: str
+    attempts: int = 0
+    result: Dict[str, Any] = field(default_factory=dict)
+
+
+class ReplyQueue:
+    """
+    Outbound queue for replies, drained by a background worker.
+
+    The worker sends one reply whenever the rate limiter has a slot, then keeps
+    a cool-down before the next one. Transient errors are retried with
+    exponential backoff. The agent loop never waits for any of this; replies
+    that are given up on, or dropped by close(), are handed to on_failure and
+    kept for take_failures().
+    """
+
+    def __init__(self, send: Callable[[str, str], Awaitable[str]], limiter: ReplyRateLimiter,
+                 clock: Optional[Clock] = None, cooldown: float = 30, max_pending: int = 10,
+                 max_attempts: int = 3, retry_delay: float = 60,
+                 is_transient: Callable[[Exception], bool] = lambda e: False,
+                 on_failure: Optional[Callable[[QueuedReply], Awaitable[None]]] = None):
+        """
+        send: Coroutine function posting a reply (tweet_id, text) and returning the new tweet ID.
+        limiter: Rate limiter that decides when the next reply may go out.
+        clock: Time source for waits (default: the system clock).
+        cooldown: Seconds between two sent replies.
+        max_pending: Replies that may wait in the queue at once.
+        max_attempts: Send attempts per reply before giving up.
+        retry_delay: Wait before the first retry; doubles with each further attempt.
+        is_transient: Whether a send error is worth retrying.
+        on_failure: Coroutine function called with a reply that could not be sent or was dropped.
+        """
+        self.send = send
+        self.limiter = limiter
+        self.clock = clock or SystemClock()
+        self.cooldown = cooldown
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.is_transient = is_transient
+        self.on_failure = on_failure
+        self._queue: "asyncio.Queue[QueuedReply]" = asyncio.Queue()
+        self._worker: Optional[asyncio.Task] = None
+        self._in_flight = 0
+        self._current: Optional[QueuedReply] = None  # reply the worker is delivering
+        self._sending = False  # whether that reply is being posted right now
+        self._next_send_not_before = 0.0  # clock.monotonic() value after the last cool-down
+        self.sent: List[QueuedReply] = []
+        self.failed: List[QueuedReply] = []
+        self._unreported: List[QueuedReply] = []
+
+    @property
+    def pending(self) -> int:
+        """Replies queued or being sent"""
+        return self._queue.qsize() + self._in_flight
+
+    def estimated_wait(self, position: int) -> float:
+        """Seconds until the reply at the given 1-based position is sent, assuming no errors."""
+        wait_for_slot = self.limiter.seconds_until_available()
+        tokens_short = max(0.0, position - max(self.limiter.tokens, 0.0))
+        wait_for_slot = max(wait_for_slot, tokens_short / self.limiter.rate)
+        wait_for_cooldown = max(0.0, self._next_send_not_before - self.clock.monotonic())
+        wait_for_cooldown += self.cooldown * (position - 1)
+        return max(wait_for_slot, wait_for_cooldown)
+
+    def enqueue(self, tweet_id: str, text: str) -> Dict[str, Any]:
+        """Queue a reply and return its position and estimated send time."""
+        if self.pending >= self.max_pending:
+            return {
+                "status": "queue_full",
+                "message": f"{self.pending} replies are already waiting to be sent. Search or sleep first."
+            }
+        if self._worker is None or self._worker.done():
+            self._worker = asyncio.ensure_future(self._run())
+        self._queue.put_nowait(QueuedReply(tweet_id, text))
+        position = self.pending
+        wait = self.estimated_wait(position)
+        return {
+            "status": "queued",
+            "message": f"Reply to {tweet_id} queued at position {position}",
+            "position": position,
+            "estimated_send_at": (self.clock.now() + timedelta(seconds=wait)).isoformat(timespec="seconds")
+        }
+
+    async def _run(self):
+        while True:
+            reply = await self._queue.get()
+            self._in_flight += 1
+            self._current = reply
+            try:
+                await self._deliver(reply)
+            finally:
+                self._current = None
+                self._in_flight -= 1
+                self._queue.task_done()
+
+    async def _deliver(self, reply: QueuedReply):
+        while True:
+            cooldown = self._next_send_not_before - self.clock.monotonic()
+            wait = max(self.limiter.seconds_until_available(), cooldown)
+            if wait > 0:
+                await self.clock.sleep(wait)
+                continue
+            reply.attempts += 1
+            self._sending = True
+            try:
+                reply_id = await self.send(reply.tweet_id, reply.text)
+            except Exception as e:
+                self._sending = False
+                if self.is_transient(e) and reply.attempts < self.max_attempts:
+                    print(f"[ReplyQueue] Transient error replying to {reply.tweet_id}, retrying: {e}")
+                    await self.clock.sleep(self.retry_delay * 2 ** (reply.attempts - 1))
+                    continue
+                print(f"[ReplyQueue] Giving up on reply to {reply.tweet_id}: {e}")
+                await self._fail(reply, str(e))
+                return
+            finally:
+                self._sending = False
+            self.limiter.try_acquire()
+            reply.result = {"status": "success", "tweet_id": reply_id}
+            self.sent.append(reply)
+            self._next_send_not_before = self.clock.monotonic() + self.cooldown
+            return
+
+    async def _fail(self, reply: QueuedReply, message: str):
+        reply.result = {"status": "error", "message": message}
+        self.failed.append(reply)
+        self._unreported.append(reply)
+        if self.on_failure is not None:
+            try:
+                await self.on_failure(reply)
+            except Exception as callback_error:
+                print(f"[ReplyQueue] Failure handler error for {reply.tweet_id}: {callback_error}")
+
+    def take_failures(self) -> Dict[str, str]:
+        """Replies given up on since the last call as tweet ID -> error, for reporting to the agent."""
+        failures = {reply.tweet_id: f"{reply.result['message']} (after {reply.attempts} attempts)"
+                    for reply in self._unreported}
+        self._unreported = []
+        return failures
+
+    async def join(self):
+        """Wait until every queued reply has been sent or given up on."""
+        await self._queue.join()
+
+    async def close(self):
+        """
+        Stop the worker. Replies not yet sent are dropped and handed to on_failure;
+        one being posted at that moment may have gone out and is left alone.
+        """
+        dropped = []
+        if self._worker is not None:
+            if self._current is not None and not self._sending:
+                dropped.append(self._current)
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+        while not self._queue.empty():
+            dropped.append(self._queue.get_nowait())
+            self._queue.task_done()
+        if dropped:
+            print(f"[ReplyQueue] Dropping {len(dropped)} unsent replies")
+        for reply in dropped:
+            await self._fail(reply, "Dropped unsent when the reply queue was closed")
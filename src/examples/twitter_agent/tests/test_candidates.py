@@ -0,0 +1,59 @@
+import os
+import sys
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+# Add src to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from core.clock import SimulatedClock
+from examples.twitter_agent.candidates import CandidatePool, goal_keywords
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def make_tweet(tweet_id, text="hello", author="alice", likes=0, age_hours=0.0, followers=100):
+    return SimpleNamespace(id=str(tweet_id), text=text, created_at=START - timedelta(hours=age_hours),
+                           favorite_count=likes, retweet_count=0, reply_count=0,
+                           user=SimpleNamespace(screen_name=author, followers_count=followers))
+
+
+def test_goal_keywords_come_from_titles():
+    goal = {"knowledge_base": [{"title": "Solar Panels"}, {"title": "Heat pumps", "content": "ignored words"}]}
+    keywords = goal_keywords(goal)
+    assert {"solar", "panels", "heat", "pumps"} <= keywords
+    assert "ignored" not in keywords
+
+
+def test_topic_and_engagement_raise_the_score():
+    pool = CandidatePool({"solar"}, clock=SimulatedClock(START))
+    pool.add([make_tweet(1, "nice weather", author="a"),
+              make_tweet(2, "solar is cheap now", author="b"),
+              make_tweet(3, "nice weather", author="c", likes=3)])
+    ranked = [tweet.id for _, tweet in pool.top(3)]
+    assert ranked == ["2", "3", "1"]
+
+
+def test_top_caps_candidates_per_author():
+    pool = CandidatePool(set(), clock=SimulatedClock(START))
+    pool.add([make_tweet(1, author="alice", likes=10), make_tweet(2, author="alice", likes=5),
+              make_tweet(3, author="bob")])
+    assert [tweet.id for _, tweet in pool.top(3)] == ["1", "3"]
+    pool.remove("1")
+    assert [tweet.id for _, tweet in pool.top(3)] == ["2", "3"]
+
+
+def test_candidates_persist_until_too_old():
+    clock = SimulatedClock(START)
+    pool = CandidatePool(set(), clock=clock, max_age_hours=24)
+    pool.add([make_tweet(1, author="a", age_hours=20), make_tweet(2, author="b")])
+    assert len(pool.top(5)) == 2 and len(pool) == 2, "Shown candidates stay in the pool"
+    clock.advance(5 * 3600)
+    assert [tweet.id for _, tweet in pool.top(5)] == ["2"]
+    assert "1" not in pool
+
+
+def test_pool_keeps_the_best_when_full():
+    pool = CandidatePool(set(), clock=SimulatedClock(START), max_size=2)
+    pool.add([make_tweet(i, author=str(i), likes=i) for i in range(4)])
+    assert len(pool) == 2 and "3" in pool and "2" in pool
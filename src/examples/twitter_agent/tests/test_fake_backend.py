@@ -0,0 +1,182 @@
+import pytest
+import os
+import subprocess
+import sys
+from datetime import datetime
+
+# Add src to PYTHONPATH
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.append(SRC_DIR)
+
+from core.clock import SimulatedClock
+from examples.twitter_agent.fake_backend import DEFAULT_VOCABULARY, FakeRateLimitError, FakeTwitterBackend
+from examples.twitter_agent.main import (MAX_REPLIES, REPLY_BURST, RESET_HOURS, TwitterAPIException,
+                                         initialize_processor, is_transient_error)
+
+
+@pytest.mark.asyncio
+async def test_agent_pipeline_runs_against_the_fake_backend(tmp_path):
+    clock = SimulatedClock(datetime(2025, 1, 1, 12, 0, 0))
+    backend = FakeTwitterBackend(corpus_size=300, latency=0.2, clock=clock)
+    processor = await initialize_processor(clock=clock, backend=backend, data_dir=str(tmp_path))
+    try:
+        search_result = await processor.execute_command(0, {"queries": ["AI agents", "web3"], "count": 3},
+                                                        context="load test search")
+        assert search_result["status"] == "success"
+        tweets = search_result["tweets"]
+        assert len(tweets) == 3
+        assert backend.calls["search_tweet"] == 2
+        assert clock.monotonic() >= 0.2, "Latency is spent on the clock"
+
+        reply_result = await processor.execute_command(1, {"tweet_id": tweets[0]["id"], "text": "Great point!"},
+                                                       context="load test reply")
+        assert reply_result["status"] == "queued"
+        await processor.reply_queue.join()
+        assert backend.replies == [{"id": backend.replies[0]["id"], "in_reply_to_tweet_id": tweets[0]["id"],
+                                    "text": "Great point!"}]
+        assert backend.calls["get_tweets"] == 0, "The replied tweet came from the search cache"
+
+        again = await processor.execute_command(0, {"queries": ["AI agents", "web3"], "count": 3},
+                                                context="load test search")
+        assert tweets[0]["id"] not in {t["id"] for t in again["tweets"]}, "Replied tweets are not offered again"
+    finally:
+        await processor.reply_queue.close()
+        processor.tweet_store.close()
+        processor.reply_limiter.close()
+    assert os.path.exists(tmp_path / "tweets.db")
+
+
+@pytest.mark.asyncio
+async def test_failed_replies_are_reported_and_reoffered(tmp_path):
+    clock = SimulatedClock(datetime(2025, 1, 1, 12, 0, 0))
+    backend = FakeTwitterBackend(corpus_size=300, latency=0, clock=clock)
+    processor = await initialize_processor(clock=clock, backend=backend, data_dir=str(tmp_path))
+    try:
+        search_result = await processor.execute_command(0, {"query": "AI agents", "count": 3}, context="search")
+        tweet_id = search_result["tweets"][0]["id"]
+
+        def rejected(text, in_reply_to_tweet_id=None):
+            raise ValueError("403 Forbidden")
+
+        processor.twitter_client.client.create_tweet = rejected
+        reply_result = await processor.execute_command(1, {"tweet_id": tweet_id, "text": "Nice"}, context="reply")
+        assert reply_result["status"] == "queued"
+        assert tweet_id not in processor.candidate_pool
+        await processor.reply_queue.join()
+
+        assert await processor.tweet_store.contains("replied", [tweet_id]) == set()
+        assert tweet_id in processor.candidate_pool, "The tweet is offered again"
+        # The failure is reported once, by whichever result comes after it
+        listed = await processor.execute_command(3, {"count": 3}, context="list")
+        failures = {**reply_result.get("failed_replies", {}), **listed.get("failed_replies", {})}
+        assert tweet_id in failures
+        assert "failed_replies" not in await processor.execute_command(3, {"count": 3}, context="list")
+    finally:
+        await processor.reply_queue.close()
+        processor.tweet_store.close()
+        processor.reply_limiter.close()
+
+
+@pytest.mark.asyncio
+async def test_fake_backend_injects_rate_limits():
+    backend = FakeTwitterBackend(corpus_size=10, latency=0, rate_limit_rate=1.0, clock=SimulatedClock())
+    with pytest.raises(FakeRateLimitError):
+        await backend.twikit_client().search_tweet("ai", "Top", count=5)
+
+    tweepy_client = backend.tweepy_client()
+    try:
+        tweepy_client.create_tweet(text="hi", in_reply_to_tweet_id="1")
+    except FakeRateLimitError as e:
+        wrapped = TwitterAPIException("Error posting reply")
+        wrapped.__cause__ = e
+        assert is_transient_error(wrapped), "The reply queue retries fake rate limits like real ones"
+    else:
+        pytest.fail("create_tweet should have been rate limited")
+    assert backend.rate_limited == {"search_tweet": 1, "create_tweet": 1}
+    assert backend.replies == []
+
+
+def test_fake_backend_runs_without_twikit_and_tweepy(tmp_path):
+    script = f"""
+import asyncio, sys
+sys.path.append({SRC_DIR!r})
+from core.clock import SimulatedClock
+from examples.twitter_agent.fake_backend import FakeTwitterBackend
+from examples.twitter_agent.main import initialize_processor
+
+async def run():
+    clock = SimulatedClock()
+    backend = FakeTwitterBackend(corpus_size=50, latency=0, rate_limit_rate=0.3, clock=clock)
+    processor = await initialize_processor(clock=clock, backend=backend, data_dir={str(tmp_path)!r})
+    result = await processor.execute_command(0, {{"queries": ["ai", "web3"]}}, context="search")
+    for tweet in result.get("tweets", []):
+        await processor.execute_command(1, {{"tweet_id": tweet["id"], "text": "Nice"}}, context="reply")
+    await processor.reply_queue.join()
+    await processor.reply_queue.close()
+    processor.tweet_store.close()
+
+asyncio.run(run())
+print(sorted(name for name in ("twikit", "tweepy") if name in sys.modules))
+"""
+    completed = subprocess.run([sys.executable, "-c", script], capture_output=True, text=True, timeout=120)
+    assert completed.returncode == 0, completed.stderr
+    assert completed.stdout.strip().splitlines()[-1] == "[]"
+
+
+@pytest.mark.asyncio
+async def test_a_simulated_day_respects_the_reply_limit(tmp_path):
+    clock = SimulatedClock(datetime(2025, 1, 1))
+    backend = FakeTwitterBackend(corpus_size=3000, latency=0, clock=clock)
+    processor = await initialize_processor(clock=clock, backend=backend, data_dir=str(tmp_path))
+    sent_at = []
+    create_tweet = processor.twitter_client.client.create_tweet
+
+    def timed_create_tweet(text, in_reply_to_tweet_id=None):
+        sent_at.append(clock.now())
+        return create_tweet(text=text, in_reply_to_tweet_id=in_reply_to_tweet_id)
+
+    processor.twitter_client.client.create_tweet = timed_create_tweet
+
+    async def search_and_reply(step):
+        result = await processor.execute_command(0, {"query": DEFAULT_VOCABULARY[step % len(DEFAULT_VOCABULARY)],
+                                                     "count": 20}, context="day")
+        for tweet in result.get("tweets", []):
+            reply = await processor.execute_command(1, {"tweet_id": tweet["id"], "text": "Nice"}, context="day")
+            if reply["status"] != "queued":
+                break
+
+    day_end = datetime(2025, 1, 2)
+    try:
+        step = 0
+        while clock.now() < day_end and step < 2000:
+            # Like the agent is told to: search while the queue has room, otherwise sleep
+            if processor.reply_queue.pending < processor.reply_queue.max_pending:
+                await search_and_reply(step)
+            await processor.execute_command(2, {"seconds": 60}, context="day")
+            step += 1
+        await processor.reply_queue.join()
+
+        first_day = [at for at in sent_at if at < day_end]
+        assert MAX_REPLIES <= len(first_day) <= MAX_REPLIES + REPLY_BURST
+        paced = first_day[REPLY_BURST:]
+        average_gap = (paced[-1] - paced[0]).total_seconds() / (len(paced) - 1)
+        assert average_gap >= RESET_HOURS * 3600 / MAX_REPLIES - 1, "After the burst, replies follow the refill rate"
+
+        # A quiet day refills the bucket, and the next day starts with a full burst again
+        await processor.execute_command(2, {"seconds": RESET_HOURS * 3600}, context="day")
+        assert processor.reply_limiter.status()["available_replies"] == REPLY_BURST
+        replied = {reply["in_reply_to_tweet_id"] for reply in backend.replies}
+        fresh = [tweet_id for tweet_id, tweet in backend.tweets.items()
+                 if tweet_id not in replied and not tweet["has_media"]]
+        sent_before = len(sent_at)
+        for tweet_id in fresh[:REPLY_BURST]:
+            reply = await processor.execute_command(1, {"tweet_id": tweet_id, "text": "Morning"}, context="day")
+            assert reply["status"] == "queued"
+        await processor.reply_queue.join()
+        assert len(sent_at) - sent_before == REPLY_BURST
+        burst_took = (sent_at[-1] - sent_at[sent_before]).total_seconds()
+        assert burst_took < RESET_HOURS * 3600 / MAX_REPLIES, "The burst goes out without waiting for refills"
+    finally:
+        await processor.reply_queue.close()
+        processor.tweet_store.close()
+        processor.reply_limiter.close()
@@ -0,0 +1,39 @@
+import pytest
+import os
+import sys
+from datetime import datetime
+
+# Add src to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from core.clock import SimulatedClock
+from examples.twitter_agent.rate_limiter import ReplyRateLimiter
+
+
+def test_reply_limiter_spreads_replies_and_survives_restart(tmp_path):
+    clock = SimulatedClock(start=datetime(2025, 1, 1))
+    checkpoint = str(tmp_path / "limiter.json")
+    limiter = ReplyRateLimiter(max_replies=24, period=24 * 3600, burst=2, clock=clock,
+                               checkpoint_file=checkpoint, checkpoint_interval=0)
+
+    assert limiter.try_acquire() and limiter.try_acquire()
+    assert not limiter.try_acquire()
+    assert limiter.status() == {"available_replies": 0, "next_slot_in_seconds": 3600,
+                                "next_slot_at": "2025-01-01T01:00:00"}
+
+    clock.advance(1800)
+    restarted = ReplyRateLimiter(max_replies=24, period=24 * 3600, burst=2, clock=clock,
+                                 checkpoint_file=checkpoint)
+    assert restarted.seconds_until_available() == pytest.approx(1800)
+    clock.advance(1800)
+    assert restarted.try_acquire()
+
+
+def test_reply_limiter_status_leaves_out_reserved_slots():
+    clock = SimulatedClock(start=datetime(2025, 1, 1))
+    limiter = ReplyRateLimiter(max_replies=24, period=24 * 3600, burst=2, clock=clock)
+
+    assert limiter.status(reserved=1)["available_replies"] == 1
+    assert limiter.status(reserved=3) == {"available_replies": 0, "next_slot_in_seconds": 7200,
+                                          "next_slot_at": "2025-01-01T02:00:00"}
+    assert limiter.tokens == 2, "Reserving slots for the status does not take them"
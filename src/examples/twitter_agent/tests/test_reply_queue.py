@@ -0,0 +1,88 @@
+import pytest
+import asyncio
+import os
+import sys
+from datetime import datetime
+
+# Add src to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from core.clock import SimulatedClock
+from examples.twitter_agent.rate_limiter import ReplyRateLimiter
+from examples.twitter_agent.reply_queue import ReplyQueue
+
+
+@pytest.mark.asyncio
+async def test_reply_queue_paces_and_retries():
+    clock = SimulatedClock(start=datetime(2025, 1, 1))
+    limiter = ReplyRateLimiter(max_replies=24, period=24 * 3600, burst=1, clock=clock)
+    sent_at = []
+    failures = {"2": 1}
+
+    async def send(tweet_id, text):
+        if failures.get(tweet_id):
+            failures[tweet_id] -= 1
+            raise ConnectionError("temporary")
+        sent_at.append((tweet_id, clock.now()))
+        return f"reply-{tweet_id}"
+
+    queue = ReplyQueue(send, limiter, clock=clock, cooldown=30, retry_delay=60,
+                       is_transient=lambda e: isinstance(e, ConnectionError))
+    first = queue.enqueue("1", "hello")
+    second = queue.enqueue("2", "hi")
+    assert first["status"] == "queued" and first["position"] == 1
+    assert second["position"] == 2 and second["estimated_send_at"] == "2025-01-01T01:00:00"
+
+    await queue.join()
+    # The second reply waits for the next hourly slot, fails once and is retried a minute later
+    assert sent_at == [("1", datetime(2025, 1, 1)), ("2", datetime(2025, 1, 1, 1, 1))]
+    assert [reply.result["tweet_id"] for reply in queue.sent] == ["reply-1", "reply-2"]
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_reply_queue_reports_failed_replies():
+    clock = SimulatedClock(start=datetime(2025, 1, 1))
+    limiter = ReplyRateLimiter(burst=5, clock=clock)
+    handled = []
+
+    async def send(tweet_id, text):
+        raise ValueError("duplicate content")
+
+    async def on_failure(reply):
+        handled.append(reply.tweet_id)
+
+    queue = ReplyQueue(send, limiter, clock=clock, on_failure=on_failure)
+    queue.enqueue("7", "hello")
+    await queue.join()
+
+    assert handled == ["7"]
+    assert queue.take_failures() == {"7": "duplicate content (after 1 attempts)"}
+    assert queue.take_failures() == {}, "Each failure is reported once"
+    await queue.close()
+
+
+@pytest.mark.asyncio
+async def test_close_hands_dropped_replies_to_on_failure():
+    clock = SimulatedClock(start=datetime(2025, 1, 1))
+    limiter = ReplyRateLimiter(burst=5, clock=clock)
+    posting = asyncio.Event()
+    handled = []
+
+    async def send(tweet_id, text):
+        posting.set()
+        await asyncio.Event().wait()  # never completes
+
+    async def on_failure(reply):
+        handled.append(reply.tweet_id)
+
+    queue = ReplyQueue(send, limiter, clock=clock, on_failure=on_failure)
+    for tweet_id in ("1", "2", "3"):
+        queue.enqueue(tweet_id, "hello")
+    await posting.wait()
+    await queue.close()
+
+    # "1" was being posted when the queue closed and may have gone out
+    assert handled == ["2", "3"]
+    assert set(queue.take_failures()) == {"2", "3"}
+    assert queue.pending == 0
@@ -0,0 +1,47 @@
+import pytest
+import os
+import sys
+from types import SimpleNamespace
+
+# Add src to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from core.clock import SimulatedClock
+from examples.twitter_agent.main import TwitterAPIWrapper, TWEET_LOOKUP_BATCH
+from examples.twitter_agent.tweet_cache import TweetCache
+
+
+class RecordingTweepyClient:
+    """Answers get_tweets like Tweepy and records the requested ID batches"""
+
+    def __init__(self):
+        self.requests = []
+
+    def get_tweets(self, ids, **kwargs):
+        self.requests.append(list(ids))
+        data = [
+            SimpleNamespace(id=int(tweet_id), text=f"tweet {tweet_id}", created_at=None, lang="en",
+                            public_metrics={}, attachments=None, referenced_tweets=None, author_id=None)
+            for tweet_id in ids if tweet_id != "404"
+        ]
+        return SimpleNamespace(data=data, includes={})
+
+
+@pytest.mark.asyncio
+async def test_tweet_lookups_are_batched_and_cached():
+    clock = SimulatedClock()
+    wrapper = TwitterAPIWrapper(cache=TweetCache(ttl=60, clock=clock))
+    wrapper.client = RecordingTweepyClient()
+
+    ids = [str(i) for i in range(TWEET_LOOKUP_BATCH + 5)] + ["404"]
+    tweets = await wrapper.get_tweets_by_ids(ids)
+    assert len(tweets) == TWEET_LOOKUP_BATCH + 5 and "404" not in tweets
+    assert [len(batch) for batch in wrapper.client.requests] == [TWEET_LOOKUP_BATCH, 6]
+
+    tweet = await wrapper.get_tweet_by_id("3")
+    assert tweet.text == "tweet 3"
+    assert len(wrapper.client.requests) == 2, "Served from the cache"
+
+    clock.advance(61)
+    await wrapper.get_tweet_by_id("3")
+    assert wrapper.client.requests[-1] == ["3"], "Expired entries are fetched again"
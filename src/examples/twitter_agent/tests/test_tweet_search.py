@@ -0,0 +1,111 @@
+import pytest
+import asyncio
+import os
+import sys
+from datetime import datetime
+from types import SimpleNamespace
+
+# Add src to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from core.clock import SimulatedClock
+from examples.twitter_agent.candidates import CandidatePool
+from examples.twitter_agent.main import MockTweet, SEARCH_CONCURRENCY, TwitterAPIException, tweet_search
+from examples.twitter_agent.rate_limiter import ReplyRateLimiter
+from examples.twitter_agent.reply_queue import ReplyQueue
+from examples.twitter_agent.tweet_cache import TweetCache
+from examples.twitter_agent.tweet_store import TweetStore
+
+START = datetime(2025, 1, 1, 12, 0, 0)
+
+
+def make_tweet(tweet_id, author):
+    return MockTweet(
+        {"id": tweet_id, "text": "same text", "created_at": START,
+         "public_metrics": {"like_count": 1, "retweet_count": 0, "reply_count": 0}},
+        {"id": author, "username": author, "public_metrics": {"followers_count": 10}}
+    )
+
+
+class StubSearchClient:
+    """Serves fixed results per query and records how many searches overlap"""
+
+    def __init__(self, results, failing=()):
+        self.results = results
+        self.failing = set(failing)
+        self.running = 0
+        self.peak = 0
+        self.queries = []
+
+    async def search_tweet_twiki(self, query, product, count):
+        self.queries.append(query)
+        self.running += 1
+        self.peak = max(self.peak, self.running)
+        try:
+            await asyncio.sleep(0.01)
+            if query in self.failing:
+                raise TwitterAPIException(f"search for {query} failed")
+            return list(self.results.get(query, []))
+        finally:
+            self.running -= 1
+
+
+def make_processor(tmp_path, search_client):
+    clock = SimulatedClock(START)
+    limiter = ReplyRateLimiter(clock=clock)
+
+    async def send(tweet_id, text):
+        return "reply"
+
+    return SimpleNamespace(
+        clock=clock,
+        twikit_search_client=search_client,
+        twitter_client=SimpleNamespace(cache=TweetCache(clock=clock)),
+        tweet_store=TweetStore(str(tmp_path / "tweets.db")),
+        candidate_pool=CandidatePool(set(), clock=clock),
+        reply_limiter=limiter,
+        reply_queue=ReplyQueue(send, limiter, clock=clock)
+    )
+
+
+@pytest.mark.asyncio
+async def test_queries_are_merged_and_deduplicated(tmp_path):
+    shared = make_tweet("1", "alice")
+    client = StubSearchClient({"ai": [shared, make_tweet("2", "bob")],
+                               "agents": [make_tweet("1", "alice"), make_tweet("3", "carol")]})
+    processor = make_processor(tmp_path, client)
+
+    result = await tweet_search({"queries": ["ai", "agents", "ai"], "count": 5}, processor=processor)
+    assert result["status"] == "success"
+    assert client.queries == ["ai", "agents"], "Duplicate queries run once"
+    ids = [tweet["id"] for tweet in result["tweets"]]
+    assert sorted(ids) == ["1", "2", "3"], "A tweet found by both queries appears once"
+    assert ids[0] == "1", "Matching several queries ranks a tweet higher"
+    assert "failed_queries" not in result
+    processor.tweet_store.close()
+
+
+@pytest.mark.asyncio
+async def test_partial_and_total_search_failures(tmp_path):
+    client = StubSearchClient({"ai": [make_tweet("1", "alice")]}, failing={"web3"})
+    processor = make_processor(tmp_path, client)
+
+    result = await tweet_search({"queries": ["ai", "web3"]}, processor=processor)
+    assert result["status"] == "success"
+    assert [tweet["id"] for tweet in result["tweets"]] == ["1"]
+    assert list(result["failed_queries"]) == ["web3"]
+
+    result = await tweet_search({"queries": ["web3"]}, processor=processor)
+    assert result["status"] == "error" and "web3" in result["message"]
+    processor.tweet_store.close()
+
+
+@pytest.mark.asyncio
+async def test_searches_run_concurrently_up_to_the_cap(tmp_path):
+    client = StubSearchClient({})
+    processor = make_processor(tmp_path, client)
+
+    await tweet_search({"queries": [f"query {i}" for i in range(7)]}, processor=processor)
+    assert len(client.queries) == 7
+    assert client.peak == SEARCH_CONCURRENCY
+    processor.tweet_store.close()
@@ -0,0 +1,32 @@
+import pytest
+import os
+import sys
+
+# Add src to PYTHONPATH
+sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(__file__)))))
+
+from examples.twitter_agent.tweet_store import TweetStore
+
+
+@pytest.mark.asyncio
+async def test_tweet_store_migrates_and_shares_ids(tmp_path):
+    legacy = tmp_path / "replied_tweets.txt"
+    legacy.write_text("1\n2\n")
+    db = str(tmp_path / "tweets.db")
+
+    store = TweetStore(db, legacy_files={"replied": str(legacy)})
+    assert await store.contains("replied", ["1", "2", "3"]) == {"1", "2"}
+
+    # A second process sharing the file sees inserts made after it loaded
+    other = TweetStore(db, legacy_files={"replied": str(legacy)})
+    assert await other.contains("seen", ["10"]) == set()
+    await store.add("seen", ["10", "11"])
+    assert await other.contains("seen", ["10", "11", "12"]) == {"10", "11"}
+
+    # Legacy files are imported only once
+    legacy.write_text("1\n2\n4\n")
+    store.close()
+    reopened = TweetStore(db, legacy_files={"replied": str(legacy)})
+    assert await reopened.contains("replied", ["4"]) == set()
+    other.close()
+    reopened.close()
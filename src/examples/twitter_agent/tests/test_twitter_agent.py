@@ -56,8 +56,13 @@ async def test_twitter_agent_basic():
     if reply_result['status'] == 'error':
         pytest.fail(f"Could not post a reply. Reason: {reply_result['message']}")
 
-    posted_tweet_id = reply_result.get('tweet_id')
-    assert posted_tweet_id, "A successful reply must contain the 'tweet_id' field"
+    assert reply_result['status'] == 'queued', "Replies are queued and posted in the background"
+
+    # Wait for the reply queue to post it
+    await processor.reply_queue.join()
+    assert processor.reply_queue.sent, f"Reply was not posted: {processor.reply_queue.failed}"
+    posted_tweet_id = processor.reply_queue.sent[-1].result.get('tweet_id')
+    assert posted_tweet_id, "A posted reply must have a 'tweet_id'"
     print("Newly posted tweet:", posted_tweet_id)
 
     # 4) Perform a sleep
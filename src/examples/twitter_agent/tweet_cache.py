@@ -0,0 +1,51 @@
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+from core.clock import Clock, SystemClock
+
+
+class TweetCache:
+    """
+    Tweets by ID with a time-to-live.
+
+    Filled from search results and Tweepy lookups so that replying to a tweet
+    the agent just found needs no extra API request.
+    """
+
+    def __init__(self, ttl: float = 900, max_size: int = 5000, clock: Optional[Clock] = None):
+        """
+        ttl: Seconds a tweet stays cached (its metrics go stale after that).
+        max_size: Tweets kept before expired and then oldest entries are dropped.
+        clock: Time source (default: the system clock).
+        """
+        self.ttl = ttl
+        self.max_size = max_size
+        self.clock = clock or SystemClock()
+        self._tweets: Dict[str, Tuple[float, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, tweet_id: str) -> Optional[Any]:
+        item = self._tweets.get(str(tweet_id))
+        if item is None or self.clock.monotonic() - item[0] > self.ttl:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return item[1]
+
+    def put(self, tweet: Any):
+        tweet_id = str(tweet.id)
+        self._tweets.pop(tweet_id, None)
+        self._tweets[tweet_id] = (self.clock.monotonic(), tweet)
+        if len(self._tweets) > self.max_size:
+            self._prune()
+
+    def put_many(self, tweets: Iterable[Any]):
+        for tweet in tweets:
+            self.put(tweet)
+
+    def _prune(self):
+        now = self.clock.monotonic()
+        self._tweets = {k: v for k, v in self._tweets.items() if now - v[0] <= self.ttl}
+        # Dicts keep insertion order, so the first entries are the oldest
+        for tweet_id in list(self._tweets)[:max(0, len(self._tweets) - self.max_size)]:
+            del self._tweets[tweet_id]
@@ -0,0 +1,117 @@
+import asyncio
+import os
+import sqlite3
+import threading
+from typing import Dict, Iterable, Optional, Set
+
+TWEET_KINDS = ("seen", "replied")
+
+
+class TweetStore:
+    """
+    Persistent sets of seen and replied tweet IDs backed by SQLite.
+
+    IDs are loaded into memory once; membership checks and inserts work on
+    whole batches. The database runs in WAL mode so several agent processes
+    can share one file: IDs missing from the in-memory sets are confirmed
+    against the database, which catches inserts made by other processes.
+    """
+
+    def __init__(self, path: str, legacy_files: Optional[Dict[str, str]] = None):
+        """
+        path: SQLite database file.
+        legacy_files: Text files with one ID per line, keyed by kind ("seen"/"replied"),
+            imported once on first use.
+        """
+        self.path = path
+        self.legacy_files = legacy_files or {}
+        self._ids: Dict[str, Set[str]] = {kind: set() for kind in TWEET_KINDS}
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS tweet_ids ("
+                "kind TEXT NOT NULL, tweet_id TEXT NOT NULL, PRIMARY KEY (kind, tweet_id)) WITHOUT ROWID"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS migrations (name TEXT PRIMARY KEY)")
+            conn.commit()
+            self._conn = conn
+            self._migrate_legacy_files()
+            for kind, tweet_id in conn.execute("SELECT kind, tweet_id FROM tweet_ids"):
+                self._ids.setdefault(kind, set()).add(tweet_id)
+        return self._conn
+
+    def _migrate_legacy_files(self):
+        for kind, filename in self.legacy_files.items():
+            name = f"{kind}:{os.path.abspath(filename)}"
+            with self._conn:
+                if self._conn.execute("SELECT 1 FROM migrations WHERE name = ?", (name,)).fetchone():
+                    continue
+                try:
+                    with open(filename, 'r') as f:
+                        ids = [line.strip() for line in f if line.strip()]
+                except FileNotFoundError:
+                    ids = []
+                self._conn.executemany("INSERT OR IGNORE INTO tweet_ids VALUES (?, ?)",
+                                       [(kind, tweet_id) for tweet_id in ids])
+                self._conn.execute("INSERT INTO migrations VALUES (?)", (name,))
+
+    def _contains(self, kind: str, tweet_ids: Iterable[str]) -> Set[str]:
+        with self._lock:
+            conn = self._connect()
+            known = self._ids[kind]
+            ids = {str(tweet_id) for tweet_id in tweet_ids}
+            found = ids & known
+            missing = list(ids - found)
+            # Another process may have recorded some of them since we loaded
+            for start in range(0, len(missing), 500):
+                chunk = missing[start:start + 500]
+                placeholders = ",".join("?" * len(chunk))
+                rows = conn.execute(
+                    f"SELECT tweet_id FROM tweet_ids WHERE kind = ? AND tweet_id IN ({placeholders})",
+                    [kind, *chunk]
+                ).fetchall()
+                for (tweet_id,) in rows:
+                    known.add(tweet_id)
+                    found.add(tweet_id)
+            return found
+
+    def _add(self, kind: str, tweet_ids: Iterable[str]):
+        with self._lock:
+            conn = self._connect()
+            ids = [str(tweet_id) for tweet_id in tweet_ids]
+            with conn:
+                conn.executemany("INSERT OR IGNORE INTO tweet_ids VALUES (?, ?)",
+                                 [(kind, tweet_id) for tweet_id in ids])
+            self._ids[kind].update(ids)
+
+    def _remove(self, kind: str, tweet_ids: Iterable[str]):
+        with self._lock:
+            conn = self._connect()
+            ids = [str(tweet_id) for tweet_id in tweet_ids]
+            with conn:
+                conn.executemany("DELETE FROM tweet_ids WHERE kind = ? AND tweet_id = ?",
+                                 [(kind, tweet_id) for tweet_id in ids])
+            self._ids[kind].difference_update(ids)
+
+    async def contains(self, kind: str, tweet_ids: Iterable[str]) -> Set[str]:
+        """Return the subset of tweet_ids recorded under kind."""
+        return await asyncio.to_thread(self._contains, kind, list(tweet_ids))
+
+    async def add(self, kind: str, tweet_ids: Iterable[str]):
+        """Record tweet_ids under kind in a single transaction."""
+        await asyncio.to_thread(self._add, kind, list(tweet_ids))
+
+    async def remove(self, kind: str, tweet_ids: Iterable[str]):
+        """Forget tweet_ids under kind (other processes keep them until they reload)."""
+        await asyncio.to_thread(self._remove, kind, list(tweet_ids))
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
@@ -0,0 +1,711 @@
+import pytest
+import json
+import sys
+import os
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from core.llm_processor import LLMProcessor
+from core.loop_detector import LoopDetector
+from core.memo_cache import ResultCache
+from core.clock import SimulatedClock
+from core.web_display import get_monitoring_server
+
+FUNCTIONS = {
+    "functions": [
+        {
+            "id": 0,
+            "name": "move",
+            "description": "Move in a specified direction",
+            "parameters": {
+                "direction": {"type": "string", "description": "Direction to move", "required": True}
+            }
+        },
+        {
+            "id": 1,
+            "name": "look_around",
+            "description": "Look at adjacent cells in all directions",
+            "parameters": {}
+        }
+    ]
+}
+
+GOAL = "goal:\n  description: \"Reach the exit\"\n"
+
+
+def make_processor(tmp_path, functions=None, goal=GOAL, **kwargs) -> LLMProcessor:
+    """Create a processor from temporary config files without touching the LLM"""
+    functions_file = tmp_path / "functions.json"
+    goal_file = tmp_path / "goal.yaml"
+    functions_file.write_text(json.dumps(functions or FUNCTIONS))
+    goal_file.write_text(goal)
+    return LLMProcessor(str(functions_file), str(goal_file), **kwargs)
+
+
+def fake_completion(processor: LLMProcessor, *responses: dict) -> list:
+    """Replace the chat completion call with canned JSON responses; returns the received prompts"""
+    from types import SimpleNamespace
+
+    prompts = []
+    queue = list(responses)
+
+    async def chat_completion(prompt_text, call_type):
+        prompts.append(prompt_text)
+        content = json.dumps(queue.pop(0))
+        return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=content))])
+
+    processor._chat_completion = chat_completion
+    return prompts
+
+
+def register_maze(processor: LLMProcessor) -> dict:
+    """Register a tiny environment where moving north always hits a wall"""
+    calls = {"move": 0}
+
+    async def move(params):
+        calls["move"] += 1
+        if params["direction"] == "north":
+            return {"status": "error", "message": "Cannot move into wall"}
+        return {"status": "success", "message": f"Moved {params['direction']}"}
+
+    async def look_around(params):
+        return {"status": "success", "cells": {"north": "#"}}
+
+    processor.register_function("move", move)
+    processor.register_function("look_around", look_around)
+    return calls
+
+
+@pytest.mark.asyncio
+async def test_loop_detector_blocks_repeated_failure(tmp_path):
+    processor = make_processor(tmp_path, loop_detector=LoopDetector(policy="block"))
+    calls = register_maze(processor)
+
+    for _ in range(3):
+        await processor.execute_command(0, {"direction": "north"}, "try north")
+    assert "Loop Warning" in processor.generate_prompt()
+
+    result = await processor.execute_command(0, {"direction": "north"}, "try north again")
+    assert result["status"] == "blocked"
+    assert calls["move"] == 3, "Blocked action must not reach the implementation"
+    stats = processor.loop_detector.stats()
+    assert stats["blocked_actions"] == 1
+
+    result = await processor.execute_command(0, {"direction": "east"}, "try east")
+    assert result["status"] == "success"
+    result = await processor.execute_command(0, {"direction": "north"}, "try north after moving")
+    assert result["status"] == "error", "Without a state provider a success lifts the block"
+
+
+@pytest.mark.asyncio
+async def test_loop_detector_block_is_tied_to_the_state(tmp_path):
+    processor = make_processor(tmp_path, loop_detector=LoopDetector(policy="block"))
+    position = {"x": 1}
+
+    async def move(params):
+        if params["direction"] == "north" and position["x"] == 1:
+            return {"status": "error", "message": "Cannot move into wall"}
+        if params["direction"] == "east":
+            position["x"] += 1
+        return {"status": "success", "message": f"Moved {params['direction']}"}
+
+    processor.register_function("move", move)
+    processor.register_function("look_around", lambda params: {"status": "success"})
+    processor.register_state_provider(lambda: dict(position))
+
+    for _ in range(3):
+        await processor.execute_command(0, {"direction": "north"}, "try north")
+    assert (await processor.execute_command(0, {"direction": "north"}, "again"))["status"] == "blocked"
+
+    await processor.execute_command(0, {"direction": "east"}, "go east")
+    result = await processor.execute_command(0, {"direction": "north"}, "north from the new cell")
+    assert result["status"] == "success", "The same action is allowed in a different state"
+
+    position["x"] = 1
+    assert (await processor.execute_command(0, {"direction": "north"}, "back at the wall"))["status"] == "blocked"
+
+
+@pytest.mark.asyncio
+async def test_loop_detector_blocks_the_next_action_of_a_cycle(tmp_path):
+    processor = make_processor(tmp_path, loop_detector=LoopDetector(policy="block", max_cycle_repeats=2))
+    position = {"y": 0}
+
+    async def move(params):
+        position["y"] += 1 if params["direction"] == "north" else -1
+        return {"status": "success", "message": f"Moved {params['direction']}"}
+
+    processor.register_function("move", move)
+    processor.register_function("look_around", lambda params: {"status": "success"})
+    processor.register_state_provider(lambda: dict(position))
+
+    for _ in range(3):
+        await processor.execute_command(0, {"direction": "north"}, "go north")
+        await processor.execute_command(0, {"direction": "south"}, "go south")
+    assert processor.loop_detector.detections[-1].kind == "cycle"
+
+    detector = processor.loop_detector
+    assert detector.is_blocked("move", {"direction": "north"}, {"y": 0}), "North from y=0 repeats the cycle"
+    assert not detector.is_blocked("move", {"direction": "south"}, {"y": 0}), "South was never issued at y=0"
+    assert not detector.is_blocked("move", {"direction": "north"}, {"y": 1})
+    assert (await processor.execute_command(0, {"direction": "north"}, "north again"))["status"] == "blocked"
+    assert position == {"y": 0}
+
+
+@pytest.mark.asyncio
+async def test_loop_detector_stops_on_cycle(tmp_path):
+    processor = make_processor(tmp_path, loop_detector=LoopDetector(policy="stop", max_cycle_repeats=2))
+    register_maze(processor)
+    processor.register_state_provider(lambda: {"position": (1, 1)})
+
+    for _ in range(3):
+        await processor.execute_command(1, {}, "observe")
+    assert processor.stopped
+
+    response = await processor.get_next_action()
+    assert response["action"] is None
+
+
+@pytest.mark.asyncio
+async def test_history_rendering_is_incremental_and_matches_json(tmp_path):
+    processor = make_processor(tmp_path, history_size=3)
+    register_maze(processor)
+    encoded = []
+    entry_to_dict = processor.history_renderer.entry_to_dict
+    processor.history_renderer.entry_to_dict = lambda e, age=0: encoded.append(e) or entry_to_dict(e, age)
+
+    for direction in ["east", "south", "west", "north"]:
+        await processor.execute_command(0, {"direction": direction}, "explore")
+        processor.generate_prompt()
+
+    assert len(encoded) == 4, "Each entry should be encoded exactly once"
+    expected = json.dumps([processor._entry_to_dict(e) for e in processor.execution_history[-3:]], indent=2)
+    assert processor.history_renderer.render(processor.execution_history, 3) == expected
+
+
+@pytest.mark.asyncio
+async def test_compressed_history_collapses_runs(tmp_path):
+    functions = {"functions": [{"id": 0, "name": "throttle", "description": "Wait", "parameters": {}}]}
+    processor = make_processor(tmp_path, functions=functions, compress_history=True)
+
+    async def throttle(params):
+        return {"status": "accepted"}
+
+    processor.register_function("throttle", throttle)
+    for _ in range(6):
+        await processor.execute_command(0, {"reason": "heating", "wait_time": 20}, "wait")
+
+    prompt = processor.generate_prompt()
+    assert "throttle ×6, reason: heating, total wait_time 120, all accepted" in prompt
+    assert prompt.count('"command_name"') == 0
+
+
+@pytest.mark.asyncio
+async def test_table_history_encoding(tmp_path):
+    processor = make_processor(tmp_path)
+    register_maze(processor)
+    await processor.execute_command(0, {"direction": "east"}, "explore " * 50)
+    await processor.execute_command(0, {"direction": "north"}, "explore")
+
+    prompt = processor.generate_prompt(history_encoding="table")
+    assert "step | t | command | parameters | status | result | context" in prompt
+    assert '2 | +' in prompt and 'move#0 | {"direction":"north"} | failed' in prompt
+    assert "…" in prompt, "Long context should be truncated"
+
+    counts = processor.history_encoding_token_counts()
+    assert counts["table"] < counts["json"]
+
+
+@pytest.mark.asyncio
+async def test_result_policy_shapes_prompt_but_not_history(tmp_path):
+    functions = {"functions": [{
+        "id": 0,
+        "name": "search",
+        "description": "Search posts",
+        "parameters": {},
+        "result_policy": {"max_items": 2, "max_string_length": 10, "keep_fields": ["id", "author.name"],
+                          "digest_after_steps": 2, "digest_fields": ["id"]}
+    }]}
+    processor = make_processor(tmp_path, functions=functions)
+    posts = [{"id": i, "text": "x" * 50, "author": {"name": f"user{i}", "bio": "long bio"}} for i in range(5)]
+
+    async def search(params):
+        return {"status": "success", "posts": posts}
+
+    processor.register_function("search", search)
+    await processor.execute_command(0, {}, "search")
+
+    latest = processor._entry_to_dict(processor.execution_history[-1], age=0)["result"]
+    assert latest["posts"] == [{"id": 0, "author": {"name": "user0"}}, {"id": 1, "author": {"name": "user1"}}, "... 3 more"]
+    digest = processor._entry_to_dict(processor.execution_history[-1], age=2)["result"]
+    assert digest["posts"] == [{"id": i} for i in range(5)]
+    assert len(processor.execution_history[-1].result["posts"]) == 5, "History keeps the full result"
+
+    for _ in range(2):
+        await processor.execute_command(0, {}, "search again")
+    prompt = processor.generate_prompt()
+    assert "result_policy" not in prompt
+    assert prompt.count("user0") == 2, "The oldest entry should be reduced to a digest"
+
+
+@pytest.mark.asyncio
+async def test_collapsed_runs_apply_the_result_policy(tmp_path):
+    functions = {"functions": [{
+        "id": 0,
+        "name": "search",
+        "description": "Search posts",
+        "parameters": {"query": {"type": "string", "description": "Query"}},
+        "result_policy": {"max_items": 2, "keep_fields": ["id"]}
+    }]}
+    processor = make_processor(tmp_path, functions=functions, compress_history=True)
+    posts = [{"id": i, "text": "x" * 500} for i in range(20)]
+
+    async def search(params):
+        return {"status": "success", "posts": posts}
+
+    processor.register_function("search", search)
+    for query in ("a", "b", "c"):
+        await processor.execute_command(0, {"query": query}, "search")
+
+    for encoding in ("json", "table"):
+        prompt = processor.generate_prompt(history_encoding=encoding)
+        assert "search ×3" in prompt
+        assert "x" * 500 not in prompt and "18 more" in prompt, "The run's last result is shaped by the policy"
+
+
+@pytest.mark.asyncio
+async def test_tool_selection_limits_commands_in_prompt(tmp_path):
+    goal = "goal:\n  description: \"Report the weather forecast for Paris\"\n"
+
+    async def noop(params):
+        return {"status": "success"}
+
+    def make_catalog(**kwargs):
+        processor = make_processor(tmp_path, goal=goal, tool_top_k=2, **kwargs)
+        register_maze(processor)
+        for i in range(30):
+            processor.register_function(f"tool_{i}", noop, spec={"description": f"Unrelated utility number {i}"})
+        processor.register_function("get_weather_forecast", noop,
+                                    spec={"description": "Weather forecast for a city",
+                                          "parameters": {"city": {"type": "string", "description": "City name"}}})
+        processor.register_function("submit_report", noop,
+                                    spec={"description": "Submit the answer", "pinned": True})
+        return processor
+
+    processor = make_catalog()
+    prompt = processor.generate_prompt()
+    assert '"name": "get_weather_forecast"' in prompt
+    assert '"name": "submit_report"' in prompt
+    assert '"name": "tool_7"' not in prompt and "tool_7" in prompt, "Hidden commands are listed by name"
+    assert "tool_29" not in prompt and "12 less relevant commands are not listed" in prompt, \
+        "Only the best-ranked hidden commands are listed"
+    assert '"pinned"' not in prompt
+
+    short_list = make_catalog(tool_list_k=5).generate_prompt()
+    assert "tool_7" not in short_list and "27 less relevant commands are not listed" in short_list
+
+    processor._resolve_command_name(action := {"command_name": "tool_7", "parameters": {}})
+    await processor.execute_command(action["command_id"], action["parameters"], "by name")
+    assert '"name": "tool_7"' in processor.generate_prompt(), "Recently used commands are shown in full"
+
+
+@pytest.mark.asyncio
+async def test_llm_goal_compression_is_cached_by_file_hash(tmp_path):
+    calls = []
+
+    async def fake_llm(prompt_text, call_type):
+        calls.append(call_type)
+        return "Reach the exit."
+
+    processor = make_processor(tmp_path, goal_compression="llm")
+    processor._call_llm_text = fake_llm
+    await processor.prepare_goal()
+    assert "Reach the exit." in processor.generate_prompt()
+
+    cached = make_processor(tmp_path, goal_compression="llm")
+    assert cached.compact_goal == "Reach the exit."
+    assert calls == ["goal_compression"]
+
+    changed = make_processor(tmp_path, goal="goal:\n  description: \"Find the key\"\n", goal_compression="llm")
+    assert changed.compact_goal is None, "Editing the goal file invalidates the cache"
+
+    local = make_processor(tmp_path, goal_compression="local")
+    assert "goal:\n description: Reach the exit" in local.generate_prompt()
+
+
+def _square(params):
+    return {"status": "success", "value": params["x"] ** 2, "pid": os.getpid()}
+
+
+@pytest.mark.asyncio
+async def test_sync_tools_run_in_configured_executors(tmp_path):
+    import threading
+
+    functions = {"functions": [
+        {"id": 0, "name": "square", "description": "Square a number", "parameters": {}, "executor": "process"},
+        {"id": 1, "name": "where", "description": "Report the thread", "parameters": {}},
+    ]}
+    processor = make_processor(tmp_path, functions=functions)
+    processor.register_function("square", _square)
+    processor.register_function("where", lambda params: {"status": "success", "thread": threading.current_thread().name},
+                                executor="thread")
+    try:
+        result = await processor.execute_command(0, {"x": 7}, "square")
+        assert result["value"] == 49 and result["pid"] != os.getpid()
+        assert processor.execution_history[-1].result == result
+
+        result = await processor.execute_command(1, {}, "where")
+        assert result["thread"].startswith("ai42z-tool")
+        assert '"executor"' not in processor.generate_prompt()
+    finally:
+        processor.close()
+
+
+@pytest.mark.asyncio
+async def test_shared_executors_outlive_a_closed_processor(tmp_path):
+    import threading
+    from core.executors import ToolExecutors
+
+    executors = ToolExecutors()
+    first = make_processor(tmp_path, executors=executors)
+    second = make_processor(tmp_path, executors=executors)
+    for processor in (first, second):
+        processor.register_function("move", lambda params: {"status": "success",
+                                                            "thread": threading.current_thread().name},
+                                    executor="thread")
+    try:
+        await first.execute_command(0, {"direction": "east"}, "move")
+        first.close()
+        result = await second.execute_command(0, {"direction": "east"}, "move")
+        assert result["thread"].startswith("ai42z-tool"), "Closing one processor keeps the shared pool"
+    finally:
+        second.close()
+        executors.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_command_timeout_and_step_deadline(tmp_path):
+    import asyncio
+
+    functions = {"functions": [
+        {"id": 0, "name": "slow", "description": "Slow tool", "parameters": {}, "timeout": 0.05},
+        {"id": 1, "name": "medium", "description": "Medium tool", "parameters": {}},
+    ]}
+    processor = make_processor(tmp_path, functions=functions, step_deadline=0.1)
+
+    async def slow(params):
+        await asyncio.sleep(10)
+        return {"status": "success"}
+
+    async def medium(params):
+        await asyncio.sleep(0.3)
+        return {"status": "success"}
+
+    processor.register_function("slow", slow)
+    processor.register_function("medium", medium)
+
+    result = await processor.execute_command(0, {}, "slow")
+    assert result["status"] == "timeout"
+    assert processor.execution_history[-1].status == "timeout"
+
+    result = await processor.execute_command(1, {}, "medium")
+    assert result["status"] == "timeout", "The step budget applies to commands without their own timeout"
+    assert processor.timeout_counts == {"slow": 1, "medium": 1}
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_runs_independent_actions_concurrently(tmp_path):
+    import asyncio
+
+    processor = make_processor(tmp_path, response_format="batch")
+    register_maze(processor)
+    running = []
+    peak = []
+
+    async def look_around(params):
+        running.append(1)
+        peak.append(len(running))
+        await asyncio.sleep(0.01)
+        running.pop()
+        return {"status": "success", "cells": {}}
+
+    processor.register_function("look_around", look_around)
+    assert '"actions": [' in processor.generate_prompt()
+
+    results = await processor.execute_batch([
+        {"command_id": 1, "parameters": {}, "mode": "independent"},
+        {"command_id": 1, "parameters": {}, "mode": "independent"},
+        {"command_id": 0, "parameters": {"direction": "north"}, "mode": "sequential"},
+        {"command_id": 0, "parameters": {"direction": "east"}, "mode": "sequential"},
+    ], "batch")
+
+    assert max(peak) == 2, "Independent actions should overlap"
+    assert [r["status"] for r in results] == ["success", "success", "error", "aborted"]
+    assert len(processor.execution_history) == 3, "Aborted actions are not recorded"
+
+
+@pytest.mark.asyncio
+async def test_execute_batch_turns_bad_actions_into_errors(tmp_path):
+    processor = make_processor(tmp_path, response_format="batch")
+    calls = register_maze(processor)
+
+    results = await processor.execute_batch([
+        {"command_id": 0, "parameters": {"direction": "east"}, "mode": "independent"},
+        {"parameters": {}, "mode": "independent"},
+        {"command_id": 0, "parameters": {"direction": "south"}, "mode": "independent"},
+        {"command_id": 42, "parameters": {}},
+    ], "batch")
+
+    assert [r["status"] for r in results] == ["success", "error", "success", "aborted"]
+    assert "command_id" in results[1]["message"]
+    assert calls["move"] == 2, "Valid siblings of a bad action still run"
+    assert len(processor.execution_history) == 2
+
+
+@pytest.mark.asyncio
+async def test_read_only_commands_are_speculated_and_attached(tmp_path):
+    functions = json.loads(json.dumps(FUNCTIONS))
+    functions["functions"][1]["read_only"] = True
+    processor = make_processor(tmp_path, functions=functions, speculative_observations=True)
+    register_maze(processor)
+    looks = []
+
+    async def look_around(params):
+        looks.append(1)
+        return {"status": "success", "cells": {"north": "#"}}
+
+    processor.register_function("look_around", look_around)
+    fake_completion(processor, {"action": {"command_id": 1, "parameters": {}}})
+
+    response = await processor.get_next_action()
+    result = await processor.execute_command(response["action"]["command_id"], {}, "observe")
+    assert result["cells"] == {"north": "#"}
+    assert len(looks) == 1, "The speculative result is reused instead of running the command again"
+    assert processor.speculation_stats["used"] == 1
+
+    processor.attach_observations = True
+    prompts = fake_completion(processor, {"action": {"command_id": 0, "parameters": {"direction": "east"}}})
+    response = await processor.get_next_action()
+    assert "## Current Observations" in prompts[0] and '"north": "#"' in prompts[0]
+    await processor.execute_command(0, {"direction": "east"}, "move")
+    assert processor._speculations == {}
+
+
+@pytest.mark.asyncio
+async def test_pipelined_mode_plans_during_long_running_commands(tmp_path):
+    functions = json.loads(json.dumps(FUNCTIONS))
+    functions["functions"][0]["long_running"] = True
+    processor = make_processor(tmp_path, functions=functions, pipelined=True)
+    register_maze(processor)
+    prompts = fake_completion(
+        processor,
+        {"action": {"command_id": 1, "parameters": {}}},
+        {"action": {"command_id": 0, "parameters": {"direction": "east"}}},
+    )
+
+    await processor.execute_command(0, {"direction": "east"}, "move", expected_outcome="One cell east")
+    assert processor.execution_history[-1].status == "success"
+    response = await processor.get_next_action()
+    assert response["action"]["command_id"] == 1
+    assert len(prompts) == 1, "The action planned during the command is used"
+    assert '"status": "pending"' in prompts[0] and "One cell east" in prompts[0]
+
+    # A failed command invalidates the plan and the next action is requested again
+    prompts = fake_completion(processor, {"action": {"command_id": 0, "parameters": {"direction": "east"}}})
+    await processor.execute_command(0, {"direction": "north"}, "move", expected_outcome="One cell north")
+    response = await processor.get_next_action()
+    assert response["action"]["command_id"] == 0
+    assert len(prompts) == 1 and '"status": "pending"' not in prompts[0]
+    assert processor.pipeline_stats == {"planned": 2, "used": 1, "replanned": 1}
+
+
+@pytest.mark.asyncio
+async def test_observations_are_dropped_when_the_state_changes(tmp_path):
+    functions = json.loads(json.dumps(FUNCTIONS))
+    functions["functions"][0]["long_running"] = True
+    functions["functions"][1]["read_only"] = True
+    processor = make_processor(tmp_path, functions=functions, pipelined=True, attach_observations=True)
+    register_maze(processor)
+    prompts = fake_completion(
+        processor,
+        {"action": {"command_id": 0, "parameters": {"direction": "east"}}},
+        {"action": {"command_id": 1, "parameters": {}}},
+    )
+
+    response = await processor.get_next_action()
+    assert "## Current Observations" in prompts[0]
+    await processor.execute_command(response["action"]["command_id"], {"direction": "east"}, "move")
+    assert processor._observations == {}
+    await processor.get_next_action()
+    assert processor.pipeline_stats["used"] == 1 and len(prompts) == 2
+    assert "## Current Observations" not in prompts[1], "Observations from before the move are stale"
+
+
+@pytest.mark.asyncio
+async def test_pure_commands_are_memoized_per_state(tmp_path):
+    functions = json.loads(json.dumps(FUNCTIONS))
+    functions["functions"][1].update({"pure": True, "state_dependent": True})
+    processor = make_processor(tmp_path, functions=functions, result_cache=ResultCache(max_entries=2))
+    position = {"x": 0}
+    looks = []
+
+    async def look_around(params):
+        looks.append(position["x"])
+        return {"status": "success", "cells": {"east": "." if position["x"] < 3 else "#"}}
+
+    processor.register_function("look_around", look_around)
+    processor.register_state_provider(lambda: dict(position))
+
+    await processor.execute_command(1, {}, "look")
+    result = await processor.execute_command(1, {}, "look again")
+    assert looks == [0], "The second call is served from the cache"
+    assert result["cells"] == {"east": "."}
+    assert len(processor.execution_history) == 2, "Cache hits are still recorded"
+
+    for x in (1, 2, 0):
+        position["x"] = x
+        await processor.execute_command(1, {}, "look")
+    assert looks == [0, 1, 2, 0], "The entry for x=0 was evicted as least recently used"
+    assert processor.result_cache.stats() == {"hits": 1, "misses": 4, "evictions": 2, "entries": 2}
+
+
+def test_result_cache_ttl():
+    now = [0.0]
+    cache = ResultCache(ttl=10, clock=lambda: now[0])
+    cache.put("key", {"status": "success"})
+    now[0] = 5
+    assert cache.get("key") == {"status": "success"}
+    now[0] = 16
+    assert cache.get("key") is None
+
+
+def test_execution_history_indexes():
+    from datetime import datetime
+    from core.history import ExecutionHistory, ExecutionHistoryEntry
+
+    def entry(name, parameters, status="success"):
+        return ExecutionHistoryEntry(datetime.now(), 0, name, parameters, {"status": status},
+                                     "success" if status in ("success", "accepted") else "failed", "")
+
+    history = ExecutionHistory()
+    history.append(entry("throttle", {"wait_time": 50}, "accepted"))
+    history.append(entry("power", {"power": "on"}))
+    history.append(entry("throttle", {"wait_time": 60}, "accepted"))
+    history.append(entry("throttle", {"wait_time": 90}, "error"))
+    power_on = history.last_index("power", result_status="success")
+    assert power_on == 1
+    assert history.sum_parameter("throttle", "wait_time", since=power_on + 1, result_status="accepted") == 60
+
+    history.append(entry("throttle", {"wait_time": 70}, "accepted"))
+    assert history.sum_parameter("throttle", "wait_time", since=power_on + 1, result_status="accepted") == 130
+    assert history.count_of("throttle") == 4 and len(history.with_status("failed")) == 1
+
+    history.pop()
+    assert history.sum_parameter("throttle", "wait_time", result_status="accepted") == 110
+    del history[0]
+    assert history.last_index("power") == 0
+    assert history.sum_parameter("throttle", "wait_time", result_status="accepted") == 60
+
+
+@pytest.mark.asyncio
+async def test_completion_sequence_stops_the_episode(tmp_path):
+    goal = GOAL + (
+        "completion:\n"
+        "  sequence:\n"
+        "    - {command: move, parameters: {direction: east}, result_status: success}\n"
+        "    - {command: wait, result_status: success, sum: {seconds: 10}}\n"
+    )
+    processor = make_processor(tmp_path, goal=goal)
+    register_maze(processor)
+
+    async def wait(params):
+        return {"status": "success"}
+
+    processor.register_function("wait", wait, spec={"description": "Wait", "parameters": {}})
+    assert "completion" not in processor.generate_prompt()
+
+    await processor.execute_command(2, {"seconds": 4}, "too early")
+    await processor.execute_command(0, {"direction": "east"}, "move")
+    await processor.execute_command(2, {"seconds": 6}, "wait")
+    assert not processor.goal_achieved
+    assert processor.completion_goal.progress() == "1/2 steps, next: wait (seconds >= 10)"
+
+    await processor.execute_command(2, {"seconds": 5}, "wait")
+    assert processor.goal_achieved and processor.stopped
+    response = await processor.get_next_action()
+    assert response["stopped"] is True
+
+
+@pytest.mark.asyncio
+async def test_simulated_clock_drives_timestamps_and_sleeps(tmp_path):
+    import time
+    from datetime import datetime
+
+    clock = SimulatedClock(start=datetime(2025, 1, 1))
+    processor = make_processor(tmp_path, clock=clock)
+
+    async def move(params):
+        await processor.clock.sleep(6 * 3600)
+        return {"status": "success"}
+
+    processor.register_function("move", move)
+    started = time.monotonic()
+    for _ in range(4):
+        await processor.execute_command(0, {"direction": "east"}, "move")
+    assert time.monotonic() - started < 1
+    assert clock.now() == datetime(2025, 1, 2)
+    assert processor.execution_history[0].timestamp == datetime(2025, 1, 1, 6)
+
+
+@pytest.mark.asyncio
+async def test_simulated_clock_overlaps_concurrent_sleeps():
+    import asyncio
+
+    clock = SimulatedClock()
+    woken = []
+
+    async def sleeper(name, seconds):
+        await clock.sleep(seconds)
+        woken.append((name, clock.monotonic()))
+
+    await asyncio.gather(sleeper("long", 1800), sleeper("short", 60))
+    assert woken == [("short", 60), ("long", 1800)]
+    assert clock.monotonic() == 1800, "Concurrent sleeps overlap instead of adding up"
+
+    # A sleeper woken early can sleep again before the other one wakes
+    async def repeated():
+        for _ in range(3):
+            await sleeper("repeated", 100)
+
+    await asyncio.gather(sleeper("single", 250), repeated())
+    assert woken[2:] == [("repeated", 1900), ("repeated", 2000), ("single", 2050), ("repeated", 2100)]
+
+
+@pytest.mark.asyncio
+async def test_processors_share_the_monitoring_server(tmp_path):
+    first = make_processor(tmp_path, ui_visibility=True, monitor_port=0, session_name="maze")
+    second = make_processor(tmp_path, ui_visibility=True, monitor_port=0, session_name="maze")
+    server = get_monitoring_server()
+    assert first.prompt_display is server.sessions["maze"]
+    assert second.prompt_display is server.sessions["maze-2"]
+
+    register_maze(first)
+    await first.execute_command(0, {"direction": "east"}, "go east")
+    status = first.prompt_display.status
+    assert status["steps"] == 1 and status["last_action"]["command"] == "move"
+    assert status["step_latency_seconds"] >= 0
+    assert 'ai42z_steps_total{session="maze"} 1' in server.render_metrics()
+
+    first.close()
+    second.close()
+    assert first.prompt_display.closed
+
+
+def test_importing_the_processor_loads_no_heavy_dependencies():
+    import subprocess
+
+    src_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    code = (f"import sys; sys.path.insert(0, {src_dir!r}); import core.llm_processor; "
+            "print(sorted(m for m in ('openai', 'yaml', 'dotenv', 'flask') if m in sys.modules))")
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True).stdout
+    assert output.strip() == "[]"
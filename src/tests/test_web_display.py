@@ -0,0 +1,93 @@
+import json
+import sys
+import os
+import time
+import urllib.request
+
+# Add the src directory to the Python path
+sys.path.append(os.path.dirname(os.path.dirname(__file__)))
+
+from core.web_display import MonitoringServer, PromptDisplay, line_diff
+
+
+def parse_events(events):
+    parsed = []
+    for event in events:
+        fields = dict(line.split(": ", 1) for line in event.strip().split("\n"))
+        parsed.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return parsed
+
+
+def apply_diff(text, ops):
+    lines = text.split("\n")
+    for start, end, new_lines in reversed(ops):
+        lines[start:end] = new_lines
+    return "\n".join(lines)
+
+
+def test_line_diff_round_trip():
+    old = "Goal\nstep 1\nstep 2\nstatus: ok"
+    new = "Goal\nstep 1 done\nstep 2\nstep 3\nstatus: ok\nend"
+    ops = line_diff(old, new)
+    assert apply_diff(old, ops) == new
+    assert all(new_lines != ["Goal"] for _, _, new_lines in ops), "Unchanged lines are not sent"
+
+
+def test_clients_catch_up_with_diffs_or_a_snapshot():
+    display = PromptDisplay()
+    display.update_prompt("a\nb")
+    display.update_prompt("a\nb")
+    assert display.seq == 1, "Unchanged prompts are not new versions"
+
+    seq, events = display.events_since(None)
+    assert seq == 1 and parse_events(events) == [(1, "snapshot", {"seq": 1, "text": "a\nb"})]
+    assert display.events_since(1) == (1, [])
+
+    display.update_prompt("a\nc")
+    display.update_prompt("a\nc\nd")
+    seq, events = display.events_since(1)
+    assert seq == 3
+    text = "a\nb"
+    for version, kind, data in parse_events(events):
+        assert kind == "diff" and data["seq"] == version
+        text = apply_diff(text, data["ops"])
+    assert text == "a\nc\nd"
+
+    # A version that is no longer in the history needs a snapshot
+    _, events = display.events_since(-1)
+    assert parse_events(events)[0][1] == "snapshot"
+
+
+def test_monitoring_server_pages_and_metrics():
+    server = MonitoringServer(port=0)
+    first, second = server.session("agent"), server.session("agent")
+    assert (first.session_id, second.session_id) == ("agent", "agent-2")
+    first.update_prompt("prompt of the first agent")
+    first.update_status(steps=3, step_latency_seconds=0.25, summarizing=False,
+                        last_action={"command": "move", "status": "success"})
+
+    client = server.app.test_client()
+    index = client.get("/").get_data(as_text=True)
+    assert "sessions/agent/" in index and "sessions/agent-2/" in index
+    assert client.get("/sessions/agent/prompt").get_data(as_text=True) == "prompt of the first agent"
+    assert client.get("/sessions/agent/status").get_json()["last_action"]["command"] == "move"
+    assert client.get("/sessions/missing/").status_code == 404
+
+    metrics = client.get("/metrics").get_data(as_text=True)
+    assert "# TYPE ai42z_steps_total counter" in metrics
+    assert 'ai42z_steps_total{session="agent"} 3' in metrics
+    assert 'ai42z_step_latency_seconds{session="agent"} 0.25' in metrics
+    assert 'ai42z_prompt_version_total{session="agent-2"} 0' in metrics
+
+
+def test_monitoring_server_starts_without_blocking():
+    server = MonitoringServer(port=0)
+    started = time.perf_counter()
+    server.start()
+    try:
+        assert time.perf_counter() - started < 0.5
+        assert server.port != 0
+        with urllib.request.urlopen(f"{server.url}/metrics", timeout=5) as response:
+            assert response.status == 200
+    finally:
+        server.shutdown()